@@ -9,7 +9,11 @@ from src.health_check import check_llm_health
 from src.core.pdf_processor import PDFProcessor
 from src.routes import claims, health, fhir
 from src.services.llm.llm_factory import get_llm_service
-from src.middleware import LoggingMiddleware
+from src.services.llm.client_registry import get_client_registry, close_client_registry
+from src.services.fhir.bulk_fhir_generator import shutdown_bulk_executor
+from src.services.fhir.profile_validator import get_profile_validator
+from src.middleware import CompressionMiddleware, LoggingMiddleware
+from src.serialization import FastJSONResponse
 from src.logging_config import setup_logging
 from src import constants
 from src.config import settings
@@ -21,24 +25,30 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(constants.LOG_APP_STARTUP_LOADING)
-    is_llm_healthy = check_llm_health()
+    app.state.client_registry = get_client_registry()
+    is_llm_healthy = await check_llm_health()
     if not is_llm_healthy:
         logger.critical(constants.LOG_APP_LLM_HEALTH_FAILED)
         logger.critical(constants.LOG_APP_LLM_HEALTH_FIX_HINT)
         sys.exit(1)
     logger.info(constants.LOG_APP_LLM_HEALTH_OK)
     app.state.pdf_processor = PDFProcessor()
+    get_profile_validator()
     app.state.llm_service = get_llm_service()
+    await app.state.llm_service.warm_up(claims._extraction_request()[0])
     logger.info(constants.LOG_APP_STARTUP_SUCCESS)
     yield
     logger.info(constants.LOG_APP_SHUTDOWN)
+    await close_client_registry()
+    shutdown_bulk_executor()
 
 
 app = FastAPI(
     title=settings.app.title,
     description=settings.app.description,
     version=settings.app.version,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -49,6 +59,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(LoggingMiddleware)
 
 app.include_router(
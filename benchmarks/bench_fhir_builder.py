@@ -0,0 +1,97 @@
+"""
+Times FHIR bundle generation with the fhir.resources model mapper versus the
+direct-to-dict builder on a synthetic plan with many benefits and costs, and
+the cost of getting response bytes (stdlib json versus generate_json).
+
+    python benchmarks/bench_fhir_builder.py --benefits 300 --costs 300 --repeat 20
+"""
+import sys
+import json
+import time
+import argparse
+import logging
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.fhir.insurance_plan_fhir_dict_builder import InsurancePlanFHIRDictBuilder
+from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
+
+
+def build_payload(benefit_count: int, cost_count: int) -> dict:
+    benefits = [
+        {"typeCode": "", "typeDisplay": f"Benefit {i}", "limitValue": str(1000 + i), "limitUnit": "INR"}
+        for i in range(benefit_count)
+    ]
+    costs = [
+        {"categoryCode": "49122002", "categoryDisplay": "Ambulance", "benefitTypeCode": "49122002",
+         "benefitTypeDisplay": "Ambulance", "costType": "copay", "costValue": str(i % 50), "costUnit": "%"}
+        for i in range(cost_count)
+    ]
+    return {
+        "organisation": {"name": "Benchmark Insurance Co.", "phone": "1800-000-000", "email": "care@bench.in"},
+        "tpaOrganisation": {"name": "Benchmark TPA", "identifier": "TPA-001"},
+        "insurancePlan": {
+            "status": "active", "name": "Benchmark Plan", "typeCode": "01", "typeDisplay": "Hospitalisation Indemnity",
+            "periodStart": "2024-04-01", "coverageArea": ["India"], "networks": ["Network A", "Network B"],
+            "contacts": [{"purpose": "Claims", "phone": "1800-111-111"}],
+            "coverages": [{"typeDisplay": "Inpatient Care", "benefits": benefits}],
+            "plans": [{"planTypeCode": "01", "planTypeDisplay": "Individual", "specificCosts": costs}],
+        },
+    }
+
+
+def time_builder(builder_class, payload: dict, repeat: int, to_bytes=None, **kwargs) -> list:
+    build = to_bytes or (lambda builder: builder.generate_dict())
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build(builder_class(payload, **kwargs))
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def stdlib_json(builder) -> bytes:
+    return json.dumps(builder.generate_dict()).encode("utf-8")
+
+
+def report(title: str, results: dict) -> None:
+    baseline = statistics.median(next(iter(results.values())))
+    print(title)
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        print(f"  {name:<30} median={median * 1000:8.2f} ms  speed-up={baseline / median:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FHIR bundle builders.")
+    parser.add_argument("--benefits", type=int, default=300)
+    parser.add_argument("--costs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    payload = build_payload(args.benefits, args.costs)
+    print(f"{args.benefits} benefits, {args.costs} costs, {args.repeat} runs")
+    report("bundle dict", {
+        "model mapper": time_builder(InsurancePlanFHIRMapper, payload, args.repeat),
+        "dict builder": time_builder(InsurancePlanFHIRDictBuilder, payload, args.repeat, strict=False),
+        "dict builder (strict)": time_builder(InsurancePlanFHIRDictBuilder, payload, args.repeat, strict=True),
+    })
+    report("bundle bytes", {
+        "model mapper + json.dumps": time_builder(InsurancePlanFHIRMapper, payload, args.repeat, stdlib_json),
+        "model mapper generate_json": time_builder(
+            InsurancePlanFHIRMapper, payload, args.repeat, lambda builder: builder.generate_json()
+        ),
+        "dict builder + json.dumps": time_builder(
+            InsurancePlanFHIRDictBuilder, payload, args.repeat, stdlib_json, strict=False
+        ),
+        "dict builder generate_json": time_builder(
+            InsurancePlanFHIRDictBuilder, payload, args.repeat, lambda builder: builder.generate_json(), strict=False
+        ),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares the verbose and compact (compiled) extraction prompts.
+
+Static mode reports system-prompt tokens, response-schema size and the output
+tokens of a representative payload serialised both ways. With --live, every
+PDF under --input is extracted once per prompt mode against the configured
+LLM provider and the wall-clock latency is reported.
+
+    python benchmarks/bench_prompt_compiler.py
+    python benchmarks/bench_prompt_compiler.py --live --input data/input
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import constants
+from src.config import settings
+from src.core import prompts, prompt_compiler
+from src.core.token_counter import estimate_tokens
+from src.schemas.insurance_schemas import INSURANCE_DATA_JSON_SCHEMA
+from src.services.llm.replay_llm_service import build_stub_response
+
+
+def _row(label: str, verbose: int, compact: int) -> str:
+    saving = 100.0 * (verbose - compact) / verbose if verbose else 0.0
+    return f"{label:<28}{verbose:>10}{compact:>10}{saving:>9.1f}%"
+
+
+def run_static(sample_path: Path = None) -> None:
+    if sample_path:
+        with open(sample_path, "r", encoding="utf-8") as f:
+            sample = json.load(f)
+    else:
+        sample = json.loads(build_stub_response("# Sample Health Plan"))
+
+    verbose_output = json.dumps(sample, indent=2, ensure_ascii=False)
+    compact_output = prompt_compiler.minify(prompt_compiler.rename_keys(sample, prompts.COMPACT_KEY_ALIASES))
+
+    print(f"{'':<28}{'verbose':>10}{'compact':>10}{'saving':>10}")
+    print(_row("system prompt tokens", estimate_tokens(prompts.SYSTEM_PROMPT_FHIR), estimate_tokens(prompts.SYSTEM_PROMPT_FHIR_COMPACT)))
+    print(_row("response schema chars", len(json.dumps(INSURANCE_DATA_JSON_SCHEMA)), len(json.dumps(prompts.COMPACT_JSON_SCHEMA))))
+    print(_row("sample output tokens", estimate_tokens(verbose_output), estimate_tokens(compact_output)))
+
+
+async def _time_mode(mode: str, markdowns, llm_service) -> list:
+    from src.routes.claims import _extract_insurance_data
+
+    settings.llm.prompt_mode = mode
+    latencies = []
+    for markdown in markdowns:
+        started = time.perf_counter()
+        await _extract_insurance_data(llm_service, markdown)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run_live(input_dir: Path) -> None:
+    from src.core.pdf_processor import PDFProcessor
+    from src.services.llm.llm_factory import get_llm_service
+    from src.services.policy_pruner import PolicyPruner
+
+    pdf_files = sorted(input_dir.glob("*.pdf"))
+    if not pdf_files:
+        print(f"No PDFs found under {input_dir}")
+        return
+    pdf_processor, pruner = PDFProcessor(), PolicyPruner()
+    markdowns = [pruner.prune(pdf_processor.convert_to_markdown(str(path))) for path in pdf_files]
+    llm_service = get_llm_service()
+
+    original_mode = settings.llm.prompt_mode
+    try:
+        for mode in (constants.PROMPT_MODE_VERBOSE, constants.PROMPT_MODE_COMPACT):
+            latencies = await _time_mode(mode, markdowns, llm_service)
+            print(f"{mode:<10} n={len(latencies)} mean={statistics.mean(latencies):.2f}s max={max(latencies):.2f}s")
+    finally:
+        settings.llm.prompt_mode = original_mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the verbose vs compact extraction prompt.")
+    parser.add_argument("--sample", type=str, default=None, help="Extracted payload JSON used for the output-size comparison")
+    parser.add_argument("--live", action="store_true", help="Also time real extractions with the configured LLM provider")
+    parser.add_argument("--input", type=str, default="data/input", help="Directory of PDFs used by --live")
+    args = parser.parse_args()
+
+    run_static(Path(args.sample) if args.sample else None)
+    if args.live:
+        asyncio.run(run_live(Path(args.input)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Reproducible benchmark suite for the pipeline hot paths, with a history file
+and a regression gate.
+
+Each case times one hot path over deterministic synthetic inputs scaled from
+small to very large: PolicyPruner.prune, _clean_and_parse_llm_response, both
+FHIR bundle builders, the /fhir/bundle-summary and /fhir/validate handlers,
+and the pdftext fast path over data/input/*.pdf and over generated policy
+wordings of up to 1000 pages (src/synthetic). Every run is appended to a
+JSONL history together with the commit, Python version and machine, and
+`compare` fails (exit 1) when a case's median got slower than the baseline by
+more than --threshold.
+
+    python benchmarks/suite.py run                        # quick scale, appended to benchmarks/history.jsonl
+    python benchmarks/suite.py run --scale full --cases prune,validate
+    python benchmarks/suite.py compare --threshold 0.15   # latest run vs the previous comparable one
+    python benchmarks/suite.py run --compare              # both, for CI
+    python benchmarks/suite.py history
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import subprocess
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.bench_fhir_builder import build_payload
+from src.batch.report import percentile
+
+DEFAULT_HISTORY = ROOT_DIR / "benchmarks" / "history.jsonl"
+SCALES = {
+    "quick": ("small", "medium", "large"),
+    "full": ("small", "medium", "large", "xlarge"),
+}
+# Per-size input parameters: markdown sections, plan benefits/costs, and plans merged into one bundle.
+SIZES = {
+    "small": {"sections": 20, "benefits": 10, "plans": 1},
+    "medium": {"sections": 200, "benefits": 100, "plans": 10},
+    "large": {"sections": 2000, "benefits": 1000, "plans": 100},
+    "xlarge": {"sections": 10000, "benefits": 5000, "plans": 1000},
+}
+# Page counts of the synthetic policy wordings fed to the pdftext fast path.
+SYNTHETIC_PAGES = {"small": 10, "medium": 100, "large": 400, "xlarge": 1000}
+_JUNK_HEADINGS = ("Definitions", "Table of Contents", "Annexure I", "Grievance Redressal", "Free Look Period")
+_KEPT_HEADINGS = ("Coverage", "Room Rent Limits", "Day Care Procedures", "Co-payment", "Waiting Periods")
+
+# A case yields (size label, units, unit name, zero-argument callable to time).
+Workload = Tuple[str, int, str, Callable[[], Any]]
+
+
+def make_markdown(sections: int, seed: int = 1234) -> str:
+    rng = random.Random(seed)
+    words = ("policy", "insured", "hospital", "sum", "limit", "claim", "cover", "room", "rent", "days", "network")
+    parts = []
+    for index in range(sections):
+        junk = index % 5 == 0
+        parts.append(f"{'#' * rng.randint(1, 3)} {rng.choice(_JUNK_HEADINGS if junk else _KEPT_HEADINGS)} {index}")
+        for _ in range(rng.randint(2, 6)):
+            parts.append(" ".join(rng.choice(words) for _ in range(rng.randint(8, 24))) + ".")
+        parts.append("")
+    return "\n".join(parts)
+
+
+def make_llm_response(benefits: int) -> str:
+    payload = {"bundleType": "InsurancePlan", **build_payload(benefits, benefits)}
+    return "Here is the extracted data:\n```json\n" + json.dumps(payload, indent=2) + "\n```"
+
+
+def make_bundle(plans: int) -> dict:
+    from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+
+    bundle = build_fhir_bundle(build_payload(20, 20))
+    entries = list(bundle["entry"])
+    for index in range(1, plans):
+        for entry in build_fhir_bundle(build_payload(20, 20))["entry"]:
+            entry = json.loads(json.dumps(entry))
+            entry["fullUrl"] = f"{entry['fullUrl']}-{index}"
+            entries.append(entry)
+    bundle["entry"] = entries
+    return bundle
+
+
+def case_prune(sizes: List[str]) -> Iterator[Workload]:
+    from src.services.policy_pruner import PolicyPruner
+
+    pruner = PolicyPruner()
+    for size in sizes:
+        markdown = make_markdown(SIZES[size]["sections"])
+        yield size, len(markdown), "chars", lambda markdown=markdown: pruner.prune(markdown)
+
+
+def case_parse(sizes: List[str]) -> Iterator[Workload]:
+    from src.routes.claims import _clean_and_parse_llm_response
+
+    for size in sizes:
+        response = make_llm_response(SIZES[size]["benefits"])
+        yield size, len(response), "chars", lambda response=response: _clean_and_parse_llm_response(response)
+
+
+def case_mapper(sizes: List[str]) -> Iterator[Workload]:
+    from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
+
+    for size in sizes:
+        count = SIZES[size]["benefits"]
+        payload = build_payload(count, count)
+        yield size, count, "benefits", lambda payload=payload: InsurancePlanFHIRMapper(payload).generate_dict()
+
+
+def case_dict_builder(sizes: List[str]) -> Iterator[Workload]:
+    from src.services.fhir.insurance_plan_fhir_dict_builder import InsurancePlanFHIRDictBuilder
+
+    for size in sizes:
+        count = SIZES[size]["benefits"]
+        payload = build_payload(count, count)
+        yield size, count, "benefits", lambda payload=payload: InsurancePlanFHIRDictBuilder(payload, strict=False).generate_dict()
+
+
+def _route_case(path: str, sizes: List[str]) -> Iterator[Workload]:
+    # Drives the real handler through the ASGI stack in one event loop, so bodies above
+    # fhir.streaming.threshold_bytes take the same incremental-parse path as in production.
+    import httpx
+    from fastapi import FastAPI
+    from src.routes import fhir
+    from src import serialization
+
+    app = FastAPI()
+    app.include_router(fhir.router, prefix="/fhir")
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    def post(body: bytes) -> None:
+        response = loop.run_until_complete(client.post(path, content=body, headers={"content-type": "application/json"}))
+        response.raise_for_status()
+
+    try:
+        for size in sizes:
+            bundle = make_bundle(SIZES[size]["plans"])
+            body = serialization.dumps(bundle)
+            yield size, len(bundle["entry"]), "entries", lambda body=body: post(body)
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+
+
+def case_bundle_summary(sizes: List[str]) -> Iterator[Workload]:
+    return _route_case("/fhir/bundle-summary", sizes)
+
+
+def case_validate(sizes: List[str]) -> Iterator[Workload]:
+    from src.services.fhir.profile_validator import get_profile_validator
+
+    get_profile_validator()
+    return _route_case("/fhir/validate", sizes)
+
+
+def case_pdftext(sizes: List[str]) -> Iterator[Workload]:
+    # Real documents rather than synthetic sizes: one workload per sample PDF.
+    from src.core.pdf_processor import _get_pdf_text_via_pdftext, count_pdf_pages
+
+    for pdf_path in sorted((ROOT_DIR / "data" / "input").glob("*.pdf")):
+        yield pdf_path.stem, count_pdf_pages(str(pdf_path)) or 0, "pages", lambda path=str(pdf_path): _get_pdf_text_via_pdftext(path)
+
+
+def case_pdftext_synthetic(sizes: List[str]) -> Iterator[Workload]:
+    # Generated wordings of 10 to 1000 pages, since the sample PDFs only cover short documents.
+    import tempfile
+    from src.core.pdf_processor import _get_pdf_text_via_pdftext
+    from src.synthetic.policy_generator import generate_policy, write_policy
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            policy = generate_policy(0, pages=SYNTHETIC_PAGES[size], benefits=SIZES[size]["benefits"] // 4)
+            pdf_path = Path(tmp) / write_policy(policy, Path(tmp), ["pdf"])["files"]["pdf"]
+            yield size, policy.pages, "pages", lambda path=str(pdf_path): _get_pdf_text_via_pdftext(path)
+
+
+CASES: Dict[str, Callable[[List[str]], Iterator[Workload]]] = {
+    "prune": case_prune,
+    "parse": case_parse,
+    "mapper": case_mapper,
+    "dict_builder": case_dict_builder,
+    "bundle_summary": case_bundle_summary,
+    "validate": case_validate,
+    "pdftext": case_pdftext,
+    "pdftext_synthetic": case_pdftext_synthetic,
+}
+
+
+def measure(fn: Callable[[], Any], budget_seconds: float, min_repeat: int, max_repeat: int) -> List[float]:
+    # One warm-up call (imports, caches, first-touch allocations), then as many samples as fit the budget.
+    gc.collect()
+    started = time.perf_counter()
+    fn()
+    first = time.perf_counter() - started
+    repeat = max(min_repeat, min(max_repeat, int(budget_seconds / first) if first else max_repeat))
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _summarise(samples: List[float], units: int, unit: str) -> Dict[str, Any]:
+    median = statistics.median(samples)
+    return {
+        "median": median,
+        "min": min(samples),
+        "p95": percentile(samples, 0.95),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "samples": len(samples),
+        "units": units,
+        "unit": unit,
+        "units_per_second": units / median if median else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def run_suite(cases: List[str], scale: str, budget_seconds: float, min_repeat: int, max_repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name in cases:
+        for size, units, unit, fn in CASES[name](list(SCALES[scale])):
+            samples = measure(fn, budget_seconds, min_repeat, max_repeat)
+            results[f"{name}/{size}"] = result = _summarise(samples, units, unit)
+            rate = f"{result['units_per_second']:,.0f} {unit}/s" if result["units_per_second"] else ""
+            print(f"  {name + '/' + size:<28} median={result['median'] * 1000:10.2f} ms  p95={result['p95'] * 1000:10.2f} ms  "
+                  f"n={result['samples']:<3} {rate}")
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({platform.node()})",
+        "cpu_count": os.cpu_count(),
+        "scale": scale,
+        "results": results,
+    }
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(path: Path, record: Dict[str, Any]) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def select_baseline(history: List[Dict[str, Any]], candidate: Dict[str, Any], baseline: str) -> Optional[Dict[str, Any]]:
+    # "previous": the latest earlier run on the same machine and scale; an integer: that history index;
+    # anything else: the latest run whose commit starts with it.
+    earlier = [record for record in history if record is not candidate]
+    if baseline == "previous":
+        comparable = [
+            record for record in earlier
+            if record.get("machine") == candidate.get("machine") and record.get("scale") == candidate.get("scale")
+        ]
+        return comparable[-1] if comparable else None
+    if baseline.lstrip("-").isdigit():
+        return history[int(baseline)]
+    matching = [record for record in earlier if (record.get("commit") or "").startswith(baseline)]
+    return matching[-1] if matching else None
+
+
+def compare(
+    baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float, min_delta_seconds: float, stat: str = "median",
+) -> List[Dict[str, Any]]:
+    # A case regresses when it is both relatively (> threshold) and absolutely (> min_delta) slower,
+    # so timer noise on sub-millisecond cases does not fail the gate.
+    rows = []
+    for key, result in candidate["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        old, new = before[stat], result[stat]
+        change = (new - old) / old if old else 0.0
+        rows.append({
+            "case": key, "baseline": old, "candidate": new, "change": change,
+            "regressed": change > threshold and new - old > min_delta_seconds,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> None:
+    print(f"baseline  {baseline.get('commit')}  {baseline.get('timestamp')}")
+    print(f"candidate {candidate.get('commit')}  {candidate.get('timestamp')}")
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else ("faster" if row["change"] < -threshold else "")
+        print(f"  {row['case']:<28} {row['baseline'] * 1000:10.2f} ms -> {row['candidate'] * 1000:10.2f} ms  "
+              f"{row['change'] * 100:+7.1f}%  {flag}")
+
+
+def command_compare(args, history: List[Dict[str, Any]]) -> int:
+    if not history:
+        print(f"No benchmark history in {args.history}; run `suite.py run` first.")
+        return 2
+    candidate = history[int(args.candidate)]
+    baseline = select_baseline(history, candidate, args.baseline)
+    if baseline is None:
+        print(f"No baseline matching '{args.baseline}' in {args.history}.")
+        return 2
+    rows = compare(baseline, candidate, args.threshold, args.min_delta_ms / 1000, args.stat)
+    print_comparison(rows, baseline, candidate, args.threshold)
+    regressions = [row["case"] for row in rows if row["regressed"]]
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline hot paths and gate on regressions.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSONL file runs are appended to")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the suite and append the results to the history")
+    run.add_argument("--cases", type=str, default=",".join(CASES), help=f"Comma-separated subset of: {', '.join(CASES)}")
+    run.add_argument("--scale", choices=list(SCALES), default="quick")
+    run.add_argument("--budget", type=float, default=1.0, help="Seconds of sampling per case and size")
+    run.add_argument("--min-repeat", type=int, default=5)
+    run.add_argument("--max-repeat", type=int, default=50)
+    run.add_argument("--no-save", action="store_true", help="Print results without appending them to the history")
+    run.add_argument("--compare", action="store_true", help="Compare against the previous comparable run afterwards")
+
+    for command in (commands.add_parser("compare", help="Compare two runs from the history"), run):
+        command.add_argument("--baseline", type=str, default="previous", help="'previous', a history index, or a commit prefix")
+        command.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown as a fraction (0.15 = 15%%)")
+        command.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+        command.add_argument("--stat", choices=["median", "min", "p95"], default="median")
+    commands.choices["compare"].add_argument("--candidate", type=str, default="-1", help="History index of the run to check")
+    commands.add_parser("history", help="List recorded runs")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    if args.command == "history":
+        for index, record in enumerate(load_history(args.history)):
+            print(f"{index:>4}  {record['timestamp']}  {record.get('commit')}  {record['scale']:<6} {len(record['results'])} cases")
+        return 0
+    if args.command == "compare":
+        return command_compare(args, load_history(args.history))
+
+    cases = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    print(f"scale={args.scale}  cases={','.join(cases)}")
+    record = run_suite(cases, args.scale, args.budget, args.min_repeat, args.max_repeat)
+    if args.no_save:
+        return 0
+    append_history(args.history, record)
+    print(f"Appended to {args.history}")
+    if args.compare:
+        args.candidate = "-1"
+        return command_compare(args, load_history(args.history))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
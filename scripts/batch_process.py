@@ -1,6 +1,5 @@
-import os
 import sys
-import json
+import signal
 import asyncio
 import logging
 import argparse
@@ -8,57 +7,70 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from src.core.pdf_processor import PDFProcessor
 from src.services.llm.llm_factory import get_llm_service
-from src.services.policy_pruner import PolicyPruner
-from src.core import prompts
-from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
-from src.routes.claims import _clean_and_parse_llm_response
+from src.services.fhir.fhir_mapping_context import FHIRMappingContext
+from src.services.fhir.bulk_export import BulkExportWriter
+from src.batch.lease_queue import FileLeaseQueue
+from src.batch.manifest import BatchManifest, stage_fingerprints
+from src.batch.report import BatchReport, run_info
+from src.batch.runner import run_llm_batch, run_pipelined, run_watch
+from src.batch.watch import FolderWatcher, InputMover
+from src.batch.stages import BundleSink, convert_workers
+from src.routes.claims import _extraction_request
+from src.config import settings
 from src import constants
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("batch_processor")
 
 
-async def process_single_pdf(pdf_path: Path, output_dir: Path, pdf_processor, llm_service, pruner):
-    logger.info(constants.LOG_BATCH_PROCESSING_FILE.format(filename=pdf_path.name))
-    try:
-        logger.info(constants.LOG_BATCH_EXTRACTING_TEXT)
-        loop = asyncio.get_running_loop()
-        markdown_text = await loop.run_in_executor(None, pdf_processor.convert_to_markdown, str(pdf_path))
-
-        logger.info(constants.LOG_BATCH_PRUNING_TEXT)
-        clean_markdown = pruner.prune(markdown_text)
-
-        logger.info(constants.LOG_BATCH_SENDING_LLM)
-        llm_response = await llm_service.process_text(
-            system_prompt=prompts.SYSTEM_PROMPT_FHIR, user_prompt=clean_markdown
-        )
-
-        logger.info(constants.LOG_BATCH_PARSING_JSON)
-        cleaned_json = _clean_and_parse_llm_response(llm_response)
-
-        logger.info(constants.LOG_BATCH_GENERATING_FHIR)
-        mapper = InsurancePlanFHIRMapper(cleaned_json)
-        bundle = mapper.generate_dict()
+def _stop_on_signal() -> asyncio.Event:
+    # SIGINT/SIGTERM stop the watcher; documents already in the pipeline finish before the process exits.
+    stop = asyncio.Event()
 
-        output_file = output_dir / f"{pdf_path.stem}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(bundle, f, indent=2, ensure_ascii=False)
+    def request_stop() -> None:
+        logger.info(constants.LOG_WATCH_STOPPING)
+        stop.set()
 
-        logger.info(constants.LOG_BATCH_FILE_SUCCESS.format(output_filename=output_file.name))
-        return True
-
-    except Exception as e:
-        logger.error(constants.LOG_BATCH_FILE_FAILED.format(filename=pdf_path.name, error=e), exc_info=False)
-        return False
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, request_stop)
+        except NotImplementedError:
+            pass
+    return stop
 
 
 async def main():
     parser = argparse.ArgumentParser(description="Batch process PDFs into FHIR bundles.")
     parser.add_argument("--input", "-i", type=str, default="data/input", help="Directory containing input PDFs")
     parser.add_argument("--output", "-o", type=str, default="data/output", help="Directory where JSON bundles will be saved")
+    parser.add_argument("--llm-batch", action="store_true", help="Convert all inputs first, then submit one provider batch inference job")
+    parser.add_argument("--shared-organizations", action="store_true", default=settings.fhir.shared_organizations,
+                        help="Write Organizations once to shared_organizations.json and keep plan bundles lean")
+    parser.add_argument("--format", choices=[constants.EXPORT_FORMAT_JSON, constants.EXPORT_FORMAT_NDJSON], default=settings.fhir.export.format,
+                        help="json: one bundle file per PDF; ndjson: FHIR Bulk Data files per resource type plus manifest.json")
+    parser.add_argument("--compression", choices=[constants.EXPORT_COMPRESSION_NONE, constants.EXPORT_COMPRESSION_GZIP, constants.EXPORT_COMPRESSION_ZSTD],
+                        default=settings.fhir.export.compression, help="Streaming compression for --format ndjson")
+    parser.add_argument("--convert-workers", type=int, default=settings.batch.convert_workers,
+                        help="PDF conversion processes (default: one per CPU)")
+    parser.add_argument("--llm-concurrency", type=int, default=settings.batch.llm_concurrency,
+                        help="Extraction requests in flight at once")
+    parser.add_argument("--queue-size", type=int, default=settings.batch.queue_size,
+                        help="Documents buffered between pipeline stages")
+    parser.add_argument("--force", action="store_true", default=not settings.batch.resume,
+                        help="Ignore the resume manifest and reprocess every input")
+    parser.add_argument("--distributed", action="store_true",
+                        help="Share the run with other nodes on the same volume by claiming PDFs through lease files")
+    parser.add_argument("--node-id", type=str, default=settings.batch.distributed.node_id,
+                        help="Name of this node in lease files (default: <hostname>-<pid>)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and process PDFs as they are dropped into the input folder")
     args = parser.parse_args()
+    if args.distributed and (args.llm_batch or args.format != constants.EXPORT_FORMAT_JSON or args.shared_organizations):
+        parser.error(constants.ERROR_MESSAGE_BATCH_DISTRIBUTED_OPTIONS)
+    if args.watch and (args.llm_batch or args.distributed or args.format != constants.EXPORT_FORMAT_JSON or args.shared_organizations):
+        parser.error(constants.ERROR_MESSAGE_BATCH_WATCH_OPTIONS)
 
     root_dir = Path(__file__).resolve().parent.parent
     input_dir = root_dir / args.input
@@ -68,29 +80,76 @@ async def main():
     if not input_dir.exists():
         logger.info(constants.LOG_BATCH_INPUT_DIR_CREATING)
         input_dir.mkdir(parents=True, exist_ok=True)
-        return
+        if not args.watch:
+            return
 
     logger.info(constants.LOG_BATCH_OUTPUT_DIR.format(output_dir=output_dir))
     output_dir.mkdir(parents=True, exist_ok=True)
 
     pdf_files = list(input_dir.glob("*.pdf"))
-    if not pdf_files:
+    if not pdf_files and not args.watch:
         logger.info(constants.LOG_BATCH_NO_PDFS)
         return
 
     logger.info(constants.LOG_BATCH_FOUND_PDFS.format(count=len(pdf_files)))
 
-    pdf_processor = PDFProcessor()
     llm_service = get_llm_service()
-    pruner = PolicyPruner()
+    context = FHIRMappingContext(shared_organizations=args.shared_organizations)
+    exporter = None
+    if args.format == constants.EXPORT_FORMAT_NDJSON:
+        exporter = BulkExportWriter(output_dir, compression=args.compression, request=" ".join(sys.argv))
+    sink = BundleSink(output_dir, context, exporter)
+    workers = convert_workers(args.convert_workers)
+    output_settings = {"format": args.format, "compression": args.compression, "shared_organizations": args.shared_organizations}
+    fingerprints = stage_fingerprints(*_extraction_request(), output_settings)
+    manifest = None
+    lease_queue = None
+    if args.distributed:
+        # SQLite locking is not reliable across NFS clients, so distributed runs track progress in lease/done files.
+        lease_queue = FileLeaseQueue(
+            output_dir / constants.BATCH_LEASE_DIRNAME, input_dir,
+            fingerprint=fingerprints[constants.BATCH_STAGE_WRITE], node_id=args.node_id,
+        )
+    elif not args.force and not args.llm_batch:
+        # Exports and shared-organisation runs rebuild their outputs every run, so they only reuse cached extractions.
+        manifest = BatchManifest(
+            output_dir, fingerprints,
+            skip_completed=args.format == constants.EXPORT_FORMAT_JSON and not args.shared_organizations,
+        )
+
+    mode, report_name = constants.BATCH_MODE_PIPELINED, constants.BATCH_REPORT_BASENAME
+    if args.llm_batch:
+        mode = constants.BATCH_MODE_LLM_BATCH
+    elif args.watch:
+        mode = constants.BATCH_MODE_WATCH
+    elif lease_queue is not None:
+        # Every node writes its own report next to the shared outputs.
+        mode, report_name = constants.BATCH_MODE_DISTRIBUTED, f"{report_name}.{lease_queue.node_id}"
+    report = BatchReport(run_info(workers, None if args.llm_batch else args.llm_concurrency, mode))
 
     logger.info(constants.LOG_BATCH_START + "\n" + constants.LOG_BATCH_SEPARATOR)
 
-    success_count = 0
-    for file in pdf_files:
-        success = await process_single_pdf(file, output_dir, pdf_processor, llm_service, pruner)
-        if success:
-            success_count += 1
+    try:
+        if args.llm_batch:
+            success_count = await run_llm_batch(pdf_files, sink, llm_service, workers, report)
+        elif args.watch:
+            watcher = FolderWatcher(input_dir)
+            mover = InputMover(
+                watcher, root_dir / settings.batch.watch.processed_dir, root_dir / settings.batch.watch.failed_dir, manifest,
+            )
+            await run_watch(
+                watcher, mover, _stop_on_signal(), sink, llm_service, workers, args.llm_concurrency, args.queue_size, report,
+            )
+            return
+        else:
+            success_count = await run_pipelined(
+                pdf_files, sink, llm_service, workers, args.llm_concurrency, args.queue_size, manifest, lease_queue, report,
+            )
+    finally:
+        sink.close()
+        if manifest is not None:
+            manifest.close()
+        report.write(output_dir, report_name)
 
     logger.info(constants.LOG_BATCH_SEPARATOR)
     logger.info(constants.LOG_BATCH_COMPLETE.format(success=success_count, total=len(pdf_files)))
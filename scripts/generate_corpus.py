@@ -0,0 +1,101 @@
+import sys
+import json
+import random
+import logging
+import argparse
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.synthetic.policy_generator import generate_policy, write_policy
+from src.config import ROOT_DIR, settings
+from src import constants
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("corpus_generator")
+
+FORMATS = (constants.SYNTHETIC_FORMAT_MARKDOWN, constants.SYNTHETIC_FORMAT_PDF, constants.SYNTHETIC_FORMAT_SCAN)
+
+
+def _range(value: str) -> Tuple[int, int]:
+    # "40" or "20-400"; each document draws its own value from the range.
+    low, _, high = value.partition("-")
+    try:
+        bounds = int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N or MIN-MAX, got '{value}'")
+    if bounds[0] < 1 or bounds[1] < bounds[0]:
+        raise argparse.ArgumentTypeError(f"invalid range '{value}'")
+    return bounds
+
+
+def _record_replay(pdf_path: Path, payload: dict, recordings_dir: Path) -> None:
+    # Keys the ground truth on exactly the prompt a batch run sends for this PDF (fast-path text, pruned),
+    # so LLM__PROVIDER=replay extracts it offline.
+    from src.batch.stages import convert_document
+    from src.routes.claims import _extraction_request
+    from src.services.llm.replay_llm_service import compute_prompt_hash, write_recording
+
+    system_prompt, response_schema = _extraction_request()
+    converted = convert_document(pdf_path)
+    prompt_hash = compute_prompt_hash(system_prompt, converted.markdown, response_schema)
+    write_recording(recordings_dir, prompt_hash, json.dumps(payload, ensure_ascii=False), constants.SYNTHETIC_REPLAY_PROVIDER)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic insurance policy documents with ground-truth extractions.")
+    parser.add_argument("--output", "-o", type=str, default="data/synthetic", help="Directory the corpus is written to")
+    parser.add_argument("--count", "-n", type=int, default=10, help="Number of documents")
+    parser.add_argument("--pages", type=_range, default=(8, 40), help="Pages per document, N or MIN-MAX")
+    parser.add_argument("--benefits", type=_range, default=(20, 80), help="Benefits per plan, N or MIN-MAX")
+    parser.add_argument("--costs", type=_range, default=None, help="Co-pay/deductible rows per plan (default: a quarter of the benefits)")
+    parser.add_argument("--junk-ratio", type=float, default=0.4,
+                        help="Share of each document in sections headed by policy_pruner.junk_keywords")
+    parser.add_argument("--formats", type=str, default=",".join(FORMATS),
+                        help=f"Comma-separated subset of: {', '.join(FORMATS)} (scanned = image-only PDF, no text layer)")
+    parser.add_argument("--scan-dpi", type=int, default=150, help="Resolution of the scanned variant")
+    parser.add_argument("--seed", type=int, default=0, help="Same seed, same corpus")
+    parser.add_argument("--replay", action="store_true",
+                        help="Also write replay recordings of the ground truth for the text-layer PDFs")
+    args = parser.parse_args()
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+    if not 0.0 <= args.junk_ratio < 1.0:
+        parser.error("--junk-ratio must be in [0, 1)")
+
+    output_dir = ROOT_DIR / args.output
+    output_dir.mkdir(parents=True, exist_ok=True)
+    recordings_dir = ROOT_DIR / settings.llm.replay.recordings_dir
+    if args.replay:
+        recordings_dir.mkdir(parents=True, exist_ok=True)
+    # Sizes are drawn from their own stream so that changing --count does not change the earlier documents.
+    sizes = random.Random(f"sizes:{args.seed}")
+    rows, recordings = [], 0
+    for index in range(args.count):
+        pages = sizes.randint(*args.pages)
+        benefits = sizes.randint(*args.benefits)
+        costs = sizes.randint(*args.costs) if args.costs else None
+        policy = generate_policy(index, args.seed, pages, benefits, costs, args.junk_ratio)
+        row = write_policy(policy, output_dir, formats, args.scan_dpi)
+        logger.info(constants.LOG_SYNTHETIC_GENERATED.format(**row))
+        if args.replay and constants.SYNTHETIC_FORMAT_PDF in row["files"]:
+            _record_replay(output_dir / row["files"][constants.SYNTHETIC_FORMAT_PDF], policy.payload, recordings_dir)
+            recordings += 1
+        elif args.replay:
+            logger.info(constants.LOG_SYNTHETIC_REPLAY_SKIPPED.format(name=policy.name))
+        rows.append(row)
+
+    index = {
+        "seed": args.seed, "pages": args.pages, "benefits": args.benefits, "costs": args.costs,
+        "junk_ratio": args.junk_ratio, "junk_keywords": settings.policy_pruner.junk_keywords, "formats": formats,
+        "documents": rows,
+    }
+    (output_dir / constants.SYNTHETIC_INDEX_FILENAME).write_text(json.dumps(index, indent=2), encoding="utf-8")
+    logger.info(constants.LOG_SYNTHETIC_COMPLETE.format(count=len(rows), output_dir=output_dir, recordings=recordings))
+
+
+if __name__ == "__main__":
+    main()
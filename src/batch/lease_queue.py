@@ -0,0 +1,237 @@
+import asyncio
+import errno
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from src.batch.stages import write_atomic
+from src.config import settings
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+_LEASE = ".lease"
+_DONE = ".done"
+_FAILED = ".failed"
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FileLeaseQueue:
+
+    # Work queue for several batch nodes sharing one volume, with no broker: a node owns an input while it
+    # holds `<key>.lease`, created with O_EXCL so exactly one create wins. A heartbeat thread touches held
+    # leases; a lease whose mtime is older than lease_seconds belongs to a dead node and is reclaimed by
+    # renaming it away (also atomic, so one reclaimer wins). `<key>.done` records the input's size/mtime and
+    # the settings fingerprint, so completed inputs are skipped by every node until they or the settings change.
+
+    def __init__(
+        self,
+        queue_dir: Path,
+        input_dir: Path,
+        fingerprint: str = "",
+        node_id: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        config = settings.batch.distributed
+        self.queue_dir = queue_dir
+        self.input_dir = input_dir
+        self.fingerprint = fingerprint
+        self.node_id = node_id or config.node_id or default_node_id()
+        self.lease_seconds = lease_seconds or config.lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds or config.heartbeat_seconds
+        self.poll_seconds = poll_seconds or config.poll_seconds
+        self.max_attempts = max_attempts or config.max_attempts
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self._held: Dict[str, Tuple[Path, str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def key(self, path: Path) -> str:
+        relative = path.resolve().relative_to(self.input_dir.resolve()).as_posix()
+        return f"{path.stem}-{hashlib.sha1(relative.encode('utf-8')).hexdigest()[:12]}"
+
+    def _marker(self, key: str, suffix: str) -> Path:
+        return self.queue_dir / f"{key}{suffix}"
+
+    def _identity(self, path: Path) -> Optional[Dict[str, Any]]:
+        # None once another node or an operator has removed the input.
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "fingerprint": self.fingerprint}
+
+    def _read(self, marker: Path) -> Optional[dict]:
+        try:
+            return json.loads(marker.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def is_done(self, path: Path) -> bool:
+        # A vanished input counts as finished: there is nothing left to process.
+        identity = self._identity(path)
+        if identity is None:
+            return True
+        record = self._read(self._marker(self.key(path), _DONE))
+        return record is not None and record["identity"] == identity
+
+    def _attempts(self, path: Path) -> int:
+        identity = self._identity(path)
+        record = self._read(self._marker(self.key(path), _FAILED))
+        if identity is None or record is None or record["identity"] != identity:
+            return 0
+        return record["attempts"]
+
+    def _is_stale(self, lease: Path) -> bool:
+        try:
+            return time.time() - lease.stat().st_mtime > self.lease_seconds
+        except FileNotFoundError:
+            return False
+
+    def _create_lease(self, lease: Path) -> Optional[str]:
+        try:
+            fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        token = uuid.uuid4().hex
+        with os.fdopen(fd, "w") as f:
+            json.dump({"node": self.node_id, "token": token, "acquired_at": time.time()}, f)
+        return token
+
+    def _owns(self, lease: Path, token: str) -> bool:
+        # The path alone is not enough: after a reclaim it names another node's lease.
+        record = self._read(lease)
+        return record is not None and record.get("token") == token
+
+    def _reclaim(self, key: str, lease: Path) -> Optional[str]:
+        orphan = lease.with_name(f"{lease.name}.{self.node_id}.orphan")
+        try:
+            os.rename(lease, orphan)
+        except FileNotFoundError:
+            return None
+        # The owner may have heartbeated between our stat and the rename; hand a live lease back.
+        if not self._is_stale(orphan):
+            try:
+                os.link(orphan, lease)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            orphan.unlink(missing_ok=True)
+            return None
+        previous = self._read(orphan) or {}
+        orphan.unlink(missing_ok=True)
+        logger.warning(constants.LOG_BATCH_LEASE_RECLAIMED.format(key=key, node=previous.get("node", "unknown")))
+        return self._create_lease(lease)
+
+    def try_claim(self, path: Path) -> bool:
+        key = self.key(path)
+        lease = self._marker(key, _LEASE)
+        token = self._create_lease(lease) or (self._is_stale(lease) and self._reclaim(key, lease))
+        if not token:
+            return False
+        # Another node may have finished the input between our done-check and the claim.
+        if self.is_done(path):
+            lease.unlink(missing_ok=True)
+            return False
+        with self._lock:
+            self._held[key] = (lease, token)
+        return True
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            held = self._held.pop(key, None)
+        if held is not None and self._owns(*held):
+            held[0].unlink(missing_ok=True)
+
+    def complete(self, path: Path, outputs: Sequence[Any] = ()) -> None:
+        key = self.key(path)
+        record = {
+            "identity": self._identity(path), "node": self.node_id, "finished_at": time.time(),
+            "outputs": [str(output) for output in outputs or []],
+        }
+        write_atomic(self._marker(key, _DONE), json.dumps(record).encode("utf-8"))
+        self._marker(key, _FAILED).unlink(missing_ok=True)
+        self._release(key)
+
+    def fail(self, path: Path, error: BaseException) -> None:
+        key = self.key(path)
+        record = {
+            "identity": self._identity(path), "node": self.node_id, "attempts": self._attempts(path) + 1,
+            "error": str(error),
+        }
+        write_atomic(self._marker(key, _FAILED), json.dumps(record).encode("utf-8"))
+        self._release(key)
+
+    def on_result(self, stage: str, path: Path, result: Any) -> None:
+        if stage == constants.BATCH_STAGE_WRITE:
+            self.complete(path, result)
+
+    def on_failure(self, stage: str, path: Path, error: BaseException) -> None:
+        self.fail(path, error)
+
+    def heartbeat(self) -> None:
+        with self._lock:
+            held = list(self._held.items())
+        for key, (lease, token) in held:
+            if self._owns(lease, token):
+                try:
+                    os.utime(lease)
+                    continue
+                except FileNotFoundError:
+                    pass
+            # Reclaimed after we missed heartbeats; outputs are replaced atomically, so finishing is harmless.
+            logger.warning(constants.LOG_BATCH_LEASE_LOST.format(key=key))
+            with self._lock:
+                self._held.pop(key, None)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.heartbeat_seconds):
+            self.heartbeat()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name="batch-lease-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._lock:
+            keys = list(self._held)
+        for key in keys:
+            self._release(key)
+
+    async def claims(self, sources: List[Path]) -> AsyncIterator[Path]:
+        # Every node walks the whole catalogue. Inputs leased elsewhere are revisited each poll until they are
+        # done, dead-lettered after max_attempts, or their lease expires and this node takes them over.
+        pending = list(sources)
+        while pending:
+            waiting = []
+            for path in pending:
+                if self.is_done(path):
+                    continue
+                if self._attempts(path) >= self.max_attempts:
+                    logger.error(constants.LOG_BATCH_LEASE_GAVE_UP.format(filename=path.name, attempts=self.max_attempts))
+                    continue
+                if self.try_claim(path):
+                    yield path
+                else:
+                    waiting.append(path)
+            pending = waiting
+            if pending:
+                await asyncio.sleep(self.poll_seconds)
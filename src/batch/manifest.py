@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.batch.stages import ConvertedDocument, write_atomic
+from src.config import settings
+from src import constants, serialization
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SCHEMA_VERSION = "1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS inputs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    stage TEXT,
+    write_fingerprint TEXT,
+    outputs TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def content_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def configured_model() -> Optional[str]:
+    provider_settings = getattr(settings.llm, settings.llm.provider, None)
+    return getattr(provider_settings, "model_name", None) or getattr(provider_settings, "model_id", None)
+
+
+def stage_fingerprints(system_prompt: str, response_schema: Any, output_settings: Dict[str, Any]) -> Dict[str, str]:
+    # Chained: a change to conversion settings also invalidates the extraction and write stages after it.
+    llm = settings.llm
+    convert = _digest(
+        settings.pdf_processor.model_dump(), settings.policy_pruner.model_dump(),
+        settings.marker.model_precision, settings.marker.exclude_images,
+    )
+    extract = _digest(
+        convert, llm.provider, configured_model(), llm.prompt_mode, llm.routing.model_dump(), system_prompt, response_schema,
+    )
+    write = _digest(extract, settings.fhir.builder, output_settings)
+    return {
+        constants.BATCH_STAGE_CONVERT: convert,
+        constants.BATCH_STAGE_EXTRACT: extract,
+        constants.BATCH_STAGE_WRITE: write,
+    }
+
+
+class BatchManifest:
+
+    # Per-output-directory record of every input: content hash, stage reached and outputs. Converted markdown
+    # and extracted JSON are kept as artifacts named by content hash + stage fingerprint, so a rerun picks up
+    # after the last persisted stage, and a changed file or setting only invalidates the stages it affects.
+    # resume() runs in a worker thread while the result callbacks run on the event loop, so the connection is
+    # shared between threads and every statement is serialized by a lock; hashing happens outside it.
+
+    def __init__(self, output_dir: Path, fingerprints: Dict[str, str], skip_completed: bool = True):
+        self.fingerprints = fingerprints
+        self.skip_completed = skip_completed
+        self.cache_dir = output_dir / constants.BATCH_CACHE_DIRNAME
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(output_dir / constants.BATCH_MANIFEST_FILENAME, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + _SCHEMA)
+        version = self._connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if version is not None and version[0] != MANIFEST_SCHEMA_VERSION:
+            self._connection.execute("DELETE FROM inputs")
+        self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (MANIFEST_SCHEMA_VERSION,))
+        self._connection.commit()
+        self._hashes: Dict[str, str] = {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _artifact(self, digest: str, stage: str) -> Path:
+        extension = ".md.json" if stage == constants.BATCH_STAGE_CONVERT else ".json"
+        return self.cache_dir / f"{digest}.{self.fingerprints[stage][:16]}{extension}"
+
+    def _row(self, key: str) -> Optional[Tuple]:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT size, mtime_ns, content_hash, stage, write_fingerprint, outputs FROM inputs WHERE path = ?", (key,)
+            ).fetchone()
+
+    def _update(self, sql: str, parameters: Tuple) -> None:
+        with self._lock:
+            self._connection.execute(sql, parameters)
+            self._connection.commit()
+
+    def _hash(self, path: Path, row: Optional[Tuple]) -> Tuple[str, os.stat_result]:
+        # Hashing is skipped when size and mtime still match the manifest, as git does for its index.
+        stat = path.stat()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2], stat
+        return content_hash(path), stat
+
+    def resume(self, path: Path) -> Tuple[Optional[str], Any]:
+        key = str(path.resolve())
+        row = self._row(key)
+        digest, stat = self._hash(path, row)
+        self._hashes[key] = digest
+        if row is None or row[2] != digest:
+            self._upsert(key, stat, digest, stage=None)
+        elif (
+            self.skip_completed and row[3] == constants.BATCH_STAGE_WRITE
+            and row[4] == self.fingerprints[constants.BATCH_STAGE_WRITE]
+            and all(Path(output).exists() for output in json.loads(row[5]))
+        ):
+            logger.info(constants.LOG_BATCH_RESUME.format(filename=path.name, stage=constants.BATCH_MANIFEST_DONE))
+            return None, None
+
+        extracted = self._artifact(digest, constants.BATCH_STAGE_EXTRACT)
+        if extracted.exists():
+            logger.info(constants.LOG_BATCH_RESUME.format(filename=path.name, stage=constants.BATCH_STAGE_WRITE))
+            return constants.BATCH_STAGE_WRITE, serialization.loads(extracted.read_bytes())
+        converted = self._artifact(digest, constants.BATCH_STAGE_CONVERT)
+        if converted.exists():
+            logger.info(constants.LOG_BATCH_RESUME.format(filename=path.name, stage=constants.BATCH_STAGE_EXTRACT))
+            cached = ConvertedDocument(**serialization.loads(converted.read_bytes()))
+            # Not converted in this run, so it contributes no conversion time to the run's report.
+            return constants.BATCH_STAGE_EXTRACT, cached._replace(seconds=None)
+        return constants.BATCH_STAGE_CONVERT, None
+
+    def _upsert(self, key: str, stat: os.stat_result, digest: str, stage: Optional[str]) -> None:
+        self._update(
+            "INSERT INTO inputs (path, size, mtime_ns, content_hash, stage, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+            "content_hash = excluded.content_hash, stage = excluded.stage, write_fingerprint = NULL, "
+            "outputs = '[]', error = NULL, updated_at = excluded.updated_at",
+            (key, stat.st_size, stat.st_mtime_ns, digest, stage, _now()),
+        )
+
+    def on_result(self, stage: str, path: Path, result: Any) -> None:
+        key = str(path.resolve())
+        digest = self._hashes[key]
+        outputs: List[str] = []
+        if stage == constants.BATCH_STAGE_CONVERT:
+            write_atomic(self._artifact(digest, stage), serialization.dumps(result._asdict()))
+        elif stage == constants.BATCH_STAGE_EXTRACT:
+            write_atomic(self._artifact(digest, stage), serialization.dumps(result))
+        else:
+            outputs = [str(output) for output in result or []]
+        self._update(
+            "UPDATE inputs SET stage = ?, write_fingerprint = ?, outputs = ?, error = NULL, updated_at = ? WHERE path = ?",
+            (
+                stage, self.fingerprints[stage] if stage == constants.BATCH_STAGE_WRITE else None,
+                json.dumps(outputs), _now(), key,
+            ),
+        )
+
+    def on_failure(self, stage: str, path: Path, error: BaseException) -> None:
+        self._update(
+            "UPDATE inputs SET error = ?, updated_at = ? WHERE path = ?",
+            (f"{stage}: {error}", _now(), str(path.resolve())),
+        )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
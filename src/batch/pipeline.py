@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple, Union
+
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+STAGES = (constants.BATCH_STAGE_CONVERT, constants.BATCH_STAGE_EXTRACT, constants.BATCH_STAGE_WRITE)
+
+# resume(source) -> (stage to start at, that stage's input) or (None, None) when the source is already done
+# resume and the result/failure callbacks are called in worker threads: they hash inputs, write artifacts,
+# commit to SQLite and move files, none of which may block the loop.
+ResumeFn = Callable[[Any], Tuple[Optional[str], Any]]
+StageCallback = Callable[[str, Any, Any], None]
+
+
+class PipelineStats:
+
+    def __init__(self, on_failure: Optional[StageCallback] = None):
+        self.succeeded = 0
+        self.skipped = 0
+        self.failures: List[Tuple[Any, str, BaseException]] = []
+        self._on_failure = on_failure
+
+    async def record_failure(self, source: Any, stage: str, error: BaseException) -> None:
+        self.failures.append((source, stage, error))
+        logger.error(constants.LOG_BATCH_STAGE_FAILED.format(stage=stage, filename=getattr(source, "name", source), error=error))
+        if self._on_failure is not None:
+            await asyncio.to_thread(self._on_failure, stage, source, error)
+
+
+async def _run_stage(
+    name: str,
+    inbox: asyncio.Queue,
+    outbox: Optional[asyncio.Queue],
+    workers: int,
+    downstream_workers: int,
+    handle: Callable[[Any, Any], Awaitable[Any]],
+    stats: PipelineStats,
+    on_result: Optional[StageCallback] = None,
+) -> None:
+    async def worker() -> None:
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            source, payload = item
+            try:
+                result = await handle(source, payload)
+                if on_result is not None:
+                    await asyncio.to_thread(on_result, name, source, result)
+            except Exception as e:
+                await stats.record_failure(source, name, e)
+                continue
+            if outbox is None:
+                stats.succeeded += 1
+            else:
+                await outbox.put((source, result))
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_DONE)
+
+
+async def run_pipeline(
+    sources: Union[Iterable[Any], AsyncIterable[Any]],
+    convert: Callable[[Any], Any],
+    extract: Callable[[Any, Any], Awaitable[Any]],
+    write: Callable[[Any, Any], Any],
+    convert_executor: Executor,
+    convert_workers: int,
+    llm_concurrency: int,
+    write_workers: int = 1,
+    queue_size: Optional[int] = None,
+    resume: Optional[ResumeFn] = None,
+    on_result: Optional[StageCallback] = None,
+    on_failure: Optional[StageCallback] = None,
+) -> PipelineStats:
+    # convert (executor) -> extract (coroutine, bounded concurrency) -> write (thread), joined by bounded queues
+    # so every stage works on a different document at once and a slow stage applies backpressure upstream.
+    # With `resume`, a source enters at the stage after its last persisted one, or is skipped entirely.
+    loop = asyncio.get_running_loop()
+    stats = PipelineStats(on_failure)
+    inbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size or convert_workers * 2)
+    converted: asyncio.Queue = asyncio.Queue(maxsize=queue_size or llm_concurrency * 2)
+    extracted: asyncio.Queue = asyncio.Queue(maxsize=queue_size or write_workers * 2)
+
+    async def _convert(source: Any, _: Any) -> Any:
+        return await loop.run_in_executor(convert_executor, convert, source)
+
+    async def _write(source: Any, payload: Any) -> Any:
+        return await loop.run_in_executor(None, write, source, payload)
+
+    queues = dict(zip(STAGES, (inbox, converted, extracted)))
+
+    async def _sources() -> AsyncIterator[Any]:
+        if hasattr(sources, "__aiter__"):
+            async for source in sources:
+                yield source
+        else:
+            for source in sources:
+                yield source
+
+    async def _feed() -> None:
+        try:
+            async for source in _sources():
+                if resume is None:
+                    stage, payload = constants.BATCH_STAGE_CONVERT, None
+                else:
+                    try:
+                        stage, payload = await asyncio.to_thread(resume, source)
+                    except Exception as e:
+                        # e.g. the input vanished or became unreadable after it was listed.
+                        await stats.record_failure(source, constants.BATCH_STAGE_CONVERT, e)
+                        continue
+                if stage is None:
+                    stats.skipped += 1
+                    continue
+                await queues[stage].put((source, payload))
+        finally:
+            for _ in range(convert_workers):
+                await inbox.put(_DONE)
+
+    await asyncio.gather(
+        _feed(),
+        _run_stage(constants.BATCH_STAGE_CONVERT, inbox, converted, convert_workers, llm_concurrency, _convert, stats, on_result),
+        _run_stage(constants.BATCH_STAGE_EXTRACT, converted, extracted, llm_concurrency, write_workers, extract, stats, on_result),
+        _run_stage(constants.BATCH_STAGE_WRITE, extracted, None, write_workers, 0, _write, stats, on_result),
+    )
+    return stats
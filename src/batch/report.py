@@ -0,0 +1,158 @@
+import csv
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.batch.manifest import configured_model
+from src.batch.stages import ConvertedDocument
+from src.config import settings
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = (
+    "file", "status", "failed_stage", "error", "pages", "conversion_path", "raw_chars", "pruned_chars",
+    "pruned_tokens", "convert_seconds", "llm_seconds", "map_seconds", "total_seconds", "output_bytes",
+)
+_TIMED_FIELDS = ("convert_seconds", "llm_seconds", "map_seconds", "total_seconds")
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    # Linear interpolation between closest ranks, as numpy's default.
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _distribution(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values),
+    }
+
+
+class BatchReport:
+
+    # Per-file timings and sizes for one batch run, plus p50/p95/p99 and throughput, written as
+    # batch_report.json (summary + files) and batch_report.csv (one row per file) for capacity planning
+    # and release-to-release comparison. Recording is thread-safe: the write stage runs in worker threads.
+
+    def __init__(self, run_info: Optional[Dict[str, Any]] = None):
+        self.run_info = run_info or {}
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._elapsed: Optional[float] = None
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _row(self, source: Path) -> Dict[str, Any]:
+        key = str(source)
+        if key not in self._rows:
+            self._rows[key] = dict.fromkeys(REPORT_FIELDS)
+            self._rows[key]["file"] = Path(source).name
+        return self._rows[key]
+
+    def record_conversion(self, source: Path, document: ConvertedDocument) -> None:
+        with self._lock:
+            row = self._row(source)
+            row.update(
+                pages=document.pages, conversion_path=document.conversion_path, raw_chars=document.raw_chars,
+                pruned_chars=len(document.markdown), pruned_tokens=document.tokens, convert_seconds=document.seconds,
+            )
+
+    def record_extraction(self, source: Path, seconds: float) -> None:
+        with self._lock:
+            self._row(source)["llm_seconds"] = seconds
+
+    def record_write(self, source: Path, seconds: float, outputs: Sequence[Path]) -> None:
+        with self._lock:
+            row = self._row(source)
+            row.update(map_seconds=seconds, status=constants.BATCH_REPORT_STATUS_OK)
+            if outputs:
+                row["output_bytes"] = sum(Path(output).stat().st_size for output in outputs)
+
+    def on_failure(self, stage: str, source: Path, error: BaseException) -> None:
+        with self._lock:
+            self._row(source).update(status=constants.BATCH_REPORT_STATUS_FAILED, failed_stage=stage, error=str(error))
+
+    def finish(self) -> None:
+        self._elapsed = time.perf_counter() - self._started
+
+    def rows(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(row) for row in self._rows.values()]
+        for row in rows:
+            timed = [row[field] for field in ("convert_seconds", "llm_seconds", "map_seconds") if row[field] is not None]
+            row["total_seconds"] = sum(timed) if timed else None
+        return rows
+
+    def summary(self) -> Dict[str, Any]:
+        rows = self.rows()
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+        succeeded = [row for row in rows if row["status"] == constants.BATCH_REPORT_STATUS_OK]
+        pages = sum(row["pages"] or 0 for row in succeeded)
+        paths: Dict[str, int] = {}
+        for row in rows:
+            if row["conversion_path"]:
+                paths[row["conversion_path"]] = paths.get(row["conversion_path"], 0) + 1
+        return {
+            **self.run_info,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": elapsed,
+            "documents": len(rows),
+            "succeeded": len(succeeded),
+            "failed": len(rows) - len(succeeded),
+            "pages": pages,
+            "pages_per_second": pages / elapsed if elapsed else None,
+            "documents_per_hour": len(succeeded) * 3600 / elapsed if elapsed else None,
+            "conversion_paths": paths,
+            "stages": {
+                field.removesuffix("_seconds"): _distribution([row[field] for row in succeeded if row[field] is not None])
+                for field in _TIMED_FIELDS
+            },
+        }
+
+    def write(self, output_dir: Path, name: str = constants.BATCH_REPORT_BASENAME) -> Path:
+        summary = self.summary()
+        rows = self.rows()
+        json_path = output_dir / f"{name}.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "files": rows}, f, indent=2)
+        with open(output_dir / f"{name}.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        stages = summary["stages"]
+        logger.info(constants.LOG_BATCH_REPORT.format(
+            path=json_path, documents_per_hour=summary["documents_per_hour"] or 0,
+            pages_per_second=summary["pages_per_second"] or 0,
+            llm_p95=stages["llm"].get("p95") or 0, total_p95=stages["total"].get("p95") or 0,
+        ))
+        return json_path
+
+
+def run_info(convert_workers: int, llm_concurrency: Optional[int], mode: str) -> Dict[str, Any]:
+    return {
+        "app_version": settings.app.version,
+        "mode": mode,
+        "llm_provider": settings.llm.provider,
+        "llm_model": configured_model(),
+        "prompt_mode": settings.llm.prompt_mode,
+        "convert_workers": convert_workers,
+        "llm_concurrency": llm_concurrency,
+    }
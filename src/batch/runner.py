@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import AsyncIterable, Iterable, List, Optional, Union
+
+from src.batch.lease_queue import FileLeaseQueue
+from src.batch.manifest import BatchManifest
+from src.batch.pipeline import PipelineStats, ResumeFn, run_pipeline
+from src.batch.report import BatchReport
+from src.batch.stages import BundleSink, ConvertedDocument, convert_document, make_convert_executor
+from src.batch.watch import FolderWatcher, InputMover
+from src.routes.claims import _extract_insurance_data, _clean_and_parse_llm_response, _extraction_request
+from src.config import settings
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_stages(
+    sources: Union[Iterable[Path], AsyncIterable[Path]],
+    sink: BundleSink,
+    llm_service,
+    convert_workers: int,
+    llm_concurrency: Optional[int],
+    queue_size: Optional[int],
+    resume: Optional[ResumeFn],
+    tracker,
+    report: BatchReport,
+) -> PipelineStats:
+    # `tracker` (manifest, lease queue or watch-folder mover) persists each stage result and failure.
+    async def extract(pdf_path: Path, converted: ConvertedDocument) -> dict:
+        report.record_conversion(pdf_path, converted)
+        logger.info(constants.LOG_BATCH_SENDING_LLM_FILE.format(filename=pdf_path.name))
+        started = time.perf_counter()
+        extracted = await _extract_insurance_data(llm_service, converted.markdown, converted.pages)
+        report.record_extraction(pdf_path, time.perf_counter() - started)
+        return extracted
+
+    def write(pdf_path: Path, cleaned_json: dict) -> List[Path]:
+        started = time.perf_counter()
+        outputs = sink.write(pdf_path, cleaned_json)
+        report.record_write(pdf_path, time.perf_counter() - started, outputs)
+        return outputs
+
+    def on_failure(stage: str, pdf_path: Path, error: BaseException) -> None:
+        report.on_failure(stage, pdf_path, error)
+        if tracker is not None:
+            tracker.on_failure(stage, pdf_path, error)
+
+    llm_concurrency = llm_concurrency or settings.batch.llm_concurrency
+    logger.info(constants.LOG_BATCH_PIPELINE.format(convert_workers=convert_workers, llm_concurrency=llm_concurrency))
+    try:
+        with make_convert_executor(convert_workers) as executor:
+            stats = await run_pipeline(
+                sources, convert_document, extract, write,
+                convert_executor=executor,
+                convert_workers=convert_workers,
+                llm_concurrency=llm_concurrency,
+                write_workers=settings.batch.write_workers,
+                queue_size=queue_size or settings.batch.queue_size,
+                resume=resume,
+                on_result=tracker.on_result if tracker is not None else None,
+                on_failure=on_failure,
+            )
+    finally:
+        report.finish()
+    if stats.skipped:
+        logger.info(constants.LOG_BATCH_SKIPPED.format(count=stats.skipped))
+    return stats
+
+
+async def run_pipelined(
+    pdf_files: List[Path],
+    sink: BundleSink,
+    llm_service,
+    convert_workers: int,
+    llm_concurrency: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    manifest: Optional[BatchManifest] = None,
+    lease_queue: Optional[FileLeaseQueue] = None,
+    report: Optional[BatchReport] = None,
+) -> int:
+    def sources():
+        for pdf_path in pdf_files:
+            logger.info(constants.LOG_BATCH_PROCESSING_FILE.format(filename=pdf_path.name))
+            yield pdf_path
+
+    async def claimed_sources():
+        async for pdf_path in lease_queue.claims(pdf_files):
+            logger.info(constants.LOG_BATCH_PROCESSING_FILE.format(filename=pdf_path.name))
+            yield pdf_path
+
+    if lease_queue is not None:
+        logger.info(constants.LOG_BATCH_DISTRIBUTED.format(node_id=lease_queue.node_id, queue_dir=lease_queue.queue_dir))
+        lease_queue.start()
+    try:
+        stats = await _run_stages(
+            claimed_sources() if lease_queue is not None else sources(), sink, llm_service, convert_workers,
+            llm_concurrency, queue_size, manifest.resume if manifest is not None else None,
+            lease_queue or manifest, report or BatchReport(),
+        )
+    finally:
+        if lease_queue is not None:
+            lease_queue.stop()
+    return stats.succeeded + stats.skipped
+
+
+async def run_watch(
+    watcher: FolderWatcher,
+    mover: InputMover,
+    stop: asyncio.Event,
+    sink: BundleSink,
+    llm_service,
+    convert_workers: int,
+    llm_concurrency: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    report: Optional[BatchReport] = None,
+) -> int:
+    async def dropped_files():
+        async for pdf_path in watcher.files(stop):
+            logger.info(constants.LOG_BATCH_PROCESSING_FILE.format(filename=pdf_path.name))
+            yield pdf_path
+
+    logger.info(constants.LOG_WATCH_STARTED.format(input_dir=watcher.input_dir, settle_seconds=watcher.settle_seconds))
+    stats = await _run_stages(
+        dropped_files(), sink, llm_service, convert_workers, llm_concurrency, queue_size,
+        mover.resume, mover, report or BatchReport(),
+    )
+    logger.info(constants.LOG_WATCH_STOPPED.format(succeeded=stats.succeeded, failed=len(stats.failures)))
+    return stats.succeeded + stats.skipped
+
+
+async def run_llm_batch(
+    pdf_files: List[Path], sink: BundleSink, llm_service, convert_workers: int, report: Optional[BatchReport] = None,
+) -> int:
+    report = report or BatchReport()
+    logger.info(constants.LOG_BATCH_LLM_MODE)
+    loop = asyncio.get_running_loop()
+    with make_convert_executor(convert_workers) as executor:
+        converted = await asyncio.gather(
+            *(loop.run_in_executor(executor, convert_document, pdf_path) for pdf_path in pdf_files),
+            return_exceptions=True,
+        )
+
+    user_prompts = {}
+    for index, (pdf_path, result) in enumerate(zip(pdf_files, converted)):
+        if isinstance(result, BaseException):
+            logger.error(constants.LOG_BATCH_FILE_FAILED.format(filename=pdf_path.name, error=result), exc_info=False)
+            report.on_failure(constants.BATCH_STAGE_CONVERT, pdf_path, result)
+            continue
+        report.record_conversion(pdf_path, result)
+        user_prompts[str(index)] = result.markdown
+
+    if not user_prompts:
+        report.finish()
+        return 0
+
+    logger.info(constants.LOG_BATCH_LLM_SUBMITTING.format(count=len(user_prompts), service_name=llm_service.__class__.__name__))
+    system_prompt, response_schema = _extraction_request()
+    started = time.perf_counter()
+    results = await llm_service.process_batch(
+        system_prompt=system_prompt,
+        user_prompts=user_prompts,
+        response_schema=response_schema,
+    )
+    # One provider job serves every document, so each is charged the job's full turnaround.
+    job_seconds = time.perf_counter() - started
+
+    success_count = 0
+    for custom_id in user_prompts:
+        pdf_path = pdf_files[int(custom_id)]
+        if custom_id not in results:
+            logger.error(constants.LOG_BATCH_LLM_MISSING_RESULT.format(filename=pdf_path.name))
+            report.on_failure(constants.BATCH_STAGE_EXTRACT, pdf_path, KeyError(custom_id))
+            continue
+        report.record_extraction(pdf_path, job_seconds)
+        try:
+            logger.info(constants.LOG_BATCH_PARSING_JSON)
+            cleaned_json = _clean_and_parse_llm_response(results[custom_id])
+            started = time.perf_counter()
+            outputs = sink.write(pdf_path, cleaned_json)
+            report.record_write(pdf_path, time.perf_counter() - started, outputs)
+            success_count += 1
+        except Exception as e:
+            logger.error(constants.LOG_BATCH_FILE_FAILED.format(filename=pdf_path.name, error=e), exc_info=False)
+            report.on_failure(constants.BATCH_STAGE_WRITE, pdf_path, e)
+    report.finish()
+    return success_count
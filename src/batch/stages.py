@@ -0,0 +1,104 @@
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from src.services.fhir.bulk_export import BulkExportWriter
+from src.services.fhir.fhir_mapping_context import FHIRMappingContext
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+from src.config import settings
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+_pdf_processor = None
+_pruner = None
+
+
+class ConvertedDocument(NamedTuple):
+    markdown: str
+    pages: Optional[int]
+    conversion_path: Optional[str] = None
+    raw_chars: Optional[int] = None
+    tokens: Optional[int] = None
+    seconds: Optional[float] = None
+
+
+def convert_document(pdf_path: Path) -> ConvertedDocument:
+    # Runs in a conversion worker process; the PDF processor (and Marker's models, if a scan needs them)
+    # load once per worker and stay warm for the rest of the catalogue.
+    global _pdf_processor, _pruner
+    from src.core.pdf_processor import PDFProcessor, count_pdf_pages
+    from src.core.token_counter import estimate_tokens
+    from src.services.policy_pruner import PolicyPruner
+
+    if _pdf_processor is None:
+        _pdf_processor = PDFProcessor()
+        _pruner = PolicyPruner()
+    started = time.perf_counter()
+    markdown_text, conversion_path = _pdf_processor.convert_with_path(str(pdf_path))
+    pruned = _pruner.prune(markdown_text)
+    pages = count_pdf_pages(str(pdf_path))
+    return ConvertedDocument(
+        pruned, pages, conversion_path, len(markdown_text), estimate_tokens(pruned), time.perf_counter() - started,
+    )
+
+
+def convert_workers(requested: Optional[int] = None) -> int:
+    return max(1, requested or settings.batch.convert_workers or os.cpu_count() or 1)
+
+
+def make_convert_executor(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(settings.batch.start_method))
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_name, path)
+
+
+def write_json(bundle: dict, output_file: Path) -> None:
+    # Atomic, so a reader (or a second node finishing a reclaimed input) never sees a half-written bundle.
+    write_atomic(output_file, json.dumps(bundle, indent=2, ensure_ascii=False).encode("utf-8"))
+
+    logger.info(constants.LOG_BATCH_FILE_SUCCESS.format(output_filename=output_file.name))
+
+
+class BundleSink:
+
+    # Maps extracted plan data to a bundle and writes it: one JSON file per PDF, or into a Bulk Data export.
+
+    def __init__(self, output_dir: Path, context: FHIRMappingContext, exporter: Optional[BulkExportWriter] = None):
+        self.output_dir = output_dir
+        self.context = context
+        self.exporter = exporter
+
+    def write(self, pdf_path: Path, cleaned_json: dict) -> List[Path]:
+        bundle = build_fhir_bundle(cleaned_json, context=self.context)
+        if self.exporter is not None:
+            self.exporter.write_bundle(bundle)
+            logger.info(constants.LOG_BATCH_FILE_SUCCESS.format(output_filename=pdf_path.name))
+            return []
+        output_file = self.output_dir / f"{pdf_path.stem}.json"
+        write_json(bundle, output_file)
+        return [output_file]
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            if self.context.shared_organizations:
+                self.exporter.write_bundle(self.context.shared_organizations_bundle())
+            manifest = self.exporter.close()
+            logger.info(constants.LOG_BATCH_EXPORT_COMPLETE.format(
+                manifest=self.output_dir / constants.EXPORT_MANIFEST_FILENAME, files=len(manifest["output"]),
+                resources=sum(item["count"] for item in manifest["output"]), duplicates=self.exporter.duplicates,
+            ))
+        elif self.context.shared_organizations:
+            write_json(self.context.shared_organizations_bundle(), self.output_dir / constants.SHARED_ORGANIZATIONS_FILENAME)
+        logger.info(constants.LOG_BATCH_ORG_CACHE.format(hits=self.context.hits, misses=self.context.misses))
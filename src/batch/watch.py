@@ -0,0 +1,225 @@
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from src.config import settings
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+# Rescan this often even when inotify is quiet, in case an event was missed (e.g. queue overflow).
+_INOTIFY_RESCAN_SECONDS = 60.0
+
+
+class _Inotify:
+
+    # Minimal inotify binding over libc; only used to wake the watcher, which then rescans the folder.
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error))
+
+    def drain(self) -> None:
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _is_candidate(entry: os.DirEntry) -> bool:
+    # Uploads in progress under a temporary name (x.pdf.part, .x.pdf) are ignored until renamed.
+    return not entry.name.startswith(".") and entry.name.lower().endswith(".pdf") and entry.is_file()
+
+
+class FolderWatcher:
+
+    # Yields PDFs dropped into a folder once they stop changing: a file is handed out only after its size
+    # and mtime have held still for settle_seconds, so half-uploaded files are never picked up. inotify makes
+    # new drops visible immediately (Linux, local filesystems); elsewhere, or on network shares where
+    # inotify sees no remote writes, the folder is polled every poll_seconds.
+
+    def __init__(
+        self,
+        input_dir: Path,
+        settle_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+        backend: Optional[str] = None,
+    ):
+        config = settings.batch.watch
+        self.input_dir = input_dir
+        self.settle_seconds = config.settle_seconds if settle_seconds is None else settle_seconds
+        self.poll_seconds = poll_seconds or config.poll_seconds
+        self.backend = backend or config.backend
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        self._claimed: Set[Path] = set()
+        self._wake = asyncio.Event()
+        self._inotify: Optional[_Inotify] = None
+
+    def _start(self) -> None:
+        if self.backend == constants.WATCH_BACKEND_POLL:
+            return
+        try:
+            if not sys.platform.startswith("linux"):
+                raise OSError(constants.LOG_WATCH_INOTIFY_UNSUPPORTED)
+            self._inotify = _Inotify(self.input_dir)
+        except (OSError, AttributeError) as e:
+            if self.backend == constants.WATCH_BACKEND_INOTIFY:
+                raise
+            logger.warning(constants.LOG_WATCH_POLLING_FALLBACK.format(error=e, poll_seconds=self.poll_seconds))
+            return
+        asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_inotify)
+
+    def _on_inotify(self) -> None:
+        self._inotify.drain()
+        self._wake.set()
+
+    def _stop(self) -> None:
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+    def release(self, path: Path) -> None:
+        # Called once an input has been moved out of the folder (or given up on).
+        self._claimed.discard(path)
+
+    def _scan(self, now: float) -> Tuple[List[Path], Optional[float]]:
+        ready, next_due, seen = [], None, set()
+        with os.scandir(self.input_dir) as entries:
+            for entry in entries:
+                path = Path(entry.path)
+                if path in self._claimed or not _is_candidate(entry):
+                    continue
+                seen.add(path)
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns)
+                pending = self._pending.get(path)
+                if pending is None or pending[:2] != signature:
+                    self._pending[path] = (*signature, now)
+                    due = now + self.settle_seconds
+                elif now - pending[2] >= self.settle_seconds:
+                    ready.append((stat.st_mtime_ns, path))
+                    continue
+                else:
+                    due = pending[2] + self.settle_seconds
+                next_due = due if next_due is None else min(next_due, due)
+        for path in set(self._pending) - seen:
+            del self._pending[path]
+        for _, path in ready:
+            del self._pending[path]
+            self._claimed.add(path)
+        return [path for _, path in sorted(ready)], next_due
+
+    async def _sleep(self, timeout: float, stop: asyncio.Event) -> None:
+        waiters = [asyncio.ensure_future(self._wake.wait()), asyncio.ensure_future(stop.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=max(timeout, 0.0), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        self._wake.clear()
+
+    async def files(self, stop: asyncio.Event) -> AsyncIterator[Path]:
+        self._start()
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                ready, next_due = self._scan(now)
+                for path in ready:
+                    # Blocks while the pipeline is full, so a burst of drops waits on disk, not in memory.
+                    yield path
+                    if stop.is_set():
+                        return
+                idle = self.poll_seconds if self._inotify is None else _INOTIFY_RESCAN_SECONDS
+                await self._sleep(min(idle, next_due - time.monotonic()) if next_due is not None else idle, stop)
+        finally:
+            self._stop()
+
+
+def move_input(path: Path, target_dir: Path) -> Path:
+    # os.replace is atomic when target_dir is on the same filesystem as the drop folder.
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / path.name
+    if target.exists():
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        target = target_dir / f"{path.stem}.{stamp}{path.suffix}"
+    try:
+        os.replace(path, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(path), str(target))
+    return target
+
+
+class InputMover:
+
+    # Watch-mode tracker: moves each input to processed/ once its bundle is written, or to failed/ with an
+    # .error.txt beside it, and releases it from the watcher. With a manifest, a re-dropped file whose
+    # content was already converted resumes from the cache, and one already completed goes straight to processed/.
+
+    def __init__(self, watcher: FolderWatcher, processed_dir: Path, failed_dir: Path, manifest=None):
+        self.watcher = watcher
+        self.processed_dir = processed_dir
+        self.failed_dir = failed_dir
+        self.manifest = manifest
+
+    def _move(self, path: Path, target_dir: Path) -> Optional[Path]:
+        try:
+            return move_input(path, target_dir)
+        except FileNotFoundError:
+            logger.warning(constants.LOG_WATCH_INPUT_VANISHED.format(filename=path.name))
+            return None
+        finally:
+            self.watcher.release(path)
+
+    def resume(self, path: Path) -> Tuple[Optional[str], Any]:
+        if self.manifest is None:
+            return constants.BATCH_STAGE_CONVERT, None
+        stage, payload = self.manifest.resume(path)
+        if stage is None:
+            self._move(path, self.processed_dir)
+        return stage, payload
+
+    def on_result(self, stage: str, path: Path, result: Any) -> None:
+        if self.manifest is not None:
+            self.manifest.on_result(stage, path, result)
+        if stage == constants.BATCH_STAGE_WRITE:
+            target = self._move(path, self.processed_dir)
+            if target is not None:
+                logger.info(constants.LOG_WATCH_MOVED.format(filename=path.name, target=target))
+
+    def on_failure(self, stage: str, path: Path, error: BaseException) -> None:
+        if self.manifest is not None:
+            self.manifest.on_failure(stage, path, error)
+        target = self._move(path, self.failed_dir)
+        if target is not None:
+            target.with_name(f"{target.name}.error.txt").write_text(f"{stage}: {error}\n", encoding="utf-8")
+            logger.info(constants.LOG_WATCH_MOVED.format(filename=path.name, target=target))
@@ -3,7 +3,7 @@ import sys
 from pathlib import Path
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Literal, Dict, Any, List
+from typing import Literal, Dict, Any, List, Optional
 
 from . import constants
 
@@ -17,6 +17,12 @@ class OpenAISettings(BaseModel):
 class OllamaSettings(BaseModel):
     base_url: str
     model_name: str
+    native_api: bool = True
+    keep_alive: str = "30m"
+    num_ctx_buckets: List[int] = [4096, 8192, 16384, 32768]
+    num_predict_reserve: int = 4096
+    temperature: float = 0.0
+    prewarm: bool = True
 
 
 class GeminiSettings(BaseModel):
@@ -34,6 +40,65 @@ class BedrockSettings(BaseModel):
     anthropic_version: str = "bedrock-2023-05-31"
     max_tokens: int = 4096
     temperature: float = 0.0
+    batch_s3_uri: Optional[str] = None
+    batch_role_arn: Optional[str] = None
+
+
+class LLMBatchSettings(BaseModel):
+    poll_interval_seconds: float = 30.0
+    completion_window: str = "24h"
+    local_concurrency: int = 4
+
+
+class LLMKeyPoolSettings(BaseModel):
+    strategy: Literal[
+        constants.KEY_POOL_STRATEGY_LEAST_LOADED, constants.KEY_POOL_STRATEGY_ROUND_ROBIN
+    ] = constants.KEY_POOL_STRATEGY_LEAST_LOADED
+    rate_limit_cooldown_seconds: float = 30.0
+    auth_failure_cooldown_seconds: float = 600.0
+    attempts_per_key: int = 1
+    max_wait_seconds: float = 60.0
+
+
+class ModelTierSettings(BaseModel):
+    name: str
+    # 0 means unbounded; a document lands in the first tier whose limits it fits.
+    max_tokens: int = 0
+    max_pages: int = 0
+    # Provider name -> model for this tier; providers not listed keep their configured model.
+    models: Dict[str, str] = {}
+
+
+class LLMRoutingSettings(BaseModel):
+    enabled: bool = False
+    escalate_on_invalid_output: bool = True
+    tiers: List[ModelTierSettings] = []
+
+
+class ReplayLatencySettings(BaseModel):
+    distribution: Literal["none", "fixed", "uniform", "normal", "lognormal"] = "none"
+    mean_seconds: float = 0.0
+    stddev_seconds: float = 0.0
+    min_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class ReplaySettings(BaseModel):
+    mode: Literal[constants.REPLAY_MODE_REPLAY, constants.REPLAY_MODE_RECORD] = constants.REPLAY_MODE_REPLAY
+    recordings_dir: str = "data/recordings"
+    record_provider: Literal[
+        constants.LLM_PROVIDER_OPENAI,
+        constants.LLM_PROVIDER_OLLAMA,
+        constants.LLM_PROVIDER_GEMINI,
+        constants.LLM_PROVIDER_GROK,
+        constants.LLM_PROVIDER_BEDROCK
+    ] = constants.LLM_PROVIDER_GEMINI
+    fallback_to_stub: bool = True
+    latency: ReplayLatencySettings = ReplayLatencySettings()
+    rate_limit_error_rate: float = 0.0
+    stream_chunk_chars: int = 0
+    stream_chunk_delay_seconds: float = 0.0
+    seed: Optional[int] = None
 
 
 class LLMSettings(BaseModel):
@@ -42,13 +107,19 @@ class LLMSettings(BaseModel):
         constants.LLM_PROVIDER_OLLAMA,
         constants.LLM_PROVIDER_GEMINI,
         constants.LLM_PROVIDER_GROK,
-        constants.LLM_PROVIDER_BEDROCK
+        constants.LLM_PROVIDER_BEDROCK,
+        constants.LLM_PROVIDER_REPLAY
     ]
     openai: OpenAISettings
     ollama: OllamaSettings
     gemini: GeminiSettings
     grok: GrokSettings
     bedrock: BedrockSettings
+    prompt_mode: Literal[constants.PROMPT_MODE_VERBOSE, constants.PROMPT_MODE_COMPACT] = constants.PROMPT_MODE_VERBOSE
+    replay: ReplaySettings = ReplaySettings()
+    batch: LLMBatchSettings = LLMBatchSettings()
+    key_pool: LLMKeyPoolSettings = LLMKeyPoolSettings()
+    routing: LLMRoutingSettings = LLMRoutingSettings()
 
 
 class MarkerSettings(BaseModel):
@@ -70,6 +141,74 @@ class PolicyPrunerSettings(BaseModel):
     junk_keywords: List[str] = []
 
 
+class HTTPClientSettings(BaseModel):
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 120.0
+    connect_timeout_seconds: float = 10.0
+    read_timeout_seconds: float = 600.0
+    http2: bool = True
+
+
+class CompressionSettings(BaseModel):
+    enabled: bool = True
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+
+
+class FHIRBulkSettings(BaseModel):
+    workers: Optional[int] = None
+    max_in_flight: int = 32
+    start_method: Literal["spawn", "forkserver", "fork"] = "spawn"
+
+
+class FHIRValidationSettings(BaseModel):
+    profile_dirs: List[str] = ["config/fhir_profiles"]
+
+
+class FHIRStreamingSettings(BaseModel):
+    threshold_bytes: int = 1048576
+    max_buffered_bytes: int = 33554432
+
+
+class FHIRExportSettings(BaseModel):
+    format: Literal[constants.EXPORT_FORMAT_JSON, constants.EXPORT_FORMAT_NDJSON] = constants.EXPORT_FORMAT_JSON
+    compression: Literal[
+        constants.EXPORT_COMPRESSION_NONE, constants.EXPORT_COMPRESSION_GZIP, constants.EXPORT_COMPRESSION_ZSTD
+    ] = constants.EXPORT_COMPRESSION_NONE
+    gzip_level: int = 6
+    zstd_level: int = 3
+
+
+class FHIRSettings(BaseModel):
+    builder: Literal[constants.FHIR_BUILDER_MODEL, constants.FHIR_BUILDER_DICT] = constants.FHIR_BUILDER_DICT
+    strict_validation: bool = True
+    shared_organizations: bool = False
+    mapping_context_max_entries: int = 10000
+    bulk: FHIRBulkSettings = FHIRBulkSettings()
+    validation: FHIRValidationSettings = FHIRValidationSettings()
+    streaming: FHIRStreamingSettings = FHIRStreamingSettings()
+    export: FHIRExportSettings = FHIRExportSettings()
+
+
+class TerminologySourceSettings(BaseModel):
+    path: str
+    value_set: str = "snomed"
+
+
+class TerminologySettings(BaseModel):
+    index_path: str = "data/terminology/terminology.sqlite"
+    sources: List[TerminologySourceSettings] = []
+    lookup_value_sets: List[str] = [constants.TERMINOLOGY_VALUE_SET_BENEFIT, "snomed"]
+    fuzzy_threshold: float = 0.6
+    min_fuzzy_length: int = 4
+    max_fuzzy_candidates: int = 50
+    lookup_timeout_ms: int = 25
+    cache_size: int = 10000
+    mmap_size_bytes: int = 268435456
+
+
 class AppSettings(BaseModel):
     title: str = "NHCX Insurance FHIR Utility API"
     description: str = "An API to convert insurance claim PDFs into NHCX compliant FHIR bundles."
@@ -87,6 +226,33 @@ class LoggingSettings(BaseModel):
     uvicorn_access_level: str = "WARNING"
 
 
+class BatchDistributedSettings(BaseModel):
+    node_id: Optional[str] = None
+    lease_seconds: float = 300.0
+    heartbeat_seconds: float = 30.0
+    poll_seconds: float = 15.0
+    max_attempts: int = 3
+
+
+class BatchWatchSettings(BaseModel):
+    backend: Literal[constants.WATCH_BACKEND_AUTO, constants.WATCH_BACKEND_INOTIFY, constants.WATCH_BACKEND_POLL] = constants.WATCH_BACKEND_AUTO
+    settle_seconds: float = 2.0
+    poll_seconds: float = 1.0
+    processed_dir: str = "data/processed"
+    failed_dir: str = "data/failed"
+
+
+class BatchSettings(BaseModel):
+    convert_workers: Optional[int] = None
+    llm_concurrency: int = 4
+    write_workers: int = 1
+    queue_size: Optional[int] = None
+    start_method: Literal["spawn", "forkserver", "fork"] = "spawn"
+    resume: bool = True
+    distributed: BatchDistributedSettings = BatchDistributedSettings()
+    watch: BatchWatchSettings = BatchWatchSettings()
+
+
 class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(
@@ -103,13 +269,30 @@ class Settings(BaseSettings):
     marker: MarkerSettings
     pdf_processor: PDFProcessorSettings = PDFProcessorSettings()
     policy_pruner: PolicyPrunerSettings = PolicyPrunerSettings()
+    http_client: HTTPClientSettings = HTTPClientSettings()
+    compression: CompressionSettings = CompressionSettings()
+    fhir: FHIRSettings = FHIRSettings()
+    terminology: TerminologySettings = TerminologySettings()
+    batch: BatchSettings = BatchSettings()
 
     openai_api_key: str = Field("not-set", alias="OPENAI_API_KEY")
     google_api_key: str = Field("not-set", alias="GOOGLE_API_KEY")
     grok_api_key: str = Field("not-set", alias="GROK_API_KEY")
+    openai_api_keys: str = Field("", alias="OPENAI_API_KEYS")
+    google_api_keys: str = Field("", alias="GOOGLE_API_KEYS")
+    grok_api_keys: str = Field("", alias="GROK_API_KEYS")
     aws_access_key_id: str = Field("not-set", alias="AWS_ACCESS_KEY_ID")
     aws_secret_access_key: str = Field("not-set", alias="AWS_SECRET_ACCESS_KEY")
 
+    def api_key_pool(self, provider: str) -> List[str]:
+        single, pooled = {
+            constants.LLM_PROVIDER_OPENAI: (self.openai_api_key, self.openai_api_keys),
+            constants.LLM_PROVIDER_GEMINI: (self.google_api_key, self.google_api_keys),
+            constants.LLM_PROVIDER_GROK: (self.grok_api_key, self.grok_api_keys),
+        }[provider]
+        keys = [single] + [key.strip() for key in pooled.split(",")]
+        return list(dict.fromkeys(key for key in keys if key and key != "not-set"))
+
     @classmethod
     def settings_customise_sources(
         cls,
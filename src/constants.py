@@ -21,14 +21,40 @@ LOG_PDF_FILE_NOT_FOUND = "PDF file not found at: {pdf_path}"
 LOG_PDF_PDFTEXT_FAILED = "pdftext extraction failed or unavailable: {error}"
 LOG_PDF_FAST_PATH = "[FAST PATH] pdftext extracted {char_count} characters — skipping Marker ML models."
 LOG_PDF_SLOW_PATH_FALLBACK = "[SLOW PATH] pdftext only found {char_count} chars — PDF appears to be a scan. Falling back to Marker OCR."
+PDF_CONVERSION_FAST_PATH = "pdftext"
+PDF_CONVERSION_SLOW_PATH = "marker"
 LOG_PDF_SLOW_PATH_RUNNING = "[SLOW PATH] Running Marker OCR on: {pdf_path}"
 
+LOG_CLIENT_REGISTRY_INIT = "Shared SDK client registry initialised (http2={http2}, max_connections={max_connections}, keepalive={keepalive})."
+LOG_CLIENT_REGISTRY_CLOSED = "Shared SDK client registry closed {count} clients."
+LOG_CLIENT_REGISTRY_CLOSE_FAILED = "Failed to close shared {client} client cleanly: {error}"
+LOG_TOKENIZER_FALLBACK = "tiktoken unavailable, estimating {chars_per_token} characters per token: {error}"
 LOG_LLM_SERVICE_INIT = "Initializing {service_name}."
 LOG_LLM_API_CALL_FAILED = "{service_name} API call failed: {error}"
+LOG_REPLAY_RECORDED = "Recorded LLM response for prompt hash {prompt_hash}."
+LOG_REPLAY_STUB = "No recording for prompt hash {prompt_hash}; serving template-filled stub."
+LOG_REPLAY_MISSING = "No recording for prompt hash {prompt_hash} and stub fallback is disabled."
+LOG_REPLAY_INJECTED_RATE_LIMIT = "Injecting simulated rate-limit error for prompt hash {prompt_hash}."
+LOG_OLLAMA_WARMUP = "Pre-loading Ollama model '{model}' (num_ctx={num_ctx}, keep_alive={keep_alive})."
+LOG_OLLAMA_WARMUP_DONE = "Ollama model '{model}' is resident; system prompt cached in {seconds:.2f}s."
+LOG_OLLAMA_WARMUP_FAILED = "Ollama warm-up for '{model}' failed, first request will load the model: {error}"
+LOG_OLLAMA_CONTEXT_OVERFLOW = "Prompt needs ~{needed} tokens but the largest num_ctx bucket is {num_ctx}; the policy may be truncated."
+LOG_OLLAMA_CALL_STATS = "Ollama call: num_ctx={num_ctx}, prompt tokens evaluated={prompt_eval_count}, output tokens={eval_count}, done_reason={done_reason}"
+LOG_KEY_POOL_INIT = "{service_name} dispatching across {count} API key(s) ({strategy})."
+LOG_KEY_POOL_BENCHED = "{service_name} API key #{index} returned {status}; out of rotation for {seconds:.0f}s."
+LOG_KEY_POOL_WAITING = "{service_name}: every API key is cooling down, waiting {seconds:.1f}s."
+LOG_KEY_POOL_EXHAUSTED = "{service_name}: every API key is rate limited or rejected."
+LOG_MODEL_ROUTER_SELECTED = "Routing extraction to model tier '{tier}' ({token_count} pruned tokens, {page_count} pages)."
+LOG_MODEL_ROUTER_ESCALATING = "Model tier '{tier}' returned invalid output ({error}); escalating to tier '{next_tier}'."
+LOG_PDF_PAGE_COUNT_FAILED = "Could not count PDF pages: {error}"
+LOG_LLM_BATCH_SUBMITTED = "Submitted LLM batch job {batch_id} with {count} requests."
+LOG_LLM_BATCH_STATUS = "LLM batch job {batch_id} status: {status}"
+LOG_LLM_BATCH_ITEM_FAILED = "LLM batch request '{custom_id}' failed: {error}"
 LOG_LLM_HEALTH_CHECK_START = "--- Starting LLM Health Check for provider: '{provider}' ---"
 LOG_LLM_HEALTH_CHECK_PASSED = "--- LLM Health Check for '{provider}' PASSED ---"
 LOG_LLM_HEALTH_CHECK_FAILED = "--- LLM Health Check for '{provider}' FAILED ---"
 
+LOG_HEALTH_REPLAY_OK = "✅ Replay provider ready in '{mode}' mode with {count} recordings in {recordings_dir}."
 LOG_HEALTH_API_KEY_MISSING = "❌ {provider_name} API key is not configured in your .env file."
 LOG_HEALTH_CHECKING = "Checking {provider} health..."
 LOG_HEALTH_PROVIDER_OK = "✅ {provider} API is healthy."
@@ -55,6 +81,9 @@ LOG_PDF_CONVERSION_SUCCESS = "PDF conversion successful. Markdown length: {lengt
 LOG_LLM_SENDING_MARKDOWN = "Sending markdown to LLM service: {service_name}"
 LOG_LLM_RESPONSE_RECEIVED = "LLM response received successfully."
 LOG_LLM_JSON_DECODE_FAILED = "Failed to decode JSON from LLM response. Raw response: '{raw_response}'"
+LOG_LLM_JSON_REPAIRED = "LLM response was not valid JSON; recovered it with the repair pass (truncated={truncated})."
+LOG_LLM_CONTINUATION_REQUEST = "LLM response was truncated. Requesting continuation for sections: {sections}"
+LOG_LLM_SCHEMA_VALIDATION_FAILED = "LLM response does not match InsuranceDataPayload: {error}"
 LOG_CLAIM_PROCESS_ERROR = "An error occurred during the processing."
 LOG_CLEANING_TEMP_FILE = "Cleaning up temporary file: {temp_path}"
 LOG_CLAIM_GENERATING_FHIR = "Generating FHIR bundle as part of the initial processing."
@@ -69,21 +98,42 @@ LOG_FHIR_FLOAT_PARSE_FAILED = "Could not parse '{value}' as float. Using default
 LOG_FHIR_MISSING_REQUIRED_FIELD = "Missing required field '%s' in '%s'. Using fallback: '%s'"
 LOG_FHIR_SKIP_ORG_VALIDATION = "Skipping %s resource due to validation error: %s"
 LOG_FHIR_SKIP_COST_BLOCK = "Skipping a specificCost block due to missing/invalid data: %s"
+LOG_FHIR_SKIP_EMPTY_BENEFIT = "Skipping a coverage benefit with no type code or display"
 LOG_FHIR_SKIP_INSURANCE_PLAN = "Skipping InsurancePlan resource due to validation error: %s"
+LOG_FHIR_DICT_BUILDER_INVALID = "Direct FHIR bundle failed strict validation, rebuilding with fhir.resources models: {error}"
+
+LOG_FHIR_BULK_POOL_STARTED = "Started bulk FHIR mapping pool with {workers} worker processes."
+LOG_FHIR_BULK_COMPLETE = "Bulk FHIR request streamed {count} lines."
+LOG_CLAIM_GENERATE_FHIR_BULK = "Received bulk NDJSON request to generate FHIR bundles."
+
+LOG_TERMINOLOGY_INDEX_BUILT = "Built terminology index with {count} terms at {path} in {seconds:.2f}s."
+LOG_TERMINOLOGY_SOURCE_MISSING = "Terminology source {path} not found. Skipping it."
+LOG_TERMINOLOGY_LOOKUP_ABORTED = "Terminology lookup for '{term}' aborted: {error}"
 LOG_FHIR_OWNED_BY_NONE = "CRITICAL: owned_by_ref is None — InsurancePlan will not be built."
 FHIR_ORG_CONTEXT_TPA = "TPA Organisation"
 FHIR_ORG_CONTEXT_INSURER = "Organisation"
+FHIR_ORG_CONTEXT_NETWORK = "Network"
 
 ERROR_CODE_INVALID_FILE_TYPE = "INVALID_FILE_TYPE"
 ERROR_MESSAGE_INVALID_FILE_TYPE = "Invalid file type. Only PDFs are accepted."
 ERROR_CODE_PROCESSING_ERROR = "PROCESSING_ERROR"
 ERROR_MESSAGE_PROCESSING_ERROR = "An unexpected error occurred during processing."
 ERROR_MESSAGE_LLM_API_ERROR = "LLM provider API error"
+ERROR_MESSAGE_LLM_BATCH_FAILED = "LLM batch job did not complete (status: {status})."
+ERROR_MESSAGE_LLM_RATE_LIMITED = "LLM provider rate limit exceeded"
+ERROR_MESSAGE_KEY_POOL_EMPTY = "No API keys configured for {service_name}"
 ERROR_MESSAGE_LLM_INVALID_JSON = "LLM did not return a valid JSON object."
+ERROR_MESSAGE_LLM_SCHEMA_MISMATCH = "LLM output does not match the expected insurance data schema."
 ERROR_MESSAGE_LLM_OFFLINE = "LLM_IS_OFFLINE"
 ERROR_MESSAGE_LLM_FAILED = "Health check on LLM failed."
 ERROR_CODE_FHIR_MAPPING_ERROR = "FHIR_MAPPING_ERROR"
+ERROR_CODE_INVALID_NDJSON_LINE = "INVALID_NDJSON_LINE"
+ERROR_CODE_PAYLOAD_TOO_LARGE = "PAYLOAD_TOO_LARGE"
+ERROR_MESSAGE_PAYLOAD_TOO_LARGE = "Request JSON exceeds the {limit}-byte buffering limit."
+ERROR_MESSAGE_JSON_NOT_OBJECT = "Request body must be a JSON object."
+ERROR_MESSAGE_NDJSON_NOT_OBJECT = "Each NDJSON line must be a JSON object."
 ERROR_MESSAGE_FHIR_MAPPING = "An error occurred during FHIR mapping: {error}"
+ERROR_MESSAGE_TERMINOLOGY_SOURCE_FORMAT = "Unsupported terminology source {path}. Use RF2 (.txt/.tsv), FHIR ValueSet/CodeSystem (.json) or CSV."
 ERROR_CODE_VALIDATION_ERROR = "VALIDATION_ERROR"
 ERROR_CODE_SUMMARY_ERROR = "SUMMARY_ERROR"
 
@@ -92,19 +142,46 @@ LLM_PROVIDER_OLLAMA = "ollama"
 LLM_PROVIDER_GEMINI = "gemini"
 LLM_PROVIDER_GROK = "grok"
 LLM_PROVIDER_BEDROCK = "bedrock"
-LLM_PROVIDERS = [LLM_PROVIDER_OPENAI, LLM_PROVIDER_OLLAMA, LLM_PROVIDER_GEMINI, LLM_PROVIDER_GROK, LLM_PROVIDER_BEDROCK]
+LLM_PROVIDER_REPLAY = "replay"
+LLM_STRUCTURED_OUTPUT_TOOL_DESCRIPTION = "Record the insurance plan data extracted from the policy document."
+LLM_PROVIDERS = [
+    LLM_PROVIDER_OPENAI, LLM_PROVIDER_OLLAMA, LLM_PROVIDER_GEMINI, LLM_PROVIDER_GROK, LLM_PROVIDER_BEDROCK,
+    LLM_PROVIDER_REPLAY,
+]
+
+FHIR_BUILDER_MODEL = "model"
+FHIR_BUILDER_DICT = "dict"
+
+VALIDATION_SEVERITY_ERROR = "error"
+VALIDATION_SEVERITY_WARNING = "warning"
+VALIDATION_SEVERITY_INFO = "info"
+LOG_FHIR_VALIDATION_COMPILED = "Compiled {profiles} FHIR profiles ({rules} rules, {value_sets} value sets) in {seconds:.2f}s."
+LOG_FHIR_VALIDATION_VALUESET_MISSING = "Value set {value_set} bound to {element} is not loaded; binding not checked."
+LOG_FHIR_VALIDATE_BULK = "Received bulk NDJSON request to validate FHIR bundles."
+
+TERMINOLOGY_TERM_TO_CODE_KEY = "termToCodeMapping"
+TERMINOLOGY_VALUE_SET_BENEFIT = "benefitType"
+
+KEY_POOL_STRATEGY_LEAST_LOADED = "least_loaded"
+KEY_POOL_STRATEGY_ROUND_ROBIN = "round_robin"
+
+PROMPT_MODE_VERBOSE = "verbose"
+PROMPT_MODE_COMPACT = "compact"
+
+REPLAY_MODE_REPLAY = "replay"
+REPLAY_MODE_RECORD = "record"
+REPLAY_STUB_INSURER_NAME = "Replay Stub Insurance Co."
+REPLAY_STUB_PLAN_NAME = "Replay Stub Health Plan"
 
 HEADER_X_REQUEST_ID = "X-Request-ID"
+CONTENT_ENCODING_GZIP = "gzip"
+CONTENT_ENCODING_BR = "br"
 
 FE_ERROR_SELECT_FILE = "Please select a file first."
 FE_ERROR_API_UNKNOWN = "An unknown error occurred."
 
 LOG_BATCH_PROCESSING_FILE = "▶ Processing {filename}..."
-LOG_BATCH_EXTRACTING_TEXT = "  └─ Extracting text..."
-LOG_BATCH_PRUNING_TEXT = "  └─ Pruning text..."
-LOG_BATCH_SENDING_LLM = "  └─ Sending to LLM..."
 LOG_BATCH_PARSING_JSON = "  └─ Parsing JSON..."
-LOG_BATCH_GENERATING_FHIR = "  └─ Generating FHIR Bundle..."
 LOG_BATCH_FILE_SUCCESS = "✅ Generated {output_filename}"
 LOG_BATCH_FILE_FAILED = "❌ Failed to process {filename}: {error}"
 LOG_BATCH_INPUT_DIR = "Input directory: {input_dir}"
@@ -114,4 +191,64 @@ LOG_BATCH_NO_PDFS = "No PDF files found in the input directory. Drop some PDFs i
 LOG_BATCH_FOUND_PDFS = "Found {count} PDF files. Initializing components (this might take a moment if starting ML models)..."
 LOG_BATCH_SEPARATOR = "=" * 50
 LOG_BATCH_START = "Starting batch processing!"
-LOG_BATCH_COMPLETE = "Batch processing complete. Successfully generated {success}/{total} bundles."
\ No newline at end of file
+LOG_BATCH_LLM_MODE = "LLM batch mode: converting and pruning all inputs before submitting a single provider batch job."
+LOG_BATCH_LLM_SUBMITTING = "Submitting {count} documents to {service_name} as one batch job..."
+LOG_BATCH_LLM_MISSING_RESULT = "❌ No batch result returned for {filename}"
+LOG_BATCH_COMPLETE = "Batch processing complete. Successfully generated {success}/{total} bundles."
+LOG_BATCH_ORG_CACHE = "Organisation cache: {hits} reused, {misses} built."
+SHARED_ORGANIZATIONS_FILENAME = "shared_organizations.json"
+EXPORT_FORMAT_JSON = "json"
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_COMPRESSION_NONE = "none"
+EXPORT_COMPRESSION_GZIP = "gzip"
+EXPORT_COMPRESSION_ZSTD = "zstd"
+EXPORT_MANIFEST_FILENAME = "manifest.json"
+ERROR_MESSAGE_EXPORT_COMPRESSION = "Unsupported export compression '{compression}'."
+ERROR_MESSAGE_EXPORT_ZSTD_MISSING = "zstd export compression requires the 'zstandard' package."
+LOG_BATCH_EXPORT_COMPLETE = "Bulk export manifest written to {manifest} ({files} files, {resources} resources, {duplicates} duplicates skipped)."
+BATCH_STAGE_CONVERT = "convert"
+BATCH_STAGE_EXTRACT = "extract"
+BATCH_STAGE_WRITE = "write"
+LOG_BATCH_PIPELINE = "Pipelined run: {convert_workers} conversion workers, {llm_concurrency} concurrent LLM requests."
+LOG_BATCH_SENDING_LLM_FILE = "  └─ Sending {filename} to LLM..."
+LOG_BATCH_STAGE_FAILED = "❌ {stage} failed for {filename}: {error}"
+BATCH_MANIFEST_FILENAME = ".batch_manifest.sqlite"
+BATCH_CACHE_DIRNAME = ".batch_cache"
+BATCH_MANIFEST_DONE = "done"
+LOG_BATCH_RESUME = "  └─ {filename}: resuming at {stage}"
+LOG_BATCH_SKIPPED = "Skipped {count} unchanged inputs already completed in a previous run."
+BATCH_LEASE_DIRNAME = ".batch_leases"
+LOG_BATCH_DISTRIBUTED = "Distributed run as node {node_id}: leases in {queue_dir}."
+LOG_BATCH_LEASE_RECLAIMED = "Reclaimed expired lease {key} from node {node}."
+LOG_BATCH_LEASE_LOST = "Lease {key} expired and was reclaimed by another node while this node still held it."
+LOG_BATCH_LEASE_GAVE_UP = "❌ Giving up on {filename} after {attempts} failed attempts."
+ERROR_MESSAGE_BATCH_DISTRIBUTED_OPTIONS = "--distributed writes one JSON bundle per PDF; it cannot be combined with --llm-batch, --format ndjson or --shared-organizations."
+BATCH_REPORT_BASENAME = "batch_report"
+BATCH_REPORT_STATUS_OK = "ok"
+BATCH_REPORT_STATUS_FAILED = "failed"
+BATCH_MODE_PIPELINED = "pipelined"
+BATCH_MODE_LLM_BATCH = "llm-batch"
+BATCH_MODE_DISTRIBUTED = "distributed"
+LOG_BATCH_REPORT = "Performance report written to {path}: {documents_per_hour:.0f} docs/hour, {pages_per_second:.2f} pages/s, LLM p95 {llm_p95:.1f}s, per-document p95 {total_p95:.1f}s."
+WATCH_BACKEND_AUTO = "auto"
+WATCH_BACKEND_INOTIFY = "inotify"
+WATCH_BACKEND_POLL = "poll"
+BATCH_MODE_WATCH = "watch"
+LOG_WATCH_STARTED = "Watching {input_dir} for new PDFs (settle time {settle_seconds}s). Press Ctrl+C to stop."
+LOG_WATCH_STOPPED = "Watch stopped: {succeeded} processed, {failed} failed."
+LOG_WATCH_STOPPING = "Stop requested; finishing documents already in the pipeline..."
+LOG_WATCH_POLLING_FALLBACK = "inotify unavailable ({error}); polling the input folder every {poll_seconds}s."
+LOG_WATCH_INOTIFY_UNSUPPORTED = "inotify is only available on Linux"
+LOG_WATCH_MOVED = "  └─ Moved {filename} to {target}"
+LOG_WATCH_INPUT_VANISHED = "{filename} disappeared from the input folder before it could be moved."
+ERROR_MESSAGE_BATCH_WATCH_OPTIONS = "--watch writes one JSON bundle per PDF; it cannot be combined with --llm-batch, --distributed, --format ndjson or --shared-organizations."
+SYNTHETIC_FORMAT_MARKDOWN = "markdown"
+SYNTHETIC_FORMAT_PDF = "pdf"
+SYNTHETIC_FORMAT_SCAN = "scanned"
+SYNTHETIC_TRUTH_DIRNAME = "truth"
+SYNTHETIC_INDEX_FILENAME = "corpus.json"
+SYNTHETIC_REPLAY_PROVIDER = "synthetic"
+LOG_SYNTHETIC_GENERATED = "  └─ {name}: {pages} pages, {benefits} benefits, {chars:,} chars"
+LOG_SYNTHETIC_REPLAY_SKIPPED = "  └─ {name}: no text layer, so no replay recording (the Marker output is not known in advance)"
+LOG_SYNTHETIC_COMPLETE = "Wrote {count} synthetic policies to {output_dir} ({recordings} replay recordings)."
+ERROR_MESSAGE_SYNTHETIC_RASTERIZE = "pypdfium2 is required to write scanned PDFs (it is installed with pdftext)."
@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import torch
 
 from ..config import settings
@@ -19,6 +19,19 @@ def _get_pdf_text_via_pdftext(pdf_path: str) -> Optional[str]:
         return None
 
 
+def count_pdf_pages(pdf_path: str) -> Optional[int]:
+    try:
+        import pypdfium2
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+    except Exception as e:
+        logger.debug(constants.LOG_PDF_PAGE_COUNT_FAILED.format(error=e))
+        return None
+
+
 def _is_text_rich(text: Optional[str]) -> bool:
     if not text:
         return False
@@ -82,6 +95,10 @@ class PDFProcessor:
         return full_text
 
     def convert_to_markdown(self, pdf_path: str) -> str:
+        return self.convert_with_path(pdf_path)[0]
+
+    def convert_with_path(self, pdf_path: str) -> Tuple[str, str]:
+        # Also reports which path produced the text, for the batch performance report.
         if not os.path.exists(pdf_path):
             error_msg = constants.LOG_PDF_FILE_NOT_FOUND.format(pdf_path=pdf_path)
             logger.error(error_msg)
@@ -93,8 +110,8 @@ class PDFProcessor:
         if _is_text_rich(fast_text):
             char_count = len(fast_text.strip())
             logger.info(constants.LOG_PDF_FAST_PATH.format(char_count=f"{char_count:,}"))
-            return fast_text
+            return fast_text, constants.PDF_CONVERSION_FAST_PATH
 
         char_count = len((fast_text or "").strip())
         logger.warning(constants.LOG_PDF_SLOW_PATH_FALLBACK.format(char_count=char_count))
-        return self._convert_with_marker(pdf_path)
\ No newline at end of file
+        return self._convert_with_marker(pdf_path), constants.PDF_CONVERSION_SLOW_PATH
\ No newline at end of file
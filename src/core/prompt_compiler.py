@@ -0,0 +1,98 @@
+import json
+import re
+from typing import Any, Dict, Iterator, List
+
+_CAMEL_PART_REGEX = re.compile(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])")
+_WHITESPACE_REGEX = re.compile(r"\s+")
+_CAMEL_WORD_REGEX = re.compile(r"\b[a-z]+[A-Z]\w*\b")
+_FILLER_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r",?\s*if (?:any|mentioned|stated|possible)\b",
+        r"\bIf not known, leave empty\b",
+        r"^Provide (?:exactly the |the exact )",
+        r"^Human-readable ",
+    )
+]
+
+
+def _iter_keys(node: Any) -> Iterator[str]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield key
+            yield from _iter_keys(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_keys(item)
+
+
+def _alias_candidates(key: str) -> Iterator[str]:
+    parts = [part.lower() for part in _CAMEL_PART_REGEX.findall(key)] or [key.lower()]
+    initials = "".join(part[0] for part in parts)
+    yield initials
+    tail = parts[-1]
+    for length in range(2, len(tail) + 1):
+        yield initials[:-1] + tail[:length]
+    suffix = 2
+    while True:
+        yield f"{initials}{suffix}"
+        suffix += 1
+
+
+def compile_key_aliases(template: Dict[str, Any]) -> Dict[str, str]:
+    canonical_keys: List[str] = list(dict.fromkeys(_iter_keys(template)))
+    reserved = set(canonical_keys)
+    aliases: Dict[str, str] = {}
+    taken = set()
+    for key in canonical_keys:
+        alias = next(c for c in _alias_candidates(key) if c not in taken and c not in reserved)
+        aliases[key] = alias
+        taken.add(alias)
+    return aliases
+
+
+def terse_description(text: str) -> str:
+    compact = text
+    for pattern in _FILLER_PATTERNS:
+        compact = pattern.sub("", compact)
+    compact = _WHITESPACE_REGEX.sub(" ", compact).strip(" ,.")
+    return compact or text
+
+
+def compact_template(node: Any, aliases: Dict[str, str]) -> Any:
+    if isinstance(node, dict):
+        return {aliases.get(key, key): compact_template(value, aliases) for key, value in node.items()}
+    if isinstance(node, list):
+        return [compact_template(item, aliases) for item in node]
+    if isinstance(node, str):
+        terse = terse_description(node)
+        return _CAMEL_WORD_REGEX.sub(lambda match: aliases.get(match.group(0), match.group(0)), terse)
+    return node
+
+
+def alias_schema(schema: Any, aliases: Dict[str, str]) -> Any:
+    if isinstance(schema, list):
+        return [alias_schema(item, aliases) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    aliased: Dict[str, Any] = {}
+    for key, value in schema.items():
+        if key == "properties":
+            aliased[key] = {aliases.get(name, name): alias_schema(prop, aliases) for name, prop in value.items()}
+        elif key == "required":
+            aliased[key] = [aliases.get(name, name) for name in value]
+        else:
+            aliased[key] = alias_schema(value, aliases)
+    return aliased
+
+
+def rename_keys(node: Any, mapping: Dict[str, str]) -> Any:
+    if isinstance(node, dict):
+        return {mapping.get(key, key): rename_keys(value, mapping) for key, value in node.items()}
+    if isinstance(node, list):
+        return [rename_keys(item, mapping) for item in node]
+    return node
+
+
+def minify(node: Any) -> str:
+    return json.dumps(node, separators=(",", ":"), ensure_ascii=False)
@@ -1,6 +1,10 @@
 from pathlib import Path
+import json
 import logging
 
+from . import prompt_compiler
+from ..schemas.insurance_schemas import INSURANCE_DATA_JSON_SCHEMA
+
 logger = logging.getLogger(__name__)
 
 MAPPING_FILE_PATH = Path(__file__).resolve().parent.parent.parent / "config" / "insurance_fhir_mapping.json"
@@ -16,6 +20,7 @@ def _load_mapping_template() -> str:
 
 
 _ANNOTATED_JSON_TEMPLATE = _load_mapping_template()
+MAPPING_TEMPLATE = json.loads(_ANNOTATED_JSON_TEMPLATE)
 
 SYSTEM_PROMPT_FHIR = f"""
 You are an expert in healthcare data and FHIR (Fast Healthcare Interoperability Resources).
@@ -35,4 +40,34 @@ Rules:
 </expected_json_schema>
 
 Now analyze the markdown text below and return the JSON object:
-"""
\ No newline at end of file
+"""
+
+COMPACT_KEY_ALIASES = prompt_compiler.compile_key_aliases(MAPPING_TEMPLATE)
+COMPACT_KEY_EXPANSIONS = {alias: key for key, alias in COMPACT_KEY_ALIASES.items()}
+COMPACT_JSON_SCHEMA = prompt_compiler.alias_schema(INSURANCE_DATA_JSON_SCHEMA, COMPACT_KEY_ALIASES)
+
+SYSTEM_PROMPT_FHIR_COMPACT = f"""Extract data from the Indian health insurance policy markdown into this JSON shape. Values below are field hints.
+Rules: output ONLY minified JSON, no fences or prose. Use exactly these short keys; add none. Missing field: "" or []. Optional object with no data: null.
+{prompt_compiler.minify(prompt_compiler.compact_template(MAPPING_TEMPLATE, COMPACT_KEY_ALIASES))}
+"""
+
+SYSTEM_PROMPT_CONTINUATION = """
+You are an expert in healthcare data and FHIR (Fast Healthcare Interoperability Resources).
+An earlier extraction from the Indian health insurance document below was cut off before it finished.
+Extract ONLY the sections listed in the JSON structure below; every other section has already been captured.
+
+Rules:
+1. Output ONLY the raw JSON object, minified. Do not include any explanations or markdown fences.
+2. Keep exactly the nesting and keys shown. Replace the instruction text with data extracted from the document.
+3. If any field or data is not found, set it to an empty string "" or an empty array [] as appropriate.
+
+<expected_json_schema>
+{section_template}
+</expected_json_schema>
+
+Now analyze the markdown text below and return the JSON object:
+"""
+
+
+def build_continuation_prompt(section_template: dict) -> str:
+    return SYSTEM_PROMPT_CONTINUATION.format(section_template=json.dumps(section_template, indent=2))
@@ -0,0 +1,32 @@
+import logging
+from typing import Any, Optional
+
+from .. import constants
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+_encoder: Optional[Any] = None
+_encoder_loaded = False
+
+
+def _get_encoder() -> Optional[Any]:
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.debug(constants.LOG_TOKENIZER_FALLBACK.format(chars_per_token=CHARS_PER_TOKEN, error=e))
+    return _encoder
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return max(1, len(text) // CHARS_PER_TOKEN)
@@ -1,15 +1,14 @@
+import asyncio
 import logging
-import requests
 import json
-import boto3
+import httpx
 import openai
-from google import genai
-from groq import Groq
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Callable, Dict, Any
+from typing import Awaitable, Callable, Dict, Any
 
-from .config import settings
+from .config import ROOT_DIR, settings
 from . import constants
+from .services.llm.client_registry import get_client_registry
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +20,14 @@ def _check_api_key(provider_name: str, api_key: str) -> bool:
     return True
 
 
-def _check_openai() -> bool:
+async def _check_openai() -> bool:
     logger.info(constants.LOG_HEALTH_CHECKING.format(provider="OpenAI"))
-    if not _check_api_key("OpenAI", settings.openai_api_key):
+    api_keys = settings.api_key_pool(constants.LLM_PROVIDER_OPENAI)
+    if not _check_api_key("OpenAI", next(iter(api_keys), "")):
         return False
     try:
-        client = openai.OpenAI(api_key=settings.openai_api_key)
-        client.models.list()
+        client = get_client_registry().openai_client(api_key=api_keys[0])
+        await client.models.list()
         logger.info(constants.LOG_HEALTH_PROVIDER_OK.format(provider="OpenAI"))
         return True
     except openai.AuthenticationError:
@@ -38,12 +38,12 @@ def _check_openai() -> bool:
         return False
 
 
-def _check_ollama() -> bool:
+async def _check_ollama() -> bool:
     base_url = settings.llm.ollama.base_url
     logger.info(constants.LOG_HEALTH_CHECKING_OLLAMA.format(base_url=base_url))
     try:
         health_check_url = base_url.removesuffix("/v1")
-        response = requests.get(health_check_url, timeout=5)
+        response = await get_client_registry().async_http_client().get(health_check_url, timeout=5)
         response.raise_for_status()
         if "Ollama is running" in response.text:
             logger.info(constants.LOG_HEALTH_PROVIDER_OK.format(provider="Ollama"))
@@ -51,18 +51,19 @@ def _check_ollama() -> bool:
         else:
             logger.warning(constants.LOG_HEALTH_OLLAMA_UNEXPECTED.format(response=response.text))
             return False
-    except requests.exceptions.RequestException:
+    except httpx.HTTPError:
         logger.error(constants.LOG_HEALTH_OLLAMA_CONNECT_FAILED.format(base_url=base_url))
         return False
 
 
-def _check_gemini() -> bool:
+async def _check_gemini() -> bool:
     logger.info(constants.LOG_HEALTH_CHECKING.format(provider="Google Gemini"))
-    if not _check_api_key("Google Gemini", settings.google_api_key):
+    api_keys = settings.api_key_pool(constants.LLM_PROVIDER_GEMINI)
+    if not _check_api_key("Google Gemini", next(iter(api_keys), "")):
         return False
     try:
-        client = genai.Client(api_key=settings.google_api_key)
-        next(client.models.list())
+        client = get_client_registry().gemini_client(api_keys[0])
+        await client.aio.models.list()
         logger.info(constants.LOG_HEALTH_PROVIDER_OK.format(provider="Google Gemini"))
         return True
     except Exception as e:
@@ -71,13 +72,14 @@ def _check_gemini() -> bool:
         return False
 
 
-def _check_grok() -> bool:
+async def _check_grok() -> bool:
     logger.info(constants.LOG_HEALTH_CHECKING.format(provider="Groq"))
-    if not _check_api_key("Groq", settings.grok_api_key):
+    api_keys = settings.api_key_pool(constants.LLM_PROVIDER_GROK)
+    if not _check_api_key("Groq", next(iter(api_keys), "")):
         return False
     try:
-        client = Groq(api_key=settings.grok_api_key)
-        client.models.list()
+        client = get_client_registry().openai_client(api_key=api_keys[0], base_url=settings.llm.grok.base_url)
+        await client.models.list()
         logger.info(constants.LOG_HEALTH_PROVIDER_OK.format(provider="Groq"))
         return True
     except Exception as e:
@@ -97,7 +99,7 @@ def _get_bedrock_health_payload(model_id: str) -> Dict[str, Any]:
     raise ValueError(constants.LOG_HEALTH_BEDROCK_UNSUPPORTED_MODEL.format(model_id=model_id))
 
 
-def _check_bedrock() -> bool:
+async def _check_bedrock() -> bool:
     logger.info(constants.LOG_HEALTH_CHECKING.format(provider="AWS Bedrock"))
     if (not settings.aws_access_key_id or settings.aws_access_key_id == "not-set") and \
        (not settings.aws_secret_access_key or settings.aws_secret_access_key == "not-set"):
@@ -105,15 +107,14 @@ def _check_bedrock() -> bool:
 
     model_id = settings.llm.bedrock.model_id
     try:
-        session = boto3.Session(
-            aws_access_key_id=settings.aws_access_key_id if settings.aws_access_key_id != "not-set" else None,
-            aws_secret_access_key=settings.aws_secret_access_key if settings.aws_secret_access_key != "not-set" else None,
-            region_name=settings.llm.bedrock.region_name
-        )
-        bedrock_runtime_client = session.client('bedrock-runtime')
+        bedrock_runtime_client = get_client_registry().aws_client('bedrock-runtime')
         payload = _get_bedrock_health_payload(model_id)
         body = json.dumps(payload)
-        bedrock_runtime_client.invoke_model(body=body, modelId=model_id, contentType='application/json', accept='application/json')
+        # boto3 has no async API; the probe runs in a thread so it does not block the event loop.
+        await asyncio.to_thread(
+            bedrock_runtime_client.invoke_model,
+            body=body, modelId=model_id, contentType='application/json', accept='application/json',
+        )
         logger.info(constants.LOG_HEALTH_BEDROCK_OK.format(model_id=model_id))
         return True
     except NoCredentialsError:
@@ -136,17 +137,29 @@ def _check_bedrock() -> bool:
         return False
 
 
-_HEALTH_CHECKS: Dict[str, Callable[[], bool]] = {
+async def _check_replay() -> bool:
+    replay = settings.llm.replay
+    if replay.mode == constants.REPLAY_MODE_RECORD:
+        record_check = _HEALTH_CHECKS.get(replay.record_provider)
+        return bool(record_check and await record_check())
+    recordings_dir = ROOT_DIR / replay.recordings_dir
+    count = len(list(recordings_dir.glob("*.json"))) if recordings_dir.is_dir() else 0
+    logger.info(constants.LOG_HEALTH_REPLAY_OK.format(mode=replay.mode, count=count, recordings_dir=recordings_dir))
+    return True
+
+
+# Probes share the async clients inference uses, so a health check warms the same connection pool.
+_HEALTH_CHECKS: Dict[str, Callable[[], Awaitable[bool]]] = {
     "openai": _check_openai, "ollama": _check_ollama, "gemini": _check_gemini,
-    "grok": _check_grok, "bedrock": _check_bedrock,
+    "grok": _check_grok, "bedrock": _check_bedrock, "replay": _check_replay,
 }
 
 
-def check_llm_health() -> bool:
+async def check_llm_health() -> bool:
     provider = settings.llm.provider
     logger.info(constants.LOG_LLM_HEALTH_CHECK_START.format(provider=provider))
     check_function = _HEALTH_CHECKS.get(provider)
-    if not (check_function and check_function()):
+    if not (check_function and await check_function()):
         logger.error(constants.LOG_LLM_HEALTH_CHECK_FAILED.format(provider=provider))
         return False
     logger.info(constants.LOG_LLM_HEALTH_CHECK_PASSED.format(provider=provider))
@@ -1,14 +1,28 @@
+import gzip
 import time
 import uuid
 import logging
+from typing import Dict, Optional
 from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from . import constants
+from .config import settings
 from .logging_config import request_id_var
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 logger = logging.getLogger(__name__)
 
+_COMPRESSIBLE_MEDIA_TYPES = ("application/json", "application/fhir+json")
+_THREADED_COMPRESSION_BYTES = 256 * 1024
+
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
@@ -24,4 +38,82 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             return response
         except Exception:
             logger.exception(constants.LOG_REQUEST_FAILED.format(method=request.method, path=request.url.path))
-            raise
\ No newline at end of file
+            raise
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted_encodings(accept_encoding)
+    candidates = ([constants.CONTENT_ENCODING_BR] if brotli is not None else []) + [constants.CONTENT_ENCODING_GZIP]
+    best = max(candidates, key=lambda name: accepted.get(name, accepted.get("*", 0.0)))
+    return best if accepted.get(best, accepted.get("*", 0.0)) > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == constants.CONTENT_ENCODING_BR:
+        return brotli.compress(body, quality=settings.compression.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression.gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    # Compresses complete JSON bodies only; streamed responses (e.g. NDJSON) pass through untouched.
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression.enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or media_type not in _COMPRESSIBLE_MEDIA_TYPES
+                or len(body) < settings.compression.minimum_size
+            ):
+                await send(start)
+                await send(message)
+                return
+            if len(body) >= _THREADED_COMPRESSION_BYTES:
+                body = await run_in_threadpool(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
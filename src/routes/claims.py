@@ -1,16 +1,24 @@
-from fastapi import APIRouter, UploadFile, File, Depends, Request, Form
-from fastapi.responses import JSONResponse
-from ..core.pdf_processor import PDFProcessor
+from fastapi import APIRouter, UploadFile, File, Depends, Request, Form, Response
+from src.serialization import JSON_OBJECT_BODY, FastJSONResponse, NDJSONStreamingResponse, RawJSONResponse
+from ..core.pdf_processor import PDFProcessor, count_pdf_pages
+from ..core.token_counter import estimate_tokens
 from src.services.llm.llm_service import LLMService
-from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
-from ..core import prompts
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle, build_fhir_bundle_json
+from src.services.fhir import bulk_fhir_generator
+from src.services.fhir.bundle_stream import PayloadTooLargeError, read_json_body
+from ..core import prompts, prompt_compiler
+from ..config import settings
 from ..services.policy_pruner import PolicyPruner
+from ..services.llm import json_repair, model_router
+from ..schemas.insurance_schemas import INSURANCE_DATA_ADAPTER, INSURANCE_DATA_JSON_SCHEMA
+from pydantic import ValidationError
 from src.health_check import check_llm_health
 import tempfile
 import os
 import json
 import asyncio
 import re
+from typing import Optional, Tuple
 from .. import constants
 import logging
 
@@ -21,16 +29,84 @@ logger = logging.getLogger(__name__)
 _JSON_MARKDOWN_REGEX = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```", re.DOTALL)
 
 
-def _clean_and_parse_llm_response(llm_response: str) -> dict:
+def _extraction_request() -> Tuple[str, dict]:
+    if settings.llm.prompt_mode == constants.PROMPT_MODE_COMPACT:
+        return prompts.SYSTEM_PROMPT_FHIR_COMPACT, prompts.COMPACT_JSON_SCHEMA
+    return prompts.SYSTEM_PROMPT_FHIR, INSURANCE_DATA_JSON_SCHEMA
+
+
+def _parse_llm_json(llm_response: str) -> Tuple[dict, bool]:
     parsable_string = llm_response.strip()
     match = _JSON_MARKDOWN_REGEX.search(parsable_string)
     if match:
         parsable_string = match.group(1).strip()
     try:
-        return json.loads(parsable_string)
+        parsed, truncated = json.loads(parsable_string), False
     except json.JSONDecodeError as e:
-        logger.error(constants.LOG_LLM_JSON_DECODE_FAILED.format(raw_response=llm_response))
-        raise ValueError(constants.ERROR_MESSAGE_LLM_INVALID_JSON) from e
+        try:
+            parsed, truncated = json_repair.parse_llm_json(llm_response)
+        except ValueError:
+            logger.error(constants.LOG_LLM_JSON_DECODE_FAILED.format(raw_response=llm_response))
+            raise ValueError(constants.ERROR_MESSAGE_LLM_INVALID_JSON) from e
+        logger.warning(constants.LOG_LLM_JSON_REPAIRED.format(truncated=truncated))
+    if settings.llm.prompt_mode == constants.PROMPT_MODE_COMPACT:
+        # Aliases never collide with canonical keys, so canonical responses pass through unchanged.
+        parsed = prompt_compiler.rename_keys(parsed, prompts.COMPACT_KEY_EXPANSIONS)
+    return parsed, truncated
+
+
+def _validate_insurance_data(parsed: dict) -> dict:
+    try:
+        return INSURANCE_DATA_ADAPTER.validate_python(parsed).model_dump()
+    except ValidationError as e:
+        logger.error(constants.LOG_LLM_SCHEMA_VALIDATION_FAILED.format(error=e))
+        raise ValueError(constants.ERROR_MESSAGE_LLM_SCHEMA_MISMATCH) from e
+
+
+def _clean_and_parse_llm_response(llm_response: str) -> dict:
+    parsed, _ = _parse_llm_json(llm_response)
+    return _validate_insurance_data(parsed)
+
+
+async def _complete_truncated_sections(llm_service: LLMService, clean_markdown: str, parsed: dict) -> dict:
+    sections = json_repair.find_incomplete_sections(parsed, prompts.MAPPING_TEMPLATE)
+    if not sections:
+        return parsed
+    logger.warning(constants.LOG_LLM_CONTINUATION_REQUEST.format(sections=[".".join(path) for path in sections]))
+    continuation_response = await llm_service.process_text(
+        system_prompt=prompts.build_continuation_prompt(json_repair.select_sections(prompts.MAPPING_TEMPLATE, sections)),
+        user_prompt=clean_markdown,
+        response_schema=json_repair.select_schema_sections(INSURANCE_DATA_JSON_SCHEMA, sections),
+    )
+    continuation, _ = _parse_llm_json(continuation_response)
+    return json_repair.merge_sections(parsed, continuation, sections)
+
+
+async def _extract_with_service(llm_service: LLMService, clean_markdown: str) -> dict:
+    system_prompt, response_schema = _extraction_request()
+    full_llm_response = await llm_service.process_text(
+        system_prompt=system_prompt,
+        user_prompt=clean_markdown,
+        response_schema=response_schema,
+    )
+    logger.info(constants.LOG_LLM_RESPONSE_RECEIVED)
+    parsed, truncated = _parse_llm_json(full_llm_response)
+    if truncated:
+        parsed = await _complete_truncated_sections(llm_service, clean_markdown, parsed)
+    return _validate_insurance_data(parsed)
+
+
+async def _extract_insurance_data(llm_service: LLMService, clean_markdown: str, page_count: Optional[int] = None) -> dict:
+    candidates = model_router.route(llm_service, estimate_tokens(clean_markdown), page_count)
+    for position, (tier, service) in enumerate(candidates):
+        try:
+            return await _extract_with_service(service, clean_markdown)
+        except ValueError as e:
+            if position == len(candidates) - 1:
+                raise
+            logger.warning(constants.LOG_MODEL_ROUTER_ESCALATING.format(
+                tier=tier, error=e, next_tier=candidates[position + 1][0]
+            ))
 
 
 def get_pdf_processor(request: Request) -> PDFProcessor:
@@ -47,19 +123,19 @@ async def process_insurance_claim(
     generate_fhir: bool = Form(True, description="Set to true to generate FHIR bundle, false to return cleaned JSON"),
     pdf_processor: PDFProcessor = Depends(get_pdf_processor),
     llm_service: LLMService = Depends(get_llm_service),
-) -> JSONResponse:
+) -> FastJSONResponse:
     temp_pdf_path = None
     logger.info(constants.LOG_CLAIM_PROCESS_REQUEST)
     try:
         if file.content_type != "application/pdf":
             logger.warning(constants.LOG_INVALID_FILE_TYPE_RECEIVED.format(content_type=file.content_type, filename=file.filename))
-            return JSONResponse(
+            return FastJSONResponse(
                 content={"error": {"code": constants.ERROR_CODE_INVALID_FILE_TYPE, "message": constants.ERROR_MESSAGE_INVALID_FILE_TYPE}},
                 status_code=400
             )
 
-        if not check_llm_health():
-            return JSONResponse(
+        if not await check_llm_health():
+            return FastJSONResponse(
                 content={"error": {"code": constants.ERROR_MESSAGE_LLM_OFFLINE, "message": constants.ERROR_MESSAGE_LLM_FAILED}},
                 status_code=400
             )
@@ -72,29 +148,24 @@ async def process_insurance_claim(
         logger.info(constants.LOG_PDF_CONVERSION_START.format(temp_path=temp_pdf_path))
         loop = asyncio.get_running_loop()
         markdown_text = await loop.run_in_executor(None, pdf_processor.convert_to_markdown, temp_pdf_path)
+        page_count = await loop.run_in_executor(None, count_pdf_pages, temp_pdf_path)
         logger.info(constants.LOG_PDF_CONVERSION_SUCCESS.format(length=len(markdown_text)))
 
         clean_markdown = pruner.prune(markdown_text)
         logger.info(constants.LOG_LLM_SENDING_MARKDOWN.format(service_name=llm_service.__class__.__name__))
-        full_llm_response = await llm_service.process_text(
-            system_prompt=prompts.SYSTEM_PROMPT_FHIR, user_prompt=clean_markdown
-        )
-        logger.info(constants.LOG_LLM_RESPONSE_RECEIVED)
-
-        cleaned_json = _clean_and_parse_llm_response(full_llm_response)
+        cleaned_json = await _extract_insurance_data(llm_service, clean_markdown, page_count)
         response_payload = {"extracted_data": cleaned_json}
         logger.info(cleaned_json)
 
         if generate_fhir:
             logger.info(constants.LOG_CLAIM_GENERATING_FHIR)
-            mapper = InsurancePlanFHIRMapper(cleaned_json)
-            response_payload["fhir_bundle"] = mapper.generate_dict()
+            response_payload["fhir_bundle"] = build_fhir_bundle(cleaned_json)
 
-        return JSONResponse(content=response_payload, status_code=200)
+        return FastJSONResponse(content=response_payload, status_code=200)
 
     except Exception as e:
         logger.exception(constants.LOG_CLAIM_PROCESS_ERROR)
-        return JSONResponse(
+        return FastJSONResponse(
             content={"error": {"code": constants.ERROR_CODE_PROCESSING_ERROR, "message": f"{constants.ERROR_MESSAGE_PROCESSING_ERROR} Details: {e}"}},
             status_code=400
         )
@@ -104,30 +175,43 @@ async def process_insurance_claim(
             os.remove(temp_pdf_path)
 
 
-@router.post("/generate-fhir", tags=["Insurance Processing"])
-async def generate_fhir_from_json(payload: dict) -> JSONResponse:
+@router.post("/generate-fhir", tags=["Insurance Processing"], openapi_extra=JSON_OBJECT_BODY)
+async def generate_fhir_from_json(request: Request) -> Response:
+    try:
+        payload = await read_json_body(request.stream())
+    except PayloadTooLargeError as e:
+        return FastJSONResponse(content={"error": {"code": constants.ERROR_CODE_PAYLOAD_TOO_LARGE, "message": str(e)}}, status_code=413)
+    except ValueError as e:
+        return FastJSONResponse(content={"error": {"code": constants.ERROR_CODE_FHIR_MAPPING_ERROR, "message": str(e)}}, status_code=400)
+    if not isinstance(payload, dict):
+        return FastJSONResponse(content={"error": {"code": constants.ERROR_CODE_FHIR_MAPPING_ERROR, "message": constants.ERROR_MESSAGE_JSON_NOT_OBJECT}}, status_code=400)
     try:
-        mapper = InsurancePlanFHIRMapper(payload)
-        fhir_bundle = mapper.generate_dict()
-        return JSONResponse(content=fhir_bundle, status_code=200)
+        return RawJSONResponse(content=build_fhir_bundle_json(payload), status_code=200)
     except Exception as e:
         logger.exception(constants.LOG_CLAIM_FHIR_MAP_FAILED)
-        return JSONResponse(
+        return FastJSONResponse(
             content={"error": {"code": constants.ERROR_CODE_FHIR_MAPPING_ERROR, "message": constants.ERROR_MESSAGE_FHIR_MAPPING.format(error=str(e))}},
             status_code=400
         )
 
 
+@router.post("/generate-fhir/bulk", tags=["Insurance Processing"])
+async def generate_fhir_bulk(request: Request) -> NDJSONStreamingResponse:
+    logger.info(constants.LOG_CLAIM_GENERATE_FHIR_BULK)
+    lines = bulk_fhir_generator.iter_ndjson_lines(request.stream())
+    return NDJSONStreamingResponse(bulk_fhir_generator.stream_bulk_bundles(lines))
+
+
 @router.post("/extract-only", tags=["Insurance Processing"])
 async def extract_data_only(
     file: UploadFile = File(...),
     pdf_processor: PDFProcessor = Depends(get_pdf_processor),
     llm_service: LLMService = Depends(get_llm_service),
-) -> JSONResponse:
+) -> FastJSONResponse:
     temp_pdf_path = None
     try:
         if file.content_type != "application/pdf":
-            return JSONResponse(
+            return FastJSONResponse(
                 content={"error": {"code": constants.ERROR_CODE_INVALID_FILE_TYPE, "message": constants.ERROR_MESSAGE_INVALID_FILE_TYPE}},
                 status_code=400
             )
@@ -138,18 +222,16 @@ async def extract_data_only(
 
         loop = asyncio.get_running_loop()
         markdown_text = await loop.run_in_executor(None, pdf_processor.convert_to_markdown, temp_pdf_path)
+        page_count = await loop.run_in_executor(None, count_pdf_pages, temp_pdf_path)
         clean_markdown = pruner.prune(markdown_text)
 
-        full_llm_response = await llm_service.process_text(
-            system_prompt=prompts.SYSTEM_PROMPT_FHIR, user_prompt=clean_markdown
-        )
-        extracted = _clean_and_parse_llm_response(full_llm_response)
+        extracted = await _extract_insurance_data(llm_service, clean_markdown, page_count)
 
-        return JSONResponse(content={"extracted_data": extracted}, status_code=200)
+        return FastJSONResponse(content={"extracted_data": extracted}, status_code=200)
 
     except Exception as e:
         logger.exception(constants.LOG_CLAIM_EXTRACT_ONLY_ERROR)
-        return JSONResponse(
+        return FastJSONResponse(
             content={"error": {"code": constants.ERROR_CODE_PROCESSING_ERROR, "message": str(e)}},
             status_code=400
         )
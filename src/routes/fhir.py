@@ -1,5 +1,9 @@
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request
+from src.serialization import JSON_OBJECT_BODY, FastJSONResponse, NDJSONStreamingResponse
+from src.services.fhir import bulk_fhir_generator
+from src.services.fhir.bundle_index import BundleIndex
+from src.services.fhir.bundle_stream import PayloadTooLargeError, consume_bundle
+from src.services.fhir.profile_validator import get_profile_validator, stream_bulk_validation
 
 from src import constants
 import logging
@@ -7,105 +11,66 @@ import logging
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+_SUMMARY_RETAINED_TYPES = frozenset({"InsurancePlan"})
 
-@router.post("/validate", tags=["FHIR Utilities"])
-async def validate_fhir_bundle(payload: dict) -> JSONResponse:
-    issues = []
-    try:
-        if payload.get("resourceType") != "Bundle":
-            issues.append({"severity": "error", "field": "resourceType", "message": "Must be 'Bundle'"})
-
-        if payload.get("type") != "collection":
-            issues.append({"severity": "warning", "field": "type", "message": "Expected bundle type 'collection'"})
-
-        entries = payload.get("entry", [])
-        resource_types = [e.get("resource", {}).get("resourceType") for e in entries]
-
-        if "InsurancePlan" not in resource_types:
-            issues.append({"severity": "error", "field": "entry", "message": "No InsurancePlan resource found in bundle"})
-        else:
-            plan = next(e["resource"] for e in entries if e.get("resource", {}).get("resourceType") == "InsurancePlan")
-            for required_field in ["name", "status", "ownedBy", "identifier"]:
-                if not plan.get(required_field):
-                    issues.append({
-                        "severity": "error",
-                        "field": f"InsurancePlan.{required_field}",
-                        "message": f"Required field '{required_field}' is missing or empty"
-                    })
-            if not plan.get("meta", {}).get("profile"):
-                issues.append({"severity": "warning", "field": "InsurancePlan.meta.profile", "message": "No profile URL set on InsurancePlan"})
-            if not plan.get("text"):
-                issues.append({"severity": "info", "field": "InsurancePlan.text", "message": "Narrative text is absent"})
-
-        if "Organization" not in resource_types:
-            issues.append({"severity": "error", "field": "entry", "message": "No Organization resource found in bundle"})
-
-        return JSONResponse(content={
-            "valid": len([i for i in issues if i["severity"] == "error"]) == 0,
-            "issue_count": len(issues),
-            "issues": issues,
-        }, status_code=200)
 
+def _unique_names(concepts) -> list:
+    # First-seen order, de-duplicated through dict keys rather than list membership checks.
+    names = (concept.get("text") or (concept.get("coding") or [{}])[0].get("display") for concept in concepts)
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _too_large(error: PayloadTooLargeError) -> FastJSONResponse:
+    return FastJSONResponse(content={"error": {"code": constants.ERROR_CODE_PAYLOAD_TOO_LARGE, "message": str(error)}}, status_code=413)
+
+
+@router.post("/validate", tags=["FHIR Utilities"], openapi_extra=JSON_OBJECT_BODY)
+async def validate_fhir_bundle(request: Request) -> FastJSONResponse:
+    try:
+        run = get_profile_validator().start()
+        bundle = await consume_bundle(request.stream(), request.headers.get("content-length"), run.add_entry)
+        return FastJSONResponse(content=run.finish(bundle), status_code=200)
+    except PayloadTooLargeError as e:
+        return _too_large(e)
     except Exception as e:
         logger.exception(constants.LOG_CLAIM_FHIR_VALIDATION_ERROR)
-        return JSONResponse(content={"error": {"code": constants.ERROR_CODE_VALIDATION_ERROR, "message": str(e)}}, status_code=400)
+        return FastJSONResponse(content={"error": {"code": constants.ERROR_CODE_VALIDATION_ERROR, "message": str(e)}}, status_code=400)
 
 
-@router.post("/bundle-summary", tags=["FHIR Utilities"])
-async def get_bundle_summary(payload: dict) -> JSONResponse:
-    try:
-        entries = payload.get("entry", [])
-        resources = {}
-        for e in entries:
-            r = e.get("resource", {})
-            rt = r.get("resourceType", "Unknown")
-            resources.setdefault(rt, []).append(r)
+@router.post("/validate/bulk", tags=["FHIR Utilities"])
+async def validate_fhir_bundles_bulk(request: Request) -> NDJSONStreamingResponse:
+    logger.info(constants.LOG_FHIR_VALIDATE_BULK)
+    lines = bulk_fhir_generator.iter_ndjson_lines(request.stream())
+    return NDJSONStreamingResponse(stream_bulk_validation(lines))
 
-        plan = (resources.get("InsurancePlan") or [{}])[0]
-        orgs = resources.get("Organization", [])
 
-        owned_by_ref = (plan.get("ownedBy") or {}).get("reference", "")
-        insurer = next((o for o in orgs if f"urn:uuid:{o.get('id')}" == owned_by_ref), orgs[0] if orgs else {})
+@router.post("/bundle-summary", tags=["FHIR Utilities"], openapi_extra=JSON_OBJECT_BODY)
+async def get_bundle_summary(request: Request) -> FastJSONResponse:
+    try:
+        # Only the InsurancePlan is kept whole; other resources are reduced to type/id/name as they stream past.
+        index = BundleIndex(retain_types=_SUMMARY_RETAINED_TYPES)
+        await consume_bundle(request.stream(), request.headers.get("content-length"), lambda position, entry, _: index.add(position, entry))
+        plan = index.first("InsurancePlan") or {}
+        orgs = index.of_type("Organization")
 
-        admin_by_ref = (plan.get("administeredBy") or {}).get("reference", "")
-        tpa = next((o for o in orgs if f"urn:uuid:{o.get('id')}" == admin_by_ref), None)
+        insurer = index.resolve(plan.get("ownedBy"), "Organization") or (orgs[0] if orgs else {})
+        tpa = index.resolve(plan.get("administeredBy"), "Organization")
 
         period = plan.get("period", {})
         plan_type_coding = ((plan.get("type") or [{}])[0].get("coding") or [{}])[0]
 
         coverages = plan.get("coverage") or []
-        coverage_names = []
-        benefit_names = []
-        for c in coverages:
-            c_type = c.get("type", {})
-            c_name = c_type.get("text") or (c_type.get("coding") or [{}])[0].get("display")
-            if c_name and c_name not in coverage_names:
-                coverage_names.append(c_name)
-            for b in (c.get("benefit") or []):
-                b_type = b.get("type", {})
-                b_name = b_type.get("text") or (b_type.get("coding") or [{}])[0].get("display")
-                if b_name and b_name not in benefit_names:
-                    benefit_names.append(b_name)
+        coverage_names = _unique_names(c.get("type", {}) for c in coverages)
+        benefit_names = _unique_names(b.get("type", {}) for c in coverages for b in (c.get("benefit") or []))
 
         plans = plan.get("plan") or []
-        plan_names = []
-        for p in plans:
-            p_type = p.get("type", {})
-            p_name = p_type.get("text") or (p_type.get("coding") or [{}])[0].get("display")
-            if p_name and p_name not in plan_names:
-                plan_names.append(p_name)
+        plan_names = _unique_names(p.get("type", {}) for p in plans)
 
         exclusions = [
             ext for ext in (plan.get("extension") or [])
             if "Exclusion" in ext.get("url", "") or "exclusion" in ext.get("url", "")
         ]
-        exclusion_names = []
-        for e in exclusions:
-            category = e.get("extension", [{}])[0]
-            val_concept = category.get("valueCodeableConcept", {})
-            e_name = val_concept.get("text") or (val_concept.get("coding") or [{}])[0].get("display")
-            if e_name and e_name not in exclusion_names:
-                exclusion_names.append(e_name)
+        exclusion_names = _unique_names(e.get("extension", [{}])[0].get("valueCodeableConcept", {}) for e in exclusions)
 
         summary = {
             "planName": plan.get("name", "N/A"),
@@ -121,15 +86,17 @@ async def get_bundle_summary(payload: dict) -> JSONResponse:
             "benefitCount": sum(len(c.get("benefit") or []) for c in coverages),
             "planCount": len(plans),
             "exclusionCount": len(exclusions),
-            "totalResources": len(entries),
+            "totalResources": len(index.entries),
             "coverageNames": coverage_names,
             "benefitNames": benefit_names,
             "planNames": plan_names,
             "exclusionNames": exclusion_names,
         }
 
-        return JSONResponse(content=summary, status_code=200)
+        return FastJSONResponse(content=summary, status_code=200)
 
+    except PayloadTooLargeError as e:
+        return _too_large(e)
     except Exception as e:
         logger.exception(constants.LOG_CLAIM_BUNDLE_SUMMARY_ERROR)
-        return JSONResponse(content={"error": {"code": constants.ERROR_CODE_SUMMARY_ERROR, "message": str(e)}}, status_code=400)
+        return FastJSONResponse(content={"error": {"code": constants.ERROR_CODE_SUMMARY_ERROR, "message": str(e)}}, status_code=400)
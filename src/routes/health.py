@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from src.serialization import FastJSONResponse
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -13,8 +13,8 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/health", tags=["System"])
-async def service_health(request: Request) -> JSONResponse:
-    llm_ok = check_llm_health()
+async def service_health(request: Request) -> FastJSONResponse:
+    llm_ok = await check_llm_health()
     pdf_processor: Optional[object] = getattr(request.app.state, "pdf_processor", None)
     pdf_ok = pdf_processor is not None
 
@@ -28,4 +28,4 @@ async def service_health(request: Request) -> JSONResponse:
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
     status_code = 200 if payload["status"] == "healthy" else 503
-    return JSONResponse(content=payload, status_code=status_code)
+    return FastJSONResponse(content=payload, status_code=status_code)
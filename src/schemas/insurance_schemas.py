@@ -1,10 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Any, Dict, List, Optional
 
 
 class OrganisationSchema(BaseModel):
     name: str = Field(..., description="Name of the insurance company")
     phone: Optional[str] = ""
+    email: Optional[str] = ""
+    website: Optional[str] = ""
 
 
 class TPAOrganisationSchema(BaseModel):
@@ -14,7 +16,9 @@ class TPAOrganisationSchema(BaseModel):
 
 class ContactSchema(BaseModel):
     purpose: Optional[str] = ""
+    name: Optional[str] = ""
     phone: Optional[str] = ""
+    email: Optional[str] = ""
 
 
 class SupportingInfoReqSchema(BaseModel):
@@ -62,6 +66,8 @@ class PlanSchema(BaseModel):
 class InsurancePlanSchema(BaseModel):
     status: Optional[str] = "active"
     name: str
+    alias: List[str] = []
+    language: Optional[str] = "en-IN"
     typeCode: str
     typeDisplay: str
     periodStart: Optional[str] = ""
@@ -79,4 +85,36 @@ class InsuranceDataPayload(BaseModel):
     bundleType: str
     organisation: OrganisationSchema
     tpaOrganisation: Optional[TPAOrganisationSchema] = None
-    insurancePlan: InsurancePlanSchema
\ No newline at end of file
+    insurancePlan: InsurancePlanSchema
+
+
+_SCHEMA_NOISE_KEYS = ("title", "default")
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, list):
+        return [_inline_refs(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+    ref = node.get("$ref")
+    if ref:
+        return _inline_refs(defs[ref.rsplit("/", 1)[-1]], defs)
+    compiled: Dict[str, Any] = {}
+    for key, value in node.items():
+        if key == "$defs" or key in _SCHEMA_NOISE_KEYS:
+            continue
+        if key == "properties":
+            compiled[key] = {name: _inline_refs(prop, defs) for name, prop in value.items()}
+        else:
+            compiled[key] = _inline_refs(value, defs)
+    return compiled
+
+
+def _compile_json_schema(adapter: TypeAdapter) -> Dict[str, Any]:
+    raw_schema = adapter.json_schema()
+    return _inline_refs(raw_schema, raw_schema.get("$defs", {}))
+
+
+INSURANCE_DATA_ADAPTER: TypeAdapter = TypeAdapter(InsuranceDataPayload)
+INSURANCE_DATA_SCHEMA_NAME = "InsuranceDataPayload"
+INSURANCE_DATA_JSON_SCHEMA: Dict[str, Any] = _compile_json_schema(INSURANCE_DATA_ADAPTER)
@@ -0,0 +1,50 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# OpenAPI body for routes that read the request stream themselves instead of declaring `payload: dict`.
+JSON_OBJECT_BODY = {"requestBody": {"required": True, "content": {JSON_MEDIA_TYPE: {"schema": {"type": "object"}}}}}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_line(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    # Body is already-serialized JSON bytes, e.g. a bundle dumped straight from its model.
+    media_type = JSON_MEDIA_TYPE
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    # Starlette's disconnect listener calls receive() and would swallow request body chunks the
+    # generator is still reading, so stream without it; a dropped client surfaces as a failed send.
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,114 @@
+import gzip
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Set, Tuple
+
+from src.config import settings
+from src import constants, serialization
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_EXTENSIONS = {
+    constants.EXPORT_COMPRESSION_NONE: "",
+    constants.EXPORT_COMPRESSION_GZIP: ".gz",
+    constants.EXPORT_COMPRESSION_ZSTD: ".zst",
+}
+
+
+class _TypeFile:
+    __slots__ = ("path", "raw", "stream", "count")
+
+    def __init__(self, path: Path, raw: BinaryIO, stream: BinaryIO):
+        self.path = path
+        self.raw = raw
+        self.stream = stream
+        self.count = 0
+
+
+class BulkExportWriter:
+
+    # FHIR Bulk Data layout: one <ResourceType>.ndjson[.gz|.zst] per type, appended line by line as bundles
+    # arrive, plus a manifest.json listing each file and its resource count once the export is closed.
+    # Resources repeated across bundles (interned Organizations) are written once, keyed by type and id.
+
+    def __init__(self, output_dir: Path, compression: Optional[str] = None, request: str = ""):
+        config = settings.fhir.export
+        self.output_dir = Path(output_dir)
+        self.compression = compression or config.compression
+        if self.compression not in _EXTENSIONS:
+            raise ValueError(constants.ERROR_MESSAGE_EXPORT_COMPRESSION.format(compression=self.compression))
+        if self.compression == constants.EXPORT_COMPRESSION_ZSTD and zstandard is None:
+            raise RuntimeError(constants.ERROR_MESSAGE_EXPORT_ZSTD_MISSING)
+        self.request = request
+        self.transaction_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        self._files: Dict[str, _TypeFile] = {}
+        self._written: Set[Tuple[str, str]] = set()
+        self.duplicates = 0
+        self._manifest: Optional[Dict[str, Any]] = None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def __enter__(self) -> "BulkExportWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _open(self, resource_type: str) -> _TypeFile:
+        path = self.output_dir / f"{resource_type}.ndjson{_EXTENSIONS[self.compression]}"
+        raw = open(path, "wb")
+        if self.compression == constants.EXPORT_COMPRESSION_GZIP:
+            stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=settings.fhir.export.gzip_level, mtime=0)
+        elif self.compression == constants.EXPORT_COMPRESSION_ZSTD:
+            stream = zstandard.ZstdCompressor(level=settings.fhir.export.zstd_level).stream_writer(raw, closefd=False)
+        else:
+            stream = raw
+        self._files[resource_type] = _TypeFile(path, raw, stream)
+        return self._files[resource_type]
+
+    def write_resource(self, resource: Dict[str, Any]) -> bool:
+        resource_type = resource["resourceType"]
+        if resource.get("id"):
+            key = (resource_type, resource["id"])
+            if key in self._written:
+                self.duplicates += 1
+                return False
+            self._written.add(key)
+        type_file = self._files.get(resource_type) or self._open(resource_type)
+        type_file.stream.write(serialization.dumps_line(resource))
+        type_file.count += 1
+        return True
+
+    def write_bundle(self, bundle: Dict[str, Any]) -> int:
+        written = 0
+        for entry in bundle.get("entry") or []:
+            resource = entry.get("resource")
+            if isinstance(resource, dict) and resource.get("resourceType") and self.write_resource(resource):
+                written += 1
+        return written
+
+    def manifest(self) -> Dict[str, Any]:
+        return {
+            "transactionTime": self.transaction_time,
+            "request": self.request,
+            "requiresAccessToken": False,
+            "output": [
+                {"type": resource_type, "url": type_file.path.name, "count": type_file.count}
+                for resource_type, type_file in sorted(self._files.items())
+            ],
+            "error": [],
+        }
+
+    def close(self) -> Dict[str, Any]:
+        if self._manifest is not None:
+            return self._manifest
+        for type_file in self._files.values():
+            if type_file.stream is not type_file.raw:
+                type_file.stream.close()
+            type_file.raw.close()
+        self._manifest = self.manifest()
+        with open(self.output_dir / constants.EXPORT_MANIFEST_FILENAME, "wb") as f:
+            f.write(serialization.dumps(self._manifest))
+        return self._manifest
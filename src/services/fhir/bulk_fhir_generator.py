@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Optional
+
+from src.services.fhir.bundle_stream import PayloadTooLargeError
+from src.services.fhir.fhir_mapping_context import get_default_mapping_context
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+from src.config import settings
+from src import constants, serialization
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _error_line(index: int, code: str, message: str) -> bytes:
+    return serialization.dumps_line({"index": index, "error": {"code": code, "message": message}})
+
+
+def map_bundle_line(index: int, line: bytes) -> bytes:
+    # Runs in a worker process: parsing and mapping both stay off the event loop.
+    try:
+        payload = serialization.loads(line)
+    except ValueError as e:
+        return _error_line(index, constants.ERROR_CODE_INVALID_NDJSON_LINE, str(e))
+    if not isinstance(payload, dict):
+        return _error_line(index, constants.ERROR_CODE_INVALID_NDJSON_LINE, constants.ERROR_MESSAGE_NDJSON_NOT_OBJECT)
+    try:
+        bundle = build_fhir_bundle(payload, context=get_default_mapping_context())
+        return serialization.dumps_line({"index": index, "bundle": bundle})
+    except Exception as e:
+        return _error_line(index, constants.ERROR_CODE_FHIR_MAPPING_ERROR, constants.ERROR_MESSAGE_FHIR_MAPPING.format(error=e))
+
+
+def get_bulk_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        config = settings.fhir.bulk
+        _executor = ProcessPoolExecutor(
+            max_workers=config.workers,
+            mp_context=multiprocessing.get_context(config.start_method),
+        )
+        logger.info(constants.LOG_FHIR_BULK_POOL_STARTED.format(workers=_executor._max_workers))
+    return _executor
+
+
+def shutdown_bulk_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: Optional[int] = None) -> AsyncIterator[bytes]:
+    # Only each new chunk is scanned for newlines, so a long line arriving in many chunks stays linear, and a
+    # line outgrowing the cap is refused instead of buffering a newline-free upload without bound.
+    max_line_bytes = max_line_bytes or settings.fhir.streaming.max_buffered_bytes
+    pending = bytearray()
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            pending += chunk[start:end]
+            start = end + 1
+            if len(pending) > max_line_bytes:
+                raise PayloadTooLargeError(constants.ERROR_MESSAGE_PAYLOAD_TOO_LARGE.format(limit=max_line_bytes))
+            if pending.strip():
+                yield bytes(pending)
+            pending.clear()
+        pending += chunk[start:]
+        if len(pending) > max_line_bytes:
+            raise PayloadTooLargeError(constants.ERROR_MESSAGE_PAYLOAD_TOO_LARGE.format(limit=max_line_bytes))
+    if pending.strip():
+        yield bytes(pending)
+
+
+async def stream_pool_results(
+    lines: AsyncIterator[bytes],
+    worker: Callable[[int, bytes], bytes],
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    # Output lines are emitted as workers finish; each carries its input "index" so clients can reorder.
+    loop = asyncio.get_running_loop()
+    executor = executor or get_bulk_executor()
+    slots = asyncio.Semaphore(max_in_flight or settings.fhir.bulk.max_in_flight)
+    results: asyncio.Queue = asyncio.Queue()
+
+    def _collect(index: int, future: Future) -> None:
+        slots.release()
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            line = _error_line(index, constants.ERROR_CODE_PROCESSING_ERROR, str(error))
+        else:
+            line = future.result()
+        results.put_nowait(line)
+
+    async def _submit() -> int:
+        submitted = 0
+        try:
+            async for line in lines:
+                await slots.acquire()
+                future = loop.run_in_executor(executor, worker, submitted, line)
+                future.add_done_callback(lambda f, index=submitted: _collect(index, f))
+                submitted += 1
+        finally:
+            results.put_nowait(submitted)
+        return submitted
+
+    producer = asyncio.create_task(_submit())
+    emitted, total = 0, None
+    try:
+        while total is None or emitted < total:
+            item = await results.get()
+            if isinstance(item, int):
+                total = item
+                continue
+            emitted += 1
+            yield item
+        logger.info(constants.LOG_FHIR_BULK_COMPLETE.format(count=emitted))
+        await producer
+    finally:
+        producer.cancel()
+
+
+def stream_bulk_bundles(
+    lines: AsyncIterator[bytes],
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    return stream_pool_results(lines, map_bundle_line, executor=executor, max_in_flight=max_in_flight)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+URN_UUID_PREFIX = "urn:uuid:"
+_SLIM_KEYS = ("resourceType", "id", "name")
+
+
+def _walk_references(value: Any, path: str) -> Iterator[Tuple[str, str]]:
+    if isinstance(value, dict):
+        reference = value.get("reference")
+        if isinstance(reference, str):
+            yield path, reference
+        for key, child in value.items():
+            if isinstance(child, (dict, list)):
+                yield from _walk_references(child, f"{path}.{key}")
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield from _walk_references(child, f"{path}[{i}]")
+
+
+class BundleIndex:
+
+    # Built in one pass over the entries; every lookup afterwards is a dict access. With retain_types set,
+    # only those resource types are kept whole and the rest shrink to their resourceType/id/name, so an
+    # index fed from a streamed bundle stays small.
+
+    def __init__(self, bundle: Optional[Dict[str, Any]] = None, retain_types: Optional[FrozenSet[str]] = None):
+        self.retain_types = retain_types
+        # (entry position, entry, resource or None when the entry has no usable resource)
+        self.entries: List[Tuple[int, Any, Optional[dict]]] = []
+        self.by_full_url: Dict[str, dict] = {}
+        self.by_type: Dict[str, List[dict]] = {}
+        self.by_id: Dict[Tuple[str, str], dict] = {}
+        self.duplicate_full_urls: List[Tuple[int, str]] = []
+        self.ids: Dict[str, dict] = {}
+        self._references: Optional[Dict[str, List[str]]] = None
+        if bundle is not None:
+            for position, entry in enumerate(bundle.get("entry") or []):
+                self.add(position, entry)
+
+    def add(self, position: int, entry: Any) -> Optional[dict]:
+        # Returns the entry's full resource (even when only a slim copy is kept) or None.
+        self._references = None
+        resource = entry.get("resource") if isinstance(entry, dict) else None
+        slim = self.retain_types is not None
+        if not isinstance(resource, dict) or not resource.get("resourceType"):
+            self.entries.append((position, None if slim else entry, None))
+            return None
+        resource_type = resource["resourceType"]
+        full_url = entry.get("fullUrl")
+        kept = resource
+        if slim and resource_type not in self.retain_types:
+            kept = {key: resource[key] for key in _SLIM_KEYS if key in resource}
+        self.entries.append((position, None if slim else entry, kept))
+        self.by_type.setdefault(resource_type, []).append(kept)
+        if resource.get("id"):
+            self.by_id[(resource_type, resource["id"])] = kept
+            self.ids.setdefault(resource["id"], kept)
+        if full_url:
+            if full_url in self.by_full_url:
+                self.duplicate_full_urls.append((position, full_url))
+            self.by_full_url[full_url] = kept
+        return resource
+
+    def of_type(self, resource_type: str) -> List[dict]:
+        return self.by_type.get(resource_type, [])
+
+    def first(self, resource_type: str) -> Optional[dict]:
+        resources = self.by_type.get(resource_type)
+        return resources[0] if resources else None
+
+    def resolve(self, reference: Any, resource_type: Optional[str] = None) -> Optional[dict]:
+        # Accepts a Reference dict or its reference string: a fullUrl, urn:uuid:<id> or relative Type/id.
+        if isinstance(reference, dict):
+            reference = reference.get("reference")
+        if not reference or not isinstance(reference, str):
+            return None
+        resource = self.by_full_url.get(reference)
+        if resource is None:
+            if reference.startswith(URN_UUID_PREFIX):
+                resource = self.ids.get(reference[len(URN_UUID_PREFIX):])
+            else:
+                parts = reference.rstrip("/").split("/")
+                if len(parts) >= 2:
+                    resource = self.by_id.get((parts[-2], parts[-1]))
+        if resource is not None and resource_type and resource.get("resourceType") != resource_type:
+            return None
+        return resource
+
+    def references(self) -> Dict[str, List[str]]:
+        # Reference graph: reference string -> locations that hold it, computed on first use from the retained resources.
+        if self._references is None:
+            graph: Dict[str, List[str]] = {}
+            for position, _, resource in self.entries:
+                if resource is None:
+                    continue
+                for path, reference in _walk_references(resource, f"Bundle.entry[{position}].resource"):
+                    graph.setdefault(reference, []).append(path)
+            self._references = graph
+        return self._references
@@ -0,0 +1,111 @@
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
+
+import ijson
+
+from src.config import settings
+from src import constants, serialization
+
+ENTRY_PREFIX = "entry.item"
+_ENTRY_CHILD_PREFIX = ENTRY_PREFIX + "."
+# Events at the entry's own prefix that do not finish it: opening a container, or a key inside it.
+_ENTRY_OPEN_EVENTS = ("start_map", "start_array", "map_key")
+
+
+class PayloadTooLargeError(ValueError):
+    pass
+
+
+def _limit() -> int:
+    return settings.fhir.streaming.max_buffered_bytes
+
+
+async def read_json_body(chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> Any:
+    # Whole-document parse, refused once the body outgrows the cap instead of after buffering all of it.
+    max_bytes = max_bytes or _limit()
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise PayloadTooLargeError(constants.ERROR_MESSAGE_PAYLOAD_TOO_LARGE.format(limit=max_bytes))
+    return serialization.loads(bytes(body))
+
+
+class StreamingBundleReader:
+
+    # Push-parses a bundle chunk by chunk: each Bundle.entry item is materialized on its own and handed to the
+    # caller, everything else accumulates in `head`. At most `max_buffered_bytes` of JSON is held between
+    # released entries, so a request's memory is bounded by its largest entry rather than the whole bundle.
+
+    def __init__(self, chunks: AsyncIterator[bytes], max_buffered_bytes: Optional[int] = None):
+        self._chunks = chunks
+        self.max_buffered_bytes = max_buffered_bytes or _limit()
+        self._root = ijson.ObjectBuilder()
+        self.bytes_read = 0
+
+    @property
+    def head(self) -> Any:
+        # The bundle without its entries; partial until entries() is exhausted.
+        return getattr(self._root, "value", None)
+
+    async def entries(self) -> AsyncIterator[Tuple[int, Any]]:
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events, use_float=True)
+        entry: Optional[ijson.ObjectBuilder] = None
+        position = 0
+        released = 0
+        async for chunk in self._chunks:
+            if not chunk:
+                # An empty send() would end the parser; the ASGI body stream closes with one.
+                continue
+            self.bytes_read += len(chunk)
+            if self.bytes_read - released > self.max_buffered_bytes:
+                raise PayloadTooLargeError(constants.ERROR_MESSAGE_PAYLOAD_TOO_LARGE.format(limit=self.max_buffered_bytes))
+            parser.send(chunk)
+            completed = []
+            for prefix, event, value in events:
+                if prefix == ENTRY_PREFIX or prefix.startswith(_ENTRY_CHILD_PREFIX):
+                    if entry is None:
+                        entry = ijson.ObjectBuilder()
+                    entry.event(event, value)
+                    if prefix == ENTRY_PREFIX and event not in _ENTRY_OPEN_EVENTS:
+                        completed.append((position, entry.value))
+                        entry = None
+                        position += 1
+                else:
+                    self._root.event(event, value)
+            del events[:]
+            if completed:
+                released = self.bytes_read
+            for item in completed:
+                yield item
+        parser.close()
+        for prefix, event, value in events:
+            self._root.event(event, value)
+        if isinstance(self.head, dict):
+            self.head.pop("entry", None)
+
+
+def should_stream(content_length: Optional[str]) -> bool:
+    # Chunked uploads and bodies above the threshold are parsed incrementally; small ones in one orjson call.
+    if content_length is None or not content_length.isdigit():
+        return True
+    return int(content_length) > settings.fhir.streaming.threshold_bytes
+
+
+async def consume_bundle(
+    chunks: AsyncIterator[bytes],
+    content_length: Optional[str],
+    add_entry: Callable[[int, Any, Any], None],
+) -> Any:
+    # Feeds every entry to add_entry(position, entry, bundle_so_far) and returns the bundle (buffered mode)
+    # or its head without entries (streaming mode).
+    if not should_stream(content_length):
+        bundle = await read_json_body(chunks)
+        entries = bundle.get("entry") if isinstance(bundle, dict) else None
+        for position, entry in enumerate(entries if isinstance(entries, list) else []):
+            add_entry(position, entry, bundle)
+        return bundle
+    reader = StreamingBundleReader(chunks)
+    async for position, entry in reader.entries():
+        add_entry(position, entry, reader.head)
+    return reader.head
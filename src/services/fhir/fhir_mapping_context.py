@@ -0,0 +1,78 @@
+import json
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.services.fhir import fhir_constants as fhir_const
+from src.config import settings
+
+# Fixed namespace so the same organisation gets the same id in every run and on every node.
+ORGANIZATION_NAMESPACE = uuid.UUID("6f1c2f0e-5b7a-5d1e-9a53-3f8e0c2b7d41")
+
+
+def content_id(key: Tuple[Hashable, ...]) -> str:
+    return str(uuid.uuid5(ORGANIZATION_NAMESPACE, json.dumps(key, separators=(",", ":"), default=str)))
+
+
+class FHIRMappingContext:
+
+    # Shared across the bundles of one batch: identical organisations are built once and keep a stable id.
+    # Cached resources are shared between bundles, so callers must treat generated bundles as read-only.
+
+    def __init__(self, shared_organizations: bool = False, max_entries: Optional[int] = None):
+        self.shared_organizations = shared_organizations
+        self.max_entries = max_entries
+        self._resources: Dict[Tuple[str, Tuple[Hashable, ...]], Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def intern(self, builder_kind: str, key: Tuple[Hashable, ...], build: Callable[[str], Any]) -> Tuple[str, Any]:
+        cache_key = (builder_kind, key)
+        with self._lock:
+            cached = self._resources.get(cache_key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        resource_id = content_id(key)
+        built = (resource_id, build(resource_id))
+        with self._lock:
+            self.misses += 1
+            if self.max_entries and len(self._resources) >= self.max_entries:
+                self._resources.clear()
+            return self._resources.setdefault(cache_key, built)
+
+    def organizations(self) -> List[Any]:
+        with self._lock:
+            return [resource for _, resource in self._resources.values()]
+
+    def shared_organizations_bundle(self) -> Dict[str, Any]:
+        entries = []
+        seen = set()
+        for resource in self.organizations():
+            resource_dict = resource if isinstance(resource, dict) else resource.model_dump(mode="json", exclude_none=True)
+            if resource_dict["id"] in seen:
+                continue
+            seen.add(resource_dict["id"])
+            entries.append({"fullUrl": f"urn:uuid:{resource_dict['id']}", "resource": resource_dict})
+        bundle_id = str(uuid.uuid4())
+        return {
+            "resourceType": fhir_const.BUNDLE,
+            "id": bundle_id,
+            "identifier": {"system": fhir_const.SYS_IDENTIFIER, "value": bundle_id},
+            "type": fhir_const.BUNDLE_TYPE_COLLECTION,
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "entry": entries,
+        }
+
+
+_default_context: Optional[FHIRMappingContext] = None
+
+
+def get_default_mapping_context() -> FHIRMappingContext:
+    # One context per process, used by long-lived workers such as the bulk mapping pool.
+    global _default_context
+    if _default_context is None:
+        _default_context = FHIRMappingContext(max_entries=settings.fhir.mapping_context_max_entries)
+    return _default_context
@@ -0,0 +1,416 @@
+import copy
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fhir.resources.bundle import Bundle
+from fhir.resources.period import Period
+from pydantic import ValidationError
+
+from src.services.fhir import fhir_constants as fhir_const
+from src.services.fhir.fhir_mapping_context import FHIRMappingContext
+from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
+from src.services.terminology.terminology_service import get_terminology_service
+from src.config import settings
+from src import constants, serialization
+
+logger = logging.getLogger(__name__)
+
+_NULL_FLAVOR_SYSTEM = "http://terminology.hl7.org/CodeSystem/v3-NullFlavor"
+_IDENTIFIER_TYPE_SYSTEM = "http://terminology.hl7.org/CodeSystem/v2-0203"
+_ORGANIZATION_TYPE_SYSTEM = "http://terminology.hl7.org/CodeSystem/organization-type"
+_APPLICABILITY_SYSTEM = "http://terminology.hl7.org/CodeSystem/applicability"
+
+
+def _coding(code: Optional[str] = None, display: Optional[str] = None, system: Optional[str] = None) -> Dict[str, Any]:
+    coding: Dict[str, Any] = {}
+    if system:
+        coding["system"] = system
+    if code:
+        coding["code"] = code
+    if display:
+        coding["display"] = display
+    return coding
+
+
+def _concept(
+    code: Optional[str] = None,
+    display: Optional[str] = None,
+    system: Optional[str] = None,
+    text: Optional[str] = None,
+) -> Dict[str, Any]:
+    concept: Dict[str, Any] = {}
+    if code or system:
+        c_code = code or "UNK"
+        c_display = "unknown" if c_code == "UNK" else display
+        concept["coding"] = [_coding(code=c_code, display=c_display, system=system or _NULL_FLAVOR_SYSTEM)]
+    actual_text = text or display
+    if actual_text:
+        concept["text"] = actual_text
+    return concept
+
+
+def _narrative(text_summary: str, status: str = "generated") -> Dict[str, str]:
+    safe = text_summary.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    div = f'<div xmlns="http://www.w3.org/1999/xhtml" lang="en" xml:lang="en"><p>{safe}</p></div>'
+    return {"status": status, "div": div}
+
+
+def _provider_number_identifier(system: str, value: str) -> Dict[str, Any]:
+    return {
+        "use": fhir_const.IDENTIFIER_USE_OFFICIAL,
+        "type": _concept(code="PRN", display="Provider number", system=_IDENTIFIER_TYPE_SYSTEM),
+        "system": system,
+        "value": value,
+    }
+
+
+def _quantity(value: float, unit: Optional[str]) -> Dict[str, Any]:
+    quantity: Dict[str, Any] = {"value": value}
+    if unit:
+        quantity["unit"] = unit
+    return quantity
+
+
+def _as_model_input(bundle: Dict[str, Any]) -> Dict[str, Any]:
+    # fhir.resources models ExtendedContactDetail.name as a list; the emitted bundle uses the R4 object form.
+    model_input = copy.deepcopy(bundle)
+    for entry in model_input.get("entry", []):
+        for contact in entry["resource"].get("contact", []):
+            if isinstance(contact.get("name"), dict):
+                contact["name"] = [contact["name"]]
+    return model_input
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class InsurancePlanFHIRDictBuilder(InsurancePlanFHIRMapper):
+
+    # Same output as InsurancePlanFHIRMapper, emitted as plain dicts in fhir.resources' field order.
+    # Nothing is validated per object; strict mode validates the finished bundle once instead.
+
+    def __init__(
+        self,
+        extracted_data: Dict[str, Any],
+        strict: Optional[bool] = None,
+        context: Optional[FHIRMappingContext] = None,
+    ):
+        self.data: Dict[str, Any] = extracted_data or {}
+        self.context = context
+        self._organization_ids: Set[str] = set()
+        self.strict = settings.fhir.strict_validation if strict is None else strict
+        self.terminology = get_terminology_service()
+        self._concepts: Dict[Tuple[Optional[str], Optional[str]], Tuple[Optional[str], Optional[str]]] = {}
+        bundle_uuid = str(uuid.uuid4())
+        self.bundle_dict: Dict[str, Any] = {
+            "resourceType": fhir_const.BUNDLE,
+            "id": bundle_uuid,
+            "meta": {"versionId": "1", "profile": [fhir_const.META_PROFILE_INSURANCE_PLAN_BUNDLE]},
+            "language": fhir_const.LANGUAGE_EN_IN,
+            "identifier": {"system": fhir_const.SYS_IDENTIFIER, "value": bundle_uuid},
+            "type": fhir_const.BUNDLE_TYPE_COLLECTION,
+            "timestamp": _timestamp(),
+            "entry": [],
+        }
+
+    def _add_to_bundle(self, resource: Dict[str, Any]) -> None:
+        self.bundle_dict["entry"].append({"fullUrl": f"urn:uuid:{resource['id']}", "resource": resource})
+
+    def _build_organization(self, org_data: Optional[Dict[str, Any]], is_tpa: bool = False) -> Optional[str]:
+        if not org_data:
+            return None
+        org_id, org = self._interned(
+            self._organization_key(org_data, is_tpa),
+            lambda resource_id: self._new_organization(resource_id, org_data, is_tpa),
+        )
+        self._add_organization(org_id, org)
+        return f"urn:uuid:{org_id}"
+
+    def _new_organization(self, org_id: str, org_data: Dict[str, Any], is_tpa: bool) -> Dict[str, Any]:
+        org_name = self._require(org_data, "name", "organisation")
+        identifier_value = self._get(org_data, "identifier")
+        id_system = fhir_const.SYS_IRDAI_IDENTIFIER if is_tpa else fhir_const.SYS_INSURER_IDENTIFIER
+        org: Dict[str, Any] = {
+            "resourceType": fhir_const.ORGANIZATION,
+            "id": org_id,
+            "meta": {"profile": [fhir_const.META_PROFILE_ORGANIZATION]},
+            "text": _narrative(f"Organisation: {org_name}"),
+            "identifier": [_provider_number_identifier(
+                id_system, str(identifier_value).strip() if identifier_value else org_name
+            )],
+            "name": org_name,
+        }
+
+        telecom: List[Dict[str, str]] = []
+        for key, system in (
+            ("phone", fhir_const.TELECOM_SYSTEM_PHONE),
+            ("email", fhir_const.TELECOM_SYSTEM_EMAIL),
+            ("website", fhir_const.TELECOM_SYSTEM_URL),
+        ):
+            value = self._get(org_data, key)
+            if value:
+                telecom.append({"system": system, "value": str(value).strip()})
+        if telecom:
+            org["contact"] = [{"telecom": telecom}]
+        return org
+
+    def _build_networks(self, networks_data: List[str]) -> List[Dict[str, str]]:
+        refs: List[Dict[str, str]] = []
+        for network_name in (networks_data or []):
+            if not network_name or not str(network_name).strip():
+                continue
+            network_name_str = str(network_name).strip()
+            net_id, network_org = self._interned(
+                (constants.FHIR_ORG_CONTEXT_NETWORK, network_name_str),
+                lambda resource_id: self._new_network(resource_id, network_name_str),
+            )
+            self._add_organization(net_id, network_org)
+            refs.append({"reference": f"urn:uuid:{net_id}", "display": network_name_str})
+        return refs
+
+    def _new_network(self, net_id: str, network_name_str: str) -> Dict[str, Any]:
+        return {
+            "resourceType": fhir_const.ORGANIZATION,
+            "id": net_id,
+            "meta": {"profile": [fhir_const.META_PROFILE_ORGANIZATION]},
+            "text": _narrative(f"Network: {network_name_str}"),
+            "identifier": [_provider_number_identifier(fhir_const.SYS_IDENTIFIER, network_name_str)],
+            "type": [_concept(code="prov", display="Healthcare Provider", system=_ORGANIZATION_TYPE_SYSTEM)],
+            "name": network_name_str,
+        }
+
+    def _build_contacts(self, contacts_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        contacts: List[Dict[str, Any]] = []
+        for cd in (contacts_data or []):
+            contact: Dict[str, Any] = {}
+            purpose_text = self._get(cd, "purpose")
+            if purpose_text:
+                contact["purpose"] = _concept(
+                    code="PATINF", display="Patient", system=fhir_const.CONTACT_PURPOSE_SYSTEM, text=purpose_text,
+                )
+            contact_name = self._get(cd, "name")
+            if contact_name:
+                contact["name"] = {"text": str(contact_name)}
+            telecom: List[Dict[str, str]] = []
+            phone = self._get(cd, "phone")
+            if phone:
+                telecom.append({"system": fhir_const.TELECOM_SYSTEM_PHONE, "value": str(phone)})
+            email = self._get(cd, "email")
+            if email:
+                telecom.append({"system": fhir_const.TELECOM_SYSTEM_EMAIL, "value": str(email)})
+            if telecom:
+                contact["telecom"] = telecom
+            if contact:
+                contacts.append(contact)
+        return contacts
+
+    def _build_coverage_areas(self, areas_data: List[str]) -> List[Dict[str, str]]:
+        return [{"display": area} for area in (areas_data or []) if area]
+
+    def _snomed_concept(self, raw_code: Any, display_text: Any) -> Dict[str, Any]:
+        final_code, final_display = self._lookup_snomed_concept(raw_code, display_text)
+        system = fhir_const.SYS_SNOMED if (final_code and str(final_code).isdigit()) else None
+        return _concept(code=final_code, display=final_display, system=system)
+
+    def _build_benefit_block(self, ben_data: Dict[str, Any]) -> Dict[str, Any]:
+        benefit: Dict[str, Any] = {
+            "type": self._snomed_concept(self._get(ben_data, "typeCode"), self._get(ben_data, "typeDisplay"))
+        }
+        limit_value = self._get(ben_data, "limitValue")
+        if limit_value is not None:
+            limit_unit = self._get(ben_data, "limitUnit")
+            benefit["limit"] = [{
+                "value": _quantity(self._parse_float(limit_value), limit_unit),
+                "code": _concept(text=f"{limit_value} {limit_unit or ''}".strip()),
+            }]
+        return benefit
+
+    def _build_coverages(self, coverages_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        coverages: List[Dict[str, Any]] = []
+        for cov_data in (coverages_data or []):
+            benefits = [
+                self._build_benefit_block(ben) for ben in (cov_data.get("benefits") or []) if self._has_benefit_type(ben)
+            ]
+            if not benefits:
+                continue
+            coverages.append({
+                "type": _concept(text=self._get(cov_data, "typeDisplay") or "Coverage"),
+                "benefit": benefits,
+            })
+        return coverages
+
+    def _build_specific_cost_block(self, cost_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            cost_value_raw = self._require(cost_data, "costValue", "specificCost.cost")
+            cost_type_code = self._require(cost_data, "costType", "specificCost.cost")
+            cost_unit = self._require(cost_data, "costUnit", "specificCost.cost")
+
+            applicability_map = {
+                "copay": fhir_const.APPLICABILITY_IN_NETWORK,
+                "deductible": fhir_const.APPLICABILITY_IN_NETWORK,
+                "fullcoverage": fhir_const.APPLICABILITY_IN_NETWORK,
+                "out-of-network": fhir_const.APPLICABILITY_OUT_OF_NETWORK,
+            }
+            applicability_code = applicability_map.get(str(cost_type_code).lower(), fhir_const.APPLICABILITY_OTHER)
+            benefit_cost = {
+                "type": _concept(text=str(cost_type_code).capitalize()),
+                "applicability": _concept(
+                    code=applicability_code,
+                    display=str(applicability_code).replace("-", " ").title() if applicability_code else "Other",
+                    system=_APPLICABILITY_SYSTEM,
+                ),
+                "value": _quantity(self._parse_float(cost_value_raw), cost_unit),
+            }
+            benefit = {
+                "type": self._snomed_concept(
+                    self._require(cost_data, "benefitTypeCode", "specificCost.benefit"),
+                    self._get(cost_data, "benefitTypeDisplay"),
+                ),
+                "cost": [benefit_cost],
+            }
+            category = self._snomed_concept(
+                self._require(cost_data, "categoryCode", "specificCost"), self._get(cost_data, "categoryDisplay")
+            )
+            return {"category": category, "benefit": [benefit]}
+
+        except (ValueError, TypeError) as e:
+            logger.warning(constants.LOG_FHIR_SKIP_COST_BLOCK, e)
+            return None
+
+    def _build_financial_plans(self, plans_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        plans: List[Dict[str, Any]] = []
+        for plan_data in (plans_data or []):
+            plan: Dict[str, Any] = {
+                "identifier": [{
+                    "use": fhir_const.IDENTIFIER_USE_OFFICIAL,
+                    "system": fhir_const.SYS_IDENTIFIER,
+                    "value": f"urn:uuid:{uuid.uuid4()}",
+                }],
+                "type": _concept(
+                    code=self._get(plan_data, "planTypeCode"),
+                    display=self._get(plan_data, "planTypeDisplay"),
+                    system=fhir_const.VS_PLAN_TYPE,
+                ),
+            }
+            specific_costs = [
+                cost_block
+                for cost_data in (plan_data.get("specificCosts") or [])
+                if (cost_block := self._build_specific_cost_block(cost_data)) is not None
+            ]
+            if specific_costs:
+                plan["specificCost"] = specific_costs
+            plans.append(plan)
+        return plans
+
+    def _build_period(self, plan_data: Dict[str, Any]) -> Dict[str, str]:
+        # The only free-text field with a FHIR format constraint; checked so bad dates skip the plan as before.
+        period_start = self._get(plan_data, "periodStart") or "2020-01-01"
+        period_end = self._get(plan_data, "periodEnd")
+        Period(start=period_start, end=period_end)
+        period = {"start": str(period_start)}
+        if period_end:
+            period["end"] = str(period_end)
+        return period
+
+    def _build_insurance_plan(
+        self,
+        plan_data: Optional[Dict[str, Any]],
+        owned_by_ref: str,
+        admin_by_ref: Optional[str] = None,
+        network_refs: Optional[List[Dict[str, str]]] = None,
+    ) -> None:
+        if not plan_data:
+            return
+        try:
+            plan_id = str(uuid.uuid4())
+            plan_name = self._require(plan_data, "name", "insurancePlan")
+            insurance_plan: Dict[str, Any] = {
+                "resourceType": fhir_const.INSURANCE_PLAN,
+                "id": plan_id,
+                "meta": {"profile": [fhir_const.META_PROFILE_INSURANCE_PLAN]},
+                "language": "en",
+                "text": _narrative(f"Insurance Plan: {plan_name}. Status: {plan_data.get('status', 'active')}."),
+                "identifier": [{
+                    "use": fhir_const.IDENTIFIER_USE_OFFICIAL,
+                    "system": fhir_const.SYS_IDENTIFIER,
+                    "value": f"urn:uuid:{uuid.uuid4()}",
+                }],
+                "status": self._get(plan_data, "status", "active"),
+                "type": [_concept(
+                    code=self._require(plan_data, "typeCode", "insurancePlan.type"),
+                    display=self._get(plan_data, "typeDisplay"),
+                    system=fhir_const.VS_INSURANCE_PLAN_TYPE,
+                )],
+                "name": plan_name,
+                "alias": [a for a in (plan_data.get("alias") or []) if a],
+                "period": self._build_period(plan_data),
+                "ownedBy": {"reference": owned_by_ref},
+            }
+            if admin_by_ref:
+                insurance_plan["administeredBy"] = {"reference": admin_by_ref}
+
+            coverage_areas = self._build_coverage_areas(plan_data.get("coverageArea") or [])
+            if coverage_areas:
+                insurance_plan["coverageArea"] = coverage_areas
+            contacts = self._build_contacts(plan_data.get("contacts") or [])
+            if contacts:
+                insurance_plan["contact"] = contacts
+            if network_refs:
+                insurance_plan["network"] = network_refs
+            coverages = self._build_coverages(plan_data.get("coverages") or [])
+            if coverages:
+                insurance_plan["coverage"] = coverages
+            plans = self._build_financial_plans(plan_data.get("plans") or [])
+            if plans:
+                insurance_plan["plan"] = plans
+
+            self._add_to_bundle(insurance_plan)
+
+        except ValidationError as e:
+            logger.error(constants.LOG_FHIR_SKIP_INSURANCE_PLAN, e)
+
+    def generate_dict(self) -> Dict[str, Any]:
+        org_data = self.data.get("organisation") or self.data.get("organization") or {}
+        owned_by_ref = self._build_organization(org_data)
+        admin_by_ref = self._build_organization(self.data.get("tpaOrganisation"), is_tpa=True)
+
+        plan_data = self.data.get("insurancePlan") or {}
+        self._prefetch_concepts(plan_data)
+        network_refs = self._build_networks(plan_data.get("networks") or [])
+
+        if owned_by_ref:
+            self._build_insurance_plan(plan_data, owned_by_ref, admin_by_ref, network_refs)
+        else:
+            logger.error(constants.LOG_FHIR_OWNED_BY_NONE)
+
+        entries = self.bundle_dict["entry"]
+        # Ensure InsurancePlan is the first entry
+        entries.sort(key=lambda e: 0 if e["resource"]["resourceType"] == fhir_const.INSURANCE_PLAN else 1)
+
+        if self.strict:
+            try:
+                Bundle.model_validate(_as_model_input(self.bundle_dict))
+            except ValidationError as e:
+                logger.warning(constants.LOG_FHIR_DICT_BUILDER_INVALID.format(error=e))
+                return InsurancePlanFHIRMapper(self.data, context=self.context).generate_dict()
+        return self.bundle_dict
+
+    def generate_json(self) -> bytes:
+        return serialization.dumps(self.generate_dict())
+
+
+def _bundle_builder(extracted_data: Dict[str, Any], context: Optional[FHIRMappingContext]) -> InsurancePlanFHIRMapper:
+    if settings.fhir.builder == constants.FHIR_BUILDER_DICT:
+        return InsurancePlanFHIRDictBuilder(extracted_data, context=context)
+    return InsurancePlanFHIRMapper(extracted_data, context=context)
+
+
+def build_fhir_bundle(extracted_data: Dict[str, Any], context: Optional[FHIRMappingContext] = None) -> Dict[str, Any]:
+    return _bundle_builder(extracted_data, context).generate_dict()
+
+
+def build_fhir_bundle_json(extracted_data: Dict[str, Any], context: Optional[FHIRMappingContext] = None) -> bytes:
+    return _bundle_builder(extracted_data, context).generate_json()
@@ -1,7 +1,7 @@
 import uuid
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
 
 from fhir.resources.bundle import Bundle, BundleEntry
 from fhir.resources.codeableconcept import CodeableConcept
@@ -32,24 +32,12 @@ from fhir.resources.organization import Organization
 from pydantic import ValidationError
 
 from src.services.fhir import fhir_constants as fhir_const
-from src import constants
-import os
-import json
+from src.services.fhir.fhir_mapping_context import FHIRMappingContext
+from src.services.terminology.terminology_service import get_terminology_service
+from src import constants, serialization
 
 logger = logging.getLogger(__name__)
 
-from src.config import ROOT_DIR
-
-SNOMED_DICT_PATH = os.path.join(ROOT_DIR, "src", "core", "snomed_dictionary.json")
-SNOMED_DICT = {}
-TERM_TO_CODE = {}
-try:
-    with open(SNOMED_DICT_PATH, "r") as f:
-        SNOMED_DICT = json.load(f)
-        TERM_TO_CODE = SNOMED_DICT.get("termToCodeMapping", {})
-except FileNotFoundError:
-    logger.warning(constants.LOG_FHIR_SNOMED_NOT_FOUND)
-
 
 def _make_coding(
     code: Optional[str] = None,
@@ -97,8 +85,12 @@ def _make_narrative(text_summary: str, status: str = "generated") -> Narrative:
 
 class InsurancePlanFHIRMapper:
 
-    def __init__(self, extracted_data: Dict[str, Any]):
+    def __init__(self, extracted_data: Dict[str, Any], context: Optional[FHIRMappingContext] = None):
         self.data: Dict[str, Any] = extracted_data or {}
+        self.context = context
+        self._organization_ids: Set[str] = set()
+        self.terminology = get_terminology_service()
+        self._concepts: Dict[Tuple[Optional[str], Optional[str]], Tuple[Optional[str], Optional[str]]] = {}
         bundle_uuid = str(uuid.uuid4())
         self.bundle = Bundle(
             id=bundle_uuid,
@@ -145,24 +137,46 @@ class InsurancePlanFHIRMapper:
             logger.warning(constants.LOG_FHIR_FLOAT_PARSE_FAILED.format(value=value, default=default))
             return default
 
-    def _lookup_snomed_concept(self, provided_code: Optional[str], display_text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
-        s_code = str(provided_code).strip() if provided_code else ""
-        s_display = str(display_text).strip().lower() if display_text else ""
-        
-        if s_code:
-            official_display = SNOMED_DICT.get("benefitType", {}).get(s_code)
-            if official_display:
-                return s_code, official_display
-
-        if s_display and s_display in TERM_TO_CODE:
-            mapped_code = TERM_TO_CODE[s_display]
-            official_display = SNOMED_DICT.get("benefitType", {}).get(mapped_code)
-            if official_display:
-                return mapped_code, official_display
-            return mapped_code, display_text
-            
+    def _concept_pairs(self, plan_data: Dict[str, Any]) -> List[Tuple[Optional[str], Optional[str]]]:
+        pairs = []
+        for cov_data in plan_data.get("coverages") or []:
+            for ben in cov_data.get("benefits") or []:
+                pairs.append((self._get(ben, "typeCode"), self._get(ben, "typeDisplay")))
+        for fin_data in plan_data.get("plans") or []:
+            for cost_data in fin_data.get("specificCosts") or []:
+                pairs.append((self._get(cost_data, "benefitTypeCode", "UNK"), self._get(cost_data, "benefitTypeDisplay")))
+                pairs.append((self._get(cost_data, "categoryCode", "UNK"), self._get(cost_data, "categoryDisplay")))
+        return pairs
+
+    def _prefetch_concepts(self, plan_data: Dict[str, Any]) -> None:
+        # One batch lookup for every benefit and category of the plan; the builders then read from it.
+        self._concepts.update(self.terminology.lookup_many(self._concept_pairs(plan_data)))
 
-        return provided_code, display_text
+    def _lookup_snomed_concept(self, provided_code: Optional[str], display_text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        concept = self._concepts.get((provided_code, display_text))
+        if concept is None:
+            concept = self.terminology.lookup(provided_code, display_text)
+        return concept
+
+    def _interned(self, key: Tuple[Hashable, ...], build: Callable[[str], Any]) -> Tuple[str, Any]:
+        if self.context is None:
+            resource_id = str(uuid.uuid4())
+            return resource_id, build(resource_id)
+        return self.context.intern(type(self).__name__, key, build)
+
+    def _add_organization(self, resource_id: str, resource: Any) -> None:
+        # Interned organisations go into each bundle once, or nowhere when a shared-organisations bundle holds them.
+        if resource_id in self._organization_ids:
+            return
+        self._organization_ids.add(resource_id)
+        if self.context is None or not self.context.shared_organizations:
+            self._add_to_bundle(resource)
+
+    def _organization_key(self, org_data: Dict[str, Any], is_tpa: bool) -> Tuple[Hashable, ...]:
+        values = (self._get(org_data, key) for key in ("name", "identifier", "phone", "email", "website"))
+        return (constants.FHIR_ORG_CONTEXT_TPA if is_tpa else constants.FHIR_ORG_CONTEXT_INSURER,) + tuple(
+            str(value).strip() if value is not None else None for value in values
+        )
 
     def _build_organization(
         self,
@@ -172,52 +186,11 @@ class InsurancePlanFHIRMapper:
         if not org_data:
             return None
         try:
-            org_id = str(uuid.uuid4())
-            org_name = self._require(org_data, "name", "organisation")
-            org = Organization(
-                id=org_id,
-                meta=Meta(profile=[fhir_const.META_PROFILE_ORGANIZATION]),
-                text=_make_narrative(f"Organisation: {org_name}"),
-                name=org_name,
+            org_id, org = self._interned(
+                self._organization_key(org_data, is_tpa),
+                lambda resource_id: self._new_organization(resource_id, org_data, is_tpa),
             )
-
-            identifier_value = self._get(org_data, "identifier")
-            id_system = fhir_const.SYS_IRDAI_IDENTIFIER if is_tpa else fhir_const.SYS_INSURER_IDENTIFIER
-            identifiers = []
-            if identifier_value:
-                identifiers.append(
-                    Identifier(
-                        type=_make_concept(code="PRN", display="Provider number", system="http://terminology.hl7.org/CodeSystem/v2-0203"),
-                        use=fhir_const.IDENTIFIER_USE_OFFICIAL,
-                        system=id_system,
-                        value=str(identifier_value).strip(),
-                    )
-                )
-            else:
-                identifiers.append(
-                    Identifier(
-                        type=_make_concept(code="PRN", display="Provider number", system="http://terminology.hl7.org/CodeSystem/v2-0203"),
-                        use=fhir_const.IDENTIFIER_USE_OFFICIAL,
-                        system=id_system,
-                        value=org_name,
-                    )
-                )
-            org.identifier = identifiers
-
-            telecom_entries: List[ContactPoint] = []
-            phone = self._get(org_data, "phone")
-            if phone:
-                telecom_entries.append(ContactPoint(system=fhir_const.TELECOM_SYSTEM_PHONE, value=str(phone).strip()))
-            email = self._get(org_data, "email")
-            if email:
-                telecom_entries.append(ContactPoint(system=fhir_const.TELECOM_SYSTEM_EMAIL, value=str(email).strip()))
-            website = self._get(org_data, "website")
-            if website:
-                telecom_entries.append(ContactPoint(system=fhir_const.TELECOM_SYSTEM_URL, value=str(website).strip()))
-            if telecom_entries:
-                org.contact = [ExtendedContactDetail(telecom=telecom_entries)]
-
-            self._add_to_bundle(org)
+            self._add_organization(org_id, org)
             return f"urn:uuid:{org_id}"
 
         except ValidationError as e:
@@ -225,36 +198,87 @@ class InsurancePlanFHIRMapper:
             logger.error(constants.LOG_FHIR_SKIP_ORG_VALIDATION, ctx, e)
             return None
 
+    def _new_organization(self, org_id: str, org_data: Dict[str, Any], is_tpa: bool) -> Organization:
+        org_name = self._require(org_data, "name", "organisation")
+        org = Organization(
+            id=org_id,
+            meta=Meta(profile=[fhir_const.META_PROFILE_ORGANIZATION]),
+            text=_make_narrative(f"Organisation: {org_name}"),
+            name=org_name,
+        )
+
+        identifier_value = self._get(org_data, "identifier")
+        id_system = fhir_const.SYS_IRDAI_IDENTIFIER if is_tpa else fhir_const.SYS_INSURER_IDENTIFIER
+        identifiers = []
+        if identifier_value:
+            identifiers.append(
+                Identifier(
+                    type=_make_concept(code="PRN", display="Provider number", system="http://terminology.hl7.org/CodeSystem/v2-0203"),
+                    use=fhir_const.IDENTIFIER_USE_OFFICIAL,
+                    system=id_system,
+                    value=str(identifier_value).strip(),
+                )
+            )
+        else:
+            identifiers.append(
+                Identifier(
+                    type=_make_concept(code="PRN", display="Provider number", system="http://terminology.hl7.org/CodeSystem/v2-0203"),
+                    use=fhir_const.IDENTIFIER_USE_OFFICIAL,
+                    system=id_system,
+                    value=org_name,
+                )
+            )
+        org.identifier = identifiers
+
+        telecom_entries: List[ContactPoint] = []
+        phone = self._get(org_data, "phone")
+        if phone:
+            telecom_entries.append(ContactPoint(system=fhir_const.TELECOM_SYSTEM_PHONE, value=str(phone).strip()))
+        email = self._get(org_data, "email")
+        if email:
+            telecom_entries.append(ContactPoint(system=fhir_const.TELECOM_SYSTEM_EMAIL, value=str(email).strip()))
+        website = self._get(org_data, "website")
+        if website:
+            telecom_entries.append(ContactPoint(system=fhir_const.TELECOM_SYSTEM_URL, value=str(website).strip()))
+        if telecom_entries:
+            org.contact = [ExtendedContactDetail(telecom=telecom_entries)]
+        return org
+
     def _build_networks(self, networks_data: List[str]) -> List[Reference]:
         refs: List[Reference] = []
         for network_name in (networks_data or []):
             if not network_name or not str(network_name).strip():
                 continue
-            net_id = str(uuid.uuid4())
             network_name_str = str(network_name).strip()
-            network_org = Organization(
-                id=net_id,
-                meta=Meta(profile=[fhir_const.META_PROFILE_ORGANIZATION]),
-                text=_make_narrative(f"Network: {network_name_str}"),
-                name=network_name_str,
-                type=[_make_concept(
-                    code="prov",
-                    display="Healthcare Provider",
-                    system="http://terminology.hl7.org/CodeSystem/organization-type",
-                )],
-                identifier=[
-                    Identifier(
-                        type=_make_concept(code="PRN", display="Provider number", system="http://terminology.hl7.org/CodeSystem/v2-0203"),
-                        use=fhir_const.IDENTIFIER_USE_OFFICIAL,
-                        system=fhir_const.SYS_IDENTIFIER,
-                        value=network_name_str,
-                    )
-                ],
+            net_id, network_org = self._interned(
+                (constants.FHIR_ORG_CONTEXT_NETWORK, network_name_str),
+                lambda resource_id: self._new_network(resource_id, network_name_str),
             )
-            self._add_to_bundle(network_org)
+            self._add_organization(net_id, network_org)
             refs.append(Reference(reference=f"urn:uuid:{net_id}", display=str(network_name).strip()))
         return refs
 
+    def _new_network(self, net_id: str, network_name_str: str) -> Organization:
+        return Organization(
+            id=net_id,
+            meta=Meta(profile=[fhir_const.META_PROFILE_ORGANIZATION]),
+            text=_make_narrative(f"Network: {network_name_str}"),
+            name=network_name_str,
+            type=[_make_concept(
+                code="prov",
+                display="Healthcare Provider",
+                system="http://terminology.hl7.org/CodeSystem/organization-type",
+            )],
+            identifier=[
+                Identifier(
+                    type=_make_concept(code="PRN", display="Provider number", system="http://terminology.hl7.org/CodeSystem/v2-0203"),
+                    use=fhir_const.IDENTIFIER_USE_OFFICIAL,
+                    system=fhir_const.SYS_IDENTIFIER,
+                    value=network_name_str,
+                )
+            ],
+        )
+
     def _build_complex_extension(self, url: str, sub_extensions: List[Extension]) -> Extension:
         return Extension(url=url, extension=sub_extensions)
 
@@ -293,6 +317,13 @@ class InsurancePlanFHIRMapper:
         extensions: List[Extension] = []
         return extensions
 
+    def _has_benefit_type(self, ben_data: Dict[str, Any]) -> bool:
+        # benefit.type is 1..1 in the profile; a benefit with neither a code nor a display is dropped.
+        if self._get(ben_data, "typeCode") is None and self._get(ben_data, "typeDisplay") is None:
+            logger.warning(constants.LOG_FHIR_SKIP_EMPTY_BENEFIT)
+            return False
+        return True
+
     def _build_benefit_block(self, ben_data: Dict[str, Any]) -> InsurancePlanCoverageBenefit:
         raw_code = self._get(ben_data, "typeCode")
         display_text = self._get(ben_data, "typeDisplay")
@@ -322,6 +353,7 @@ class InsurancePlanFHIRMapper:
             benefits = [
                 self._build_benefit_block(ben)
                 for ben in (cov_data.get("benefits") or [])
+                if self._has_benefit_type(ben)
             ]
             if not benefits:
                 continue
@@ -489,12 +521,13 @@ class InsurancePlanFHIRMapper:
         except ValidationError as e:
             logger.error(constants.LOG_FHIR_SKIP_INSURANCE_PLAN, e)
 
-    def generate_dict(self) -> Dict[str, Any]:
+    def _assemble_bundle(self) -> None:
         org_data = self.data.get("organisation") or self.data.get("organization") or {}
         owned_by_ref = self._build_organization(org_data)
         admin_by_ref = self._build_organization(self.data.get("tpaOrganisation"), is_tpa=True)
 
         plan_data = self.data.get("insurancePlan") or {}
+        self._prefetch_concepts(plan_data)
         network_refs = self._build_networks(plan_data.get("networks") or [])
 
         if owned_by_ref:
@@ -506,6 +539,14 @@ class InsurancePlanFHIRMapper:
             # Ensure InsurancePlan is the first entry
             self.bundle.entry.sort(key=lambda e: 0 if getattr(e.resource, "__resource_type__", None) == "InsurancePlan" else 1)
 
+    def _has_named_contacts(self) -> bool:
+        return any(
+            contact.name
+            for entry in self.bundle.entry or []
+            for contact in getattr(entry.resource, "contact", None) or []
+        )
+
+    def _to_r4_dict(self) -> Dict[str, Any]:
         out_dict = self.bundle.model_dump(mode="json", exclude_none=True)
         
         # Post-process for FHIR R4 validator compliance (ExtendedContactDetail.name in fhir.resources is array, R4 validator expects object)
@@ -517,3 +558,14 @@ class InsurancePlanFHIRMapper:
                         contact["name"] = contact["name"][0]
 
         return out_dict
+
+    def generate_dict(self) -> Dict[str, Any]:
+        self._assemble_bundle()
+        return self._to_r4_dict()
+
+    def generate_json(self) -> bytes:
+        self._assemble_bundle()
+        if self._has_named_contacts():
+            return serialization.dumps(self._to_r4_dict())
+        # Nothing to rewrite for R4, so serialize straight from the models without an intermediate dict.
+        return self.bundle.model_dump_json(exclude_none=True).encode("utf-8")
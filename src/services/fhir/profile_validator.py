@@ -0,0 +1,414 @@
+import json
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from src.services.fhir import bulk_fhir_generator
+from src.services.fhir.bundle_index import BundleIndex
+from src.config import ROOT_DIR, settings
+from src import constants, serialization
+
+logger = logging.getLogger(__name__)
+
+# (reference value, allowed target resource types, element id, location)
+PendingReference = Tuple[Any, FrozenSet[str], str, str]
+
+
+class ElementRule:
+    __slots__ = ("element_id", "min", "max", "fixed", "pattern", "value_set", "codes", "target_types")
+
+    def __init__(self, element_id: str, minimum: int, maximum: Optional[int]):
+        self.element_id = element_id
+        self.min = minimum
+        self.max = maximum
+        self.fixed: Any = None
+        self.pattern: Any = None
+        self.value_set: Optional[str] = None
+        self.codes: Optional[FrozenSet[str]] = None
+        self.target_types: Optional[FrozenSet[str]] = None
+
+    def is_trivial(self) -> bool:
+        return (
+            self.min == 0 and self.max is None and self.fixed is None and self.pattern is None
+            and self.codes is None and self.target_types is None
+        )
+
+
+class RuleNode:
+    __slots__ = ("rules", "children")
+
+    def __init__(self):
+        self.rules: List[ElementRule] = []
+        self.children: Dict[str, "RuleNode"] = {}
+
+
+class EntrySlice:
+    __slots__ = ("name", "min", "max", "resource_type", "profile")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.min = 0
+        self.max: Optional[int] = None
+        self.resource_type: Optional[str] = None
+        self.profile: Optional[str] = None
+
+
+class CompiledProfile:
+    __slots__ = ("url", "resource_type", "root", "slices", "rule_count")
+
+    def __init__(self, url: str, resource_type: str):
+        self.url = url
+        self.resource_type = resource_type
+        self.root = RuleNode()
+        self.slices: Dict[str, EntrySlice] = {}
+        self.rule_count = 0
+
+    def slice_for(self, resource_type: str) -> Optional[EntrySlice]:
+        for entry_slice in self.slices.values():
+            if entry_slice.resource_type == resource_type:
+                return entry_slice
+        return None
+
+
+def _canonical(url: str) -> str:
+    return url.split("|", 1)[0]
+
+
+def _parse_max(value: Optional[str]) -> Optional[int]:
+    if value in (None, "*"):
+        return None
+    return int(value)
+
+
+def _iter_resources(path: Path) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        resource = json.load(f)
+    if resource.get("resourceType") == "Bundle":
+        for entry in resource.get("entry") or []:
+            if entry.get("resource"):
+                yield entry["resource"]
+    else:
+        yield resource
+
+
+def _expansion_codes(contains: List[dict]) -> Iterator[str]:
+    for item in contains or []:
+        if item.get("code"):
+            yield item["code"]
+        yield from _expansion_codes(item.get("contains"))
+
+
+def _codesystem_codes(concepts: List[dict]) -> Iterator[str]:
+    for concept in concepts or []:
+        yield concept["code"]
+        yield from _codesystem_codes(concept.get("concept"))
+
+
+def compile_value_sets(value_sets: List[dict], code_systems: Dict[str, Set[str]]) -> Dict[str, FrozenSet[str]]:
+    compiled: Dict[str, FrozenSet[str]] = {}
+    for value_set in value_sets:
+        codes = set(_expansion_codes((value_set.get("expansion") or {}).get("contains")))
+        for include in (value_set.get("compose") or {}).get("include") or []:
+            if include.get("concept"):
+                codes.update(concept["code"] for concept in include["concept"])
+            elif include.get("system") in code_systems:
+                codes.update(code_systems[include["system"]])
+        compiled[_canonical(value_set["url"])] = frozenset(codes)
+    return compiled
+
+
+def _profile_resource_type(url: str, profile_types: Dict[str, str]) -> str:
+    return profile_types.get(_canonical(url)) or _canonical(url).rstrip("/").rsplit("/", 1)[-1]
+
+
+def compile_structure_definition(
+    structure_definition: dict,
+    value_sets: Dict[str, FrozenSet[str]],
+    profile_types: Dict[str, str],
+) -> CompiledProfile:
+    profile = CompiledProfile(_canonical(structure_definition["url"]), structure_definition["type"])
+    view = structure_definition.get("snapshot") or structure_definition.get("differential") or {}
+    for element in view.get("element") or []:
+        element_id = element.get("id") or element["path"]
+        segments = element_id.split(".")
+        if ":" in element_id:
+            _compile_entry_slice(profile, segments, element, profile_types)
+            continue
+        if len(segments) < 2:
+            continue
+        rule = ElementRule(element_id, element.get("min", 0), _parse_max(element.get("max")))
+        for key, value in element.items():
+            if key.startswith("fixed"):
+                rule.fixed = value
+            elif key.startswith("pattern"):
+                rule.pattern = value
+        binding = element.get("binding") or {}
+        if binding.get("strength") == "required" and binding.get("valueSet"):
+            rule.value_set = _canonical(binding["valueSet"])
+            rule.codes = value_sets.get(rule.value_set)
+            if rule.codes is None:
+                logger.debug(constants.LOG_FHIR_VALIDATION_VALUESET_MISSING.format(value_set=rule.value_set, element=element_id))
+        target_profiles = [p for t in element.get("type") or [] if t.get("code") == "Reference" for p in t.get("targetProfile") or []]
+        if target_profiles:
+            rule.target_types = frozenset(_profile_resource_type(p, profile_types) for p in target_profiles)
+        if rule.is_trivial():
+            continue
+        node = profile.root
+        for segment in segments[1:]:
+            node = node.children.setdefault(segment, RuleNode())
+        node.rules.append(rule)
+        profile.rule_count += 1
+    return profile
+
+
+def _compile_entry_slice(profile: CompiledProfile, segments: List[str], element: dict, profile_types: Dict[str, str]) -> None:
+    # Only Bundle.entry slices discriminated by resource type are understood; other slices are skipped.
+    if len(segments) < 2 or not segments[1].startswith("entry:"):
+        return
+    entry_slice = profile.slices.setdefault(segments[1].split(":", 1)[1], EntrySlice(segments[1].split(":", 1)[1]))
+    if len(segments) == 2:
+        entry_slice.min = element.get("min", 0)
+        entry_slice.max = _parse_max(element.get("max"))
+    elif segments[2:] == ["resource"]:
+        for element_type in element.get("type") or []:
+            entry_slice.resource_type = element_type.get("code")
+            profiles = element_type.get("profile") or []
+            entry_slice.profile = _canonical(profiles[0]) if profiles else None
+            if entry_slice.profile and entry_slice.profile not in profile_types:
+                profile_types[entry_slice.profile] = entry_slice.resource_type
+    profile.rule_count += 1
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == {} or value == []
+
+
+def _children(node: dict, segment: str) -> Tuple[List[Any], str, bool]:
+    key = segment
+    if segment.endswith("[x]"):
+        prefix = segment[:-3]
+        key = next((k for k in node if k.startswith(prefix) and k[len(prefix):][:1].isupper()), prefix)
+    value = node.get(key)
+    if isinstance(value, list):
+        return [item for item in value if not _is_empty(item)], key, True
+    return ([] if _is_empty(value) else [value]), key, False
+
+
+def _matches_pattern(value: Any, pattern: Any) -> bool:
+    if isinstance(pattern, dict):
+        return isinstance(value, dict) and all(_matches_pattern(value.get(k), p) for k, p in pattern.items())
+    if isinstance(pattern, list):
+        return isinstance(value, list) and all(any(_matches_pattern(v, p) for v in value) for p in pattern)
+    return value == pattern
+
+
+def _codes(value: Any) -> Set[str]:
+    if isinstance(value, str):
+        return {value}
+    if isinstance(value, dict):
+        if "coding" in value:
+            return {coding.get("code") for coding in value.get("coding") or [] if isinstance(coding, dict)}
+        if "code" in value:
+            return {value["code"]}
+    return set()
+
+
+def _issue(severity: str, field: str, location: str, message: str) -> Dict[str, str]:
+    return {"severity": severity, "field": field, "location": location, "message": message}
+
+
+def _error(field: str, location: str, message: str) -> Dict[str, str]:
+    return _issue(constants.VALIDATION_SEVERITY_ERROR, field, location, message)
+
+
+class ProfileValidator:
+
+    def __init__(self, profile_dirs: Optional[List[Path]] = None):
+        started = time.perf_counter()
+        directories = profile_dirs or [ROOT_DIR / d for d in settings.fhir.validation.profile_dirs]
+        structure_definitions, value_sets, code_systems = [], [], {}
+        for directory in directories:
+            for path in sorted(Path(directory).glob("*.json")):
+                for resource in _iter_resources(path):
+                    resource_type = resource.get("resourceType")
+                    if resource_type == "StructureDefinition":
+                        structure_definitions.append(resource)
+                    elif resource_type == "ValueSet":
+                        value_sets.append(resource)
+                    elif resource_type == "CodeSystem":
+                        code_systems[resource["url"]] = set(_codesystem_codes(resource.get("concept")))
+        compiled_value_sets = compile_value_sets(value_sets, code_systems)
+        profile_types = {_canonical(sd["url"]): sd["type"] for sd in structure_definitions}
+        self.profiles: Dict[str, CompiledProfile] = {}
+        self.by_type: Dict[str, CompiledProfile] = {}
+        for structure_definition in structure_definitions:
+            profile = compile_structure_definition(structure_definition, compiled_value_sets, profile_types)
+            self.profiles[profile.url] = profile
+            self.by_type.setdefault(profile.resource_type, profile)
+        logger.info(constants.LOG_FHIR_VALIDATION_COMPILED.format(
+            profiles=len(self.profiles), rules=sum(p.rule_count for p in self.profiles.values()),
+            value_sets=len(compiled_value_sets), seconds=time.perf_counter() - started,
+        ))
+
+    def _profile_for(self, resource: dict, hinted: Optional[str] = None) -> Optional[CompiledProfile]:
+        for url in (resource.get("meta") or {}).get("profile") or []:
+            if _canonical(url) in self.profiles:
+                return self.profiles[_canonical(url)]
+        if hinted in self.profiles:
+            return self.profiles[hinted]
+        return self.by_type.get(resource.get("resourceType"))
+
+    @staticmethod
+    def _check_count(rule: ElementRule, count: int, location: str, issues: list) -> None:
+        if count < rule.min:
+            issues.append(_error(rule.element_id, location, f"Minimum cardinality {rule.min} not met (found {count})"))
+        if rule.max is not None and count > rule.max:
+            issues.append(_error(rule.element_id, location, f"Maximum cardinality {rule.max} exceeded (found {count})"))
+
+    def _apply(self, rule: ElementRule, values: List[Any], is_list: bool, location: str, issues: list, references: list) -> None:
+        self._check_count(rule, len(values), location, issues)
+        for index, value in enumerate(values):
+            value_location = f"{location}[{index}]" if is_list else location
+            if rule.fixed is not None and value != rule.fixed:
+                issues.append(_error(rule.element_id, value_location, f"Value must be {rule.fixed!r}"))
+            if rule.pattern is not None and not _matches_pattern(value, rule.pattern):
+                issues.append(_error(rule.element_id, value_location, "Value does not match the required pattern"))
+            if rule.codes is not None and not _codes(value) & rule.codes:
+                issues.append(_error(rule.element_id, value_location, f"Code is not in required value set {rule.value_set}"))
+            if rule.target_types is not None and isinstance(value, dict):
+                references.append((value.get("reference"), rule.target_types, rule.element_id, value_location))
+
+    def _check_node(self, data: dict, node: RuleNode, location: str, issues: list, references: list, exclude: Tuple[str, ...] = ()) -> None:
+        for segment, child in node.children.items():
+            if segment in exclude:
+                continue
+            values, key, is_list = _children(data, segment)
+            child_location = f"{location}.{key}"
+            for rule in child.rules:
+                self._apply(rule, values, is_list, child_location, issues, references)
+            if not child.children:
+                continue
+            for index, value in enumerate(values):
+                if isinstance(value, dict):
+                    self._check_node(value, child, f"{child_location}[{index}]" if is_list else child_location, issues, references)
+
+    def start(self) -> "BundleValidation":
+        return BundleValidation(self)
+
+    def validate(self, bundle: Any) -> Dict[str, Any]:
+        run = self.start()
+        if isinstance(bundle, dict) and isinstance(bundle.get("entry"), list):
+            for position, entry in enumerate(bundle["entry"]):
+                run.add_entry(position, entry, bundle)
+        return run.finish(bundle)
+
+    @staticmethod
+    def _result(issues: List[Dict[str, str]]) -> Dict[str, Any]:
+        return {
+            "valid": not any(issue["severity"] == constants.VALIDATION_SEVERITY_ERROR for issue in issues),
+            "issue_count": len(issues),
+            "issues": issues,
+        }
+
+
+class BundleValidation:
+
+    # One bundle's validation: entries are checked as they arrive, and only a slim index plus the pending
+    # references are kept until finish() checks the bundle itself, slice counts and reference targets.
+
+    def __init__(self, validator: ProfileValidator):
+        self.validator = validator
+        self.index = BundleIndex(retain_types=frozenset())
+        self.issues: List[Dict[str, str]] = []
+        self.references: List[PendingReference] = []
+        self.slice_counts: Counter = Counter()
+        self._profile: Optional[CompiledProfile] = None
+        self._profile_resolved = False
+
+    def _bundle_profile(self, head: Any) -> Optional[CompiledProfile]:
+        # Resolved from whatever of the bundle has been seen when the first entry arrives.
+        if not self._profile_resolved:
+            self._profile = self.validator._profile_for(head if isinstance(head, dict) else {"resourceType": "Bundle"})
+            self._profile_resolved = True
+        return self._profile
+
+    def add_entry(self, position: int, entry: Any, head: Any = None) -> None:
+        validator, issues, references = self.validator, self.issues, self.references
+        profile = self._bundle_profile(head)
+        location = f"Bundle.entry[{position}]"
+        entry_node = profile.root.children.get("entry") if profile is not None else None
+        if entry_node is not None and isinstance(entry, dict):
+            validator._check_node(entry, entry_node, location, issues, references, exclude=("resource",))
+        resource = self.index.add(position, entry)
+        if resource is None:
+            issues.append(_error("Bundle.entry.resource", location, "Entry has no resource with a resourceType"))
+            return
+        resource_type = resource["resourceType"]
+        entry_slice = profile.slice_for(resource_type) if profile is not None else None
+        if entry_slice is not None:
+            self.slice_counts[entry_slice.name] += 1
+        resource_profile = validator._profile_for(resource, entry_slice.profile if entry_slice else None)
+        if not (resource.get("meta") or {}).get("profile"):
+            issues.append(_issue(constants.VALIDATION_SEVERITY_WARNING, f"{resource_type}.meta.profile", f"{location}.resource", "No profile URL set"))
+        if resource_profile is not None:
+            validator._check_node(resource, resource_profile.root, f"{location}.resource", issues, references)
+        if not resource.get("text"):
+            issues.append(_issue(constants.VALIDATION_SEVERITY_INFO, f"{resource_type}.text", f"{location}.resource", "Narrative text is absent"))
+
+    def finish(self, bundle: Any) -> Dict[str, Any]:
+        # `bundle` may be the whole bundle or just its head; entries were already counted by add_entry().
+        issues, index = self.issues, self.index
+        if not isinstance(bundle, dict) or bundle.get("resourceType") != "Bundle":
+            issues.insert(0, _error("Bundle.resourceType", "Bundle", "Must be 'Bundle'"))
+            return ProfileValidator._result(issues)
+        profile = self._bundle_profile(bundle)
+        if profile is not None:
+            self.validator._check_node(bundle, profile.root, "Bundle", issues, self.references, exclude=("entry",))
+            for rule in getattr(profile.root.children.get("entry"), "rules", ()):
+                ProfileValidator._check_count(rule, len(index.entries), "Bundle.entry", issues)
+            for entry_slice in profile.slices.values():
+                count = self.slice_counts[entry_slice.name]
+                if count < entry_slice.min or (entry_slice.max is not None and count > entry_slice.max):
+                    issues.append(_error(
+                        f"Bundle.entry:{entry_slice.name}", "Bundle.entry",
+                        f"Expected {entry_slice.min}..{entry_slice.max if entry_slice.max is not None else '*'} "
+                        f"{entry_slice.resource_type} entries (found {count})",
+                    ))
+
+        for position, full_url in index.duplicate_full_urls:
+            issues.append(_error("Bundle.entry.fullUrl", f"Bundle.entry[{position}]", f"Duplicate fullUrl {full_url}"))
+
+        for reference, target_types, element_id, location in self.references:
+            if not reference:
+                continue
+            target = index.resolve(reference)
+            if target is None:
+                issues.append(_error(element_id, location, f"Reference {reference} does not resolve to an entry in the bundle"))
+            elif target["resourceType"] not in target_types:
+                issues.append(_error(element_id, location, f"Reference {reference} must point to {'/'.join(sorted(target_types))}, not {target['resourceType']}"))
+        return ProfileValidator._result(issues)
+
+
+_validator: Optional[ProfileValidator] = None
+
+
+def get_profile_validator() -> ProfileValidator:
+    global _validator
+    if _validator is None:
+        _validator = ProfileValidator()
+    return _validator
+
+
+def validate_bundle_line(index: int, line: bytes) -> bytes:
+    # Runs in a worker process, which compiles the profiles once on first use.
+    try:
+        bundle = serialization.loads(line)
+    except ValueError as e:
+        return serialization.dumps_line({"index": index, "error": {"code": constants.ERROR_CODE_INVALID_NDJSON_LINE, "message": str(e)}})
+    return serialization.dumps_line({"index": index, **get_profile_validator().validate(bundle)})
+
+
+def stream_bulk_validation(lines) -> Iterator[bytes]:
+    return bulk_fhir_generator.stream_pool_results(lines, validate_bundle_line)
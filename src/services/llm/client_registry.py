@@ -0,0 +1,126 @@
+import importlib.util
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+import httpx
+import openai
+from botocore.config import Config as BotoConfig
+from google import genai
+from google.genai import types
+
+from src import constants
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _aws_credential(value: str) -> Optional[str]:
+    return value if value and value != "not-set" else None
+
+
+class ClientRegistry:
+
+    def __init__(self):
+        http = settings.http_client
+        self._http2 = http.http2 and _HTTP2_AVAILABLE
+        self._limits = httpx.Limits(
+            max_connections=http.max_connections,
+            max_keepalive_connections=http.max_keepalive_connections,
+            keepalive_expiry=http.keepalive_expiry_seconds,
+        )
+        self._timeout = httpx.Timeout(http.read_timeout_seconds, connect=http.connect_timeout_seconds)
+        self._clients: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        self._aws_session = boto3.Session(
+            aws_access_key_id=_aws_credential(settings.aws_access_key_id),
+            aws_secret_access_key=_aws_credential(settings.aws_secret_access_key),
+            region_name=settings.llm.bedrock.region_name,
+        )
+        self._boto_config = BotoConfig(
+            max_pool_connections=http.max_connections,
+            tcp_keepalive=True,
+            connect_timeout=http.connect_timeout_seconds,
+            read_timeout=http.read_timeout_seconds,
+        )
+        logger.info(constants.LOG_CLIENT_REGISTRY_INIT.format(
+            http2=self._http2, max_connections=http.max_connections, keepalive=http.max_keepalive_connections
+        ))
+
+    def _get_or_create(self, key: Tuple[str, ...], factory) -> Any:
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = factory()
+                    self._clients[key] = client
+        return client
+
+    def _httpx_kwargs(self) -> Dict[str, Any]:
+        return {"limits": self._limits, "timeout": self._timeout, "http2": self._http2}
+
+    def openai_client(self, api_key: str, base_url: Optional[str] = None) -> openai.AsyncOpenAI:
+        # One client per pooled key. The SDK's own retries are off: they would sleep and retry a 429 on the same
+        # key before KeyPool sees it; KeyPool benches the key (honouring Retry-After) and moves to the next one.
+        return self._get_or_create(("openai-async", base_url or "", api_key), lambda: openai.AsyncOpenAI(
+            api_key=api_key, base_url=base_url, max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(**self._httpx_kwargs()),
+        ))
+
+    def gemini_client(self, api_key: str) -> genai.Client:
+        http_args = self._httpx_kwargs()
+        return self._get_or_create(("gemini", api_key), lambda: genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(client_args=http_args, async_client_args=http_args),
+        ))
+
+    def aws_client(self, service_name: str) -> Any:
+        return self._get_or_create(
+            ("aws", service_name), lambda: self._aws_session.client(service_name, config=self._boto_config)
+        )
+
+    def async_http_client(self) -> httpx.AsyncClient:
+        return self._get_or_create(("http-async",), lambda: httpx.AsyncClient(**self._httpx_kwargs()))
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for key, client in clients:
+            try:
+                if isinstance(client, openai.AsyncOpenAI):
+                    await client.close()
+                elif isinstance(client, httpx.AsyncClient):
+                    await client.aclose()
+                elif isinstance(client, genai.Client):
+                    await client.aio.aclose()
+                    client.close()
+                else:
+                    client.close()
+            except Exception as e:
+                logger.warning(constants.LOG_CLIENT_REGISTRY_CLOSE_FAILED.format(client=key[0], error=e))
+        logger.info(constants.LOG_CLIENT_REGISTRY_CLOSED.format(count=len(clients)))
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+    return _registry
+
+
+async def close_client_registry() -> None:
+    global _registry
+    registry, _registry = _registry, None
+    if registry is not None:
+        await registry.aclose()
@@ -0,0 +1,227 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+SectionPath = Tuple[str, ...]
+
+_BARE_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_BARE_LITERAL_REGEX = re.compile(r"True|False|None")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def scan_json_object(text: str, start: int = 0) -> Optional[Tuple[int, int, bool]]:
+    # complete is False when the text ends before the outermost brace closes (max-token cutoff).
+    begin = text.find("{", start)
+    if begin == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(begin, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return begin, index + 1, True
+    return begin, len(text), False
+
+
+def repair_json(candidate: str) -> str:
+    out: List[str] = []
+    in_string = False
+    escaped = False
+    index = 0
+    length = len(candidate)
+    while index < length:
+        char = candidate[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\r":
+                char = "\\r"
+            elif char == "\t":
+                char = "\\t"
+            out.append(char)
+            index += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "/" and candidate.startswith("//", index):
+            newline = candidate.find("\n", index)
+            index = length if newline == -1 else newline
+            continue
+        elif char == "/" and candidate.startswith("/*", index):
+            close = candidate.find("*/", index + 2)
+            index = length if close == -1 else close + 2
+            continue
+        elif char == ",":
+            lookahead = index + 1
+            while lookahead < length and candidate[lookahead].isspace():
+                lookahead += 1
+            if lookahead < length and candidate[lookahead] in "}]":
+                index += 1
+                continue
+        elif char in "TFN":
+            literal = _BARE_LITERAL_REGEX.match(candidate, index)
+            if literal and (index == 0 or not candidate[index - 1].isalnum()):
+                out.append(_BARE_LITERALS[literal.group(0)])
+                index = literal.end()
+                continue
+        out.append(char)
+        index += 1
+    return "".join(out)
+
+
+def close_truncated_json(candidate: str) -> str:
+    # Cut back to the last complete value, then close every container still open there.
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    string_is_key = False
+    expecting_key = False
+    safe_end = 0
+    safe_stack: List[str] = []
+
+    for index, char in enumerate(candidate):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if not string_is_key:
+                    safe_end, safe_stack = index + 1, list(stack)
+            continue
+        if char == '"':
+            in_string = True
+            string_is_key = expecting_key
+        elif char in "{[":
+            stack.append(char)
+            expecting_key = char == "{"
+            safe_end, safe_stack = index + 1, list(stack)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            expecting_key = False
+            safe_end, safe_stack = index + 1, list(stack)
+        elif char == ",":
+            safe_end, safe_stack = index, list(stack)
+            expecting_key = bool(stack) and stack[-1] == "{"
+        elif char == ":":
+            expecting_key = False
+
+    closers = "".join(_CLOSERS[opener] for opener in reversed(safe_stack))
+    return candidate[:safe_end].rstrip().rstrip(",") + closers
+
+
+def parse_llm_json(text: str) -> Tuple[Dict[str, Any], bool]:
+    position = 0
+    while True:
+        located = scan_json_object(text, position)
+        if located is None:
+            raise ValueError("No JSON object found in LLM response")
+        begin, end, complete = located
+        candidate = text[begin:end]
+        attempts = [candidate, repair_json(candidate)]
+        if not complete:
+            attempts.append(repair_json(close_truncated_json(candidate)))
+        for attempt in attempts:
+            try:
+                parsed = json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed, not complete
+        if not complete:
+            raise ValueError("Truncated JSON object could not be repaired")
+        position = begin + 1
+
+
+def find_incomplete_sections(parsed: Dict[str, Any], template: Dict[str, Any]) -> List[SectionPath]:
+    # The last key written at each level was cut off mid-value, so it is re-requested
+    # too; nested objects are descended so only their missing sub-sections are asked for.
+    sections: List[SectionPath] = []
+
+    def _walk(node: Dict[str, Any], template_node: Dict[str, Any], prefix: SectionPath) -> None:
+        for key in template_node:
+            if key not in node:
+                sections.append(prefix + (key,))
+        last_key = next(reversed(node), None)
+        if last_key not in template_node:
+            return
+        last_value, last_template = node[last_key], template_node[last_key]
+        if isinstance(last_value, dict) and isinstance(last_template, dict):
+            _walk(last_value, last_template, prefix + (last_key,))
+        else:
+            sections.append(prefix + (last_key,))
+
+    _walk(parsed, template, ())
+    return sections
+
+
+def select_sections(tree: Dict[str, Any], sections: List[SectionPath]) -> Dict[str, Any]:
+    selected: Dict[str, Any] = {}
+    for path in sections:
+        source: Any = tree
+        target = selected
+        for key in path[:-1]:
+            source = source.get(key) or {}
+            target = target.setdefault(key, {})
+        if path[-1] in source:
+            target[path[-1]] = source[path[-1]]
+    return selected
+
+
+def select_schema_sections(schema: Dict[str, Any], sections: List[SectionPath]) -> Dict[str, Any]:
+    selected: Dict[str, Any] = {"type": "object", "properties": {}}
+    for path in sections:
+        source = schema
+        target = selected
+        for key in path[:-1]:
+            source = _object_branch(source["properties"][key])
+            target = target["properties"].setdefault(key, {"type": "object", "properties": {}})
+        target["properties"][path[-1]] = source["properties"][path[-1]]
+    return selected
+
+
+def _object_branch(schema: Dict[str, Any]) -> Dict[str, Any]:
+    for option in schema.get("anyOf", []):
+        if option.get("type") == "object":
+            return option
+    return schema
+
+
+def merge_sections(base: Dict[str, Any], patch: Dict[str, Any], sections: List[SectionPath]) -> Dict[str, Any]:
+    for path in sections:
+        source: Any = patch
+        for key in path:
+            if not isinstance(source, dict) or key not in source:
+                break
+            source = source[key]
+        else:
+            target = base
+            for key in path[:-1]:
+                if not isinstance(target.get(key), dict):
+                    target[key] = {}
+                target = target[key]
+            target[path[-1]] = source
+    return base
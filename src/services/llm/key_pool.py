@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src import constants
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED_STATUS = 429
+AUTH_FAILED_STATUSES = {401, 403}
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMRateLimitError(RuntimeError):
+    pass
+
+
+class KeySlot:
+
+    def __init__(self, index: int, api_key: str, client: Any):
+        self.index = index
+        self.api_key = api_key
+        self.client = client
+        self.in_flight = 0
+        self.benched_until = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return self.benched_until <= now
+
+
+class KeyPool:
+
+    def __init__(self, service_name: str, clients: Dict[str, Any]):
+        if not clients:
+            raise ValueError(constants.ERROR_MESSAGE_KEY_POOL_EMPTY.format(service_name=service_name))
+        self.service_name = service_name
+        self.config = settings.llm.key_pool
+        self.slots: List[KeySlot] = [KeySlot(i, key, client) for i, (key, client) in enumerate(clients.items())]
+        self._cursor = 0
+        logger.info(constants.LOG_KEY_POOL_INIT.format(
+            service_name=service_name, count=len(self.slots), strategy=self.config.strategy
+        ))
+
+    @property
+    def primary_client(self) -> Any:
+        return self.slots[0].client
+
+    def _select(self, now: float) -> Optional[KeySlot]:
+        count = len(self.slots)
+        rotation = [self.slots[(self._cursor + offset) % count] for offset in range(count)]
+        available = [slot for slot in rotation if slot.is_available(now)]
+        if not available:
+            return None
+        if self.config.strategy == constants.KEY_POOL_STRATEGY_LEAST_LOADED:
+            chosen = min(available, key=lambda slot: slot.in_flight)
+        else:
+            chosen = available[0]
+        self._cursor = (chosen.index + 1) % count
+        return chosen
+
+    @asynccontextmanager
+    async def lease(self):
+        while True:
+            now = time.monotonic()
+            slot = self._select(now)
+            if slot is not None:
+                break
+            wait = min(s.benched_until for s in self.slots) - now
+            if wait > self.config.max_wait_seconds:
+                logger.error(constants.LOG_KEY_POOL_EXHAUSTED.format(service_name=self.service_name))
+                raise LLMRateLimitError(constants.ERROR_MESSAGE_LLM_RATE_LIMITED)
+            logger.warning(constants.LOG_KEY_POOL_WAITING.format(service_name=self.service_name, seconds=wait))
+            await asyncio.sleep(wait)
+        slot.in_flight += 1
+        try:
+            yield slot
+        finally:
+            slot.in_flight -= 1
+
+    def bench(self, slot: KeySlot, status: int, error: Exception) -> None:
+        if status == RATE_LIMITED_STATUS:
+            cooldown = _retry_after_seconds(error) or self.config.rate_limit_cooldown_seconds
+        else:
+            cooldown = self.config.auth_failure_cooldown_seconds
+        slot.benched_until = time.monotonic() + cooldown
+        logger.warning(constants.LOG_KEY_POOL_BENCHED.format(
+            service_name=self.service_name, index=slot.index, status=status, seconds=cooldown
+        ))
+
+    async def execute(
+        self,
+        operation: Callable[[Any], Awaitable[Any]],
+        status_of: Callable[[Exception], Optional[int]],
+    ) -> Any:
+        # Keys answering 429/401/403 are benched and the request moves on to the next key.
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.slots) * self.config.attempts_per_key):
+            async with self.lease() as slot:
+                try:
+                    return await operation(slot.client)
+                except Exception as e:
+                    status = status_of(e)
+                    if status != RATE_LIMITED_STATUS and status not in AUTH_FAILED_STATUSES:
+                        raise
+                    self.bench(slot, status, e)
+                    last_error = e
+        raise LLMRateLimitError(constants.ERROR_MESSAGE_LLM_RATE_LIMITED) from last_error
@@ -7,11 +7,11 @@ from src.services.llm.llm_service import (
     GrokLLMService,
     BedrockLLMService,
 )
+from src.services.llm.replay_llm_service import ReplayLLMService
 from src import constants
 
 
-def get_llm_service() -> LLMService:
-    provider = settings.llm.provider
+def _create_service(provider: str) -> LLMService:
     if provider == constants.LLM_PROVIDER_OPENAI:
         return OpenAILLMService()
     elif provider == constants.LLM_PROVIDER_OLLAMA:
@@ -22,4 +22,12 @@ def get_llm_service() -> LLMService:
         return GrokLLMService()
     elif provider == constants.LLM_PROVIDER_BEDROCK:
         return BedrockLLMService()
-    raise ValueError(f"Unknown LLM provider configured: {provider}")
\ No newline at end of file
+    elif provider == constants.LLM_PROVIDER_REPLAY:
+        replay = settings.llm.replay
+        delegate = _create_service(replay.record_provider) if replay.mode == constants.REPLAY_MODE_RECORD else None
+        return ReplayLLMService(delegate)
+    raise ValueError(f"Unknown LLM provider configured: {provider}")
+
+
+def get_llm_service() -> LLMService:
+    return _create_service(settings.llm.provider)
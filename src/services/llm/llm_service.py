@@ -1,47 +1,128 @@
 from abc import ABC, abstractmethod
-from openai import AsyncOpenAI, APIError
+from typing import Any, Dict, List, Optional, Tuple
+from openai import AsyncOpenAI, APIError, APIStatusError
+import httpx
 
-from google import genai
-from google.genai import types
-import boto3
+from google.genai import errors as genai_errors, types
+import copy
 import json
 import asyncio
+import time
+import uuid
 
 from src import constants
 from src.config import settings
+from src.schemas.insurance_schemas import INSURANCE_DATA_SCHEMA_NAME
+from src.services.llm.client_registry import get_client_registry
+from src.services.llm.key_pool import KeyPool, LLMRateLimitError
+from src.core.token_counter import estimate_tokens
 import logging
 
 logger = logging.getLogger(__name__)
 
+BEDROCK_EXTRACTION_TOOL_NAME = "record_insurance_data"
+OPENAI_BATCH_ENDPOINT = "/v1/chat/completions"
+OPENAI_BATCH_TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+BEDROCK_BATCH_TERMINAL_STATES = {"Completed", "PartiallyCompleted", "Failed", "Stopped", "Expired"}
+
+
+def _openai_status(error: Exception) -> Optional[int]:
+    return error.status_code if isinstance(error, APIStatusError) else None
+
+
+def _gemini_status(error: Exception) -> Optional[int]:
+    return error.code if isinstance(error, genai_errors.APIError) else None
+
 
 class LLMService(ABC):
 
+    # Attribute holding the model identifier, so routing can clone the service onto another model.
+    model_attribute: Optional[str] = None
+
+    def with_model(self, model: str) -> "LLMService":
+        if not self.model_attribute or not model or getattr(self, self.model_attribute) == model:
+            return self
+        clone = copy.copy(self)
+        setattr(clone, self.model_attribute, model)
+        return clone
+
     @abstractmethod
-    async def process_text(self, system_prompt: str, user_prompt: str) -> str:
+    async def process_text(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
         raise NotImplementedError
 
+    async def warm_up(self, system_prompt: str) -> None:
+        # Hook for providers that benefit from pre-loading the model at startup.
+        return None
+
+    async def process_batch(
+        self, system_prompt: str, user_prompts: Dict[str, str], response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        # Local stand-in for providers without a batch API: bounded-concurrency fan-out.
+        semaphore = asyncio.Semaphore(settings.llm.batch.local_concurrency)
+
+        async def _run(custom_id: str, user_prompt: str):
+            async with semaphore:
+                try:
+                    return custom_id, await self.process_text(system_prompt, user_prompt, response_schema)
+                except RuntimeError as e:
+                    logger.error(constants.LOG_LLM_BATCH_ITEM_FAILED.format(custom_id=custom_id, error=e))
+                    return custom_id, None
+
+        results = await asyncio.gather(*(_run(custom_id, prompt) for custom_id, prompt in user_prompts.items()))
+        return {custom_id: text for custom_id, text in results if text is not None}
+
 
 class _OpenAICompatibleService(LLMService):
 
+    supports_batch_api: bool = True
+    model_attribute = "model"
+
     def __init__(self):
         logger.info(constants.LOG_LLM_SERVICE_INIT.format(service_name=self.__class__.__name__))
-        self.client: AsyncOpenAI = self._create_client()
+        self.key_pool = KeyPool(
+            self.__class__.__name__, {api_key: self._create_client(api_key) for api_key in self._api_keys()}
+        )
+        self.client: AsyncOpenAI = self.key_pool.primary_client
         self.model: str = self._get_model_name()
 
     @abstractmethod
-    def _create_client(self) -> AsyncOpenAI:
+    def _api_keys(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _create_client(self, api_key: str) -> AsyncOpenAI:
         raise NotImplementedError
 
     @abstractmethod
     def _get_model_name(self) -> str:
         raise NotImplementedError
 
-    async def process_text(self, system_prompt: str, user_prompt: str) -> str:
+    def _response_format(self, response_schema: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": INSURANCE_DATA_SCHEMA_NAME, "schema": response_schema, "strict": False},
+        }
+
+    def _chat_request(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        request: Dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+        }
+        if response_schema:
+            request["response_format"] = self._response_format(response_schema)
+        return request
+
+    async def process_text(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        request = self._chat_request(system_prompt, user_prompt, response_schema)
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-                stream=False,
+            response = await self.key_pool.execute(
+                lambda client: client.chat.completions.create(stream=False, **request), _openai_status
             )
             content = response.choices[0].message.content
             return content or ""
@@ -50,49 +131,214 @@ class _OpenAICompatibleService(LLMService):
             logger.error(error_message)
             raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR) from e
 
+    async def process_batch(
+        self, system_prompt: str, user_prompts: Dict[str, str], response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        if not self.supports_batch_api:
+            return await super().process_batch(system_prompt, user_prompts, response_schema)
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": OPENAI_BATCH_ENDPOINT,
+                "body": self._chat_request(system_prompt, user_prompt, response_schema),
+            })
+            for custom_id, user_prompt in user_prompts.items()
+        ]
+        try:
+            input_file = await self.client.files.create(
+                file=("insurance_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=OPENAI_BATCH_ENDPOINT,
+                completion_window=settings.llm.batch.completion_window,
+            )
+            logger.info(constants.LOG_LLM_BATCH_SUBMITTED.format(batch_id=batch.id, count=len(lines)))
+            while batch.status not in OPENAI_BATCH_TERMINAL_STATES:
+                await asyncio.sleep(settings.llm.batch.poll_interval_seconds)
+                batch = await self.client.batches.retrieve(batch.id)
+                logger.info(constants.LOG_LLM_BATCH_STATUS.format(batch_id=batch.id, status=batch.status))
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(constants.ERROR_MESSAGE_LLM_BATCH_FAILED.format(status=batch.status))
+            output = await self.client.files.content(batch.output_file_id)
+        except APIError as e:
+            error_message = constants.LOG_LLM_API_CALL_FAILED.format(service_name=self.__class__.__name__, error=e)
+            logger.error(error_message)
+            raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR) from e
+
+        results: Dict[str, str] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            choices = ((record.get("response") or {}).get("body") or {}).get("choices") or []
+            if choices:
+                results[record["custom_id"]] = choices[0]["message"].get("content") or ""
+            else:
+                logger.error(constants.LOG_LLM_BATCH_ITEM_FAILED.format(custom_id=record.get("custom_id"), error=record.get("error")))
+        return results
+
 
 class OpenAILLMService(_OpenAICompatibleService):
 
-    def _create_client(self) -> AsyncOpenAI:
-        return AsyncOpenAI(api_key=settings.openai_api_key)
+    def _api_keys(self) -> List[str]:
+        return settings.api_key_pool(constants.LLM_PROVIDER_OPENAI)
+
+    def _create_client(self, api_key: str) -> AsyncOpenAI:
+        return get_client_registry().openai_client(api_key=api_key)
 
     def _get_model_name(self) -> str:
         return settings.llm.openai.model_name
 
 
+def bedrock_batch_location(s3_uri: str, job_name: str) -> Tuple[str, str]:
+    # "s3://bucket" and "s3://bucket/some/prefix/" both work; keys never start with a slash.
+    bucket, _, prefix = s3_uri.removeprefix("s3://").strip("/").partition("/")
+    return bucket, f"{prefix}/{job_name}" if prefix else job_name
+
+
+def select_num_ctx(needed_tokens: int, buckets: List[int], floor: int = 0) -> int:
+    for bucket in sorted(buckets):
+        if bucket >= needed_tokens and bucket >= floor:
+            return bucket
+    return max(max(buckets), floor)
+
+
 class OllamaLLMService(_OpenAICompatibleService):
 
-    def _create_client(self) -> AsyncOpenAI:
-        return AsyncOpenAI(base_url=settings.llm.ollama.base_url, api_key="ollama")
+    supports_batch_api = False
+
+    def __init__(self):
+        super().__init__()
+        self.config = settings.llm.ollama
+        self.chat_url = self.config.base_url.removesuffix("/v1").rstrip("/") + "/api/chat"
+        # Ollama reloads the runner whenever num_ctx changes, so the window only ever grows.
+        self._num_ctx = 0
+
+    def _api_keys(self) -> List[str]:
+        return ["ollama"]
+
+    def _create_client(self, api_key: str) -> AsyncOpenAI:
+        return get_client_registry().openai_client(api_key=api_key, base_url=settings.llm.ollama.base_url)
 
     def _get_model_name(self) -> str:
         return settings.llm.ollama.model_name
 
+    def _context_window(self, system_prompt: str, user_prompt: str) -> int:
+        needed = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + self.config.num_predict_reserve
+        num_ctx = select_num_ctx(needed, self.config.num_ctx_buckets, self._num_ctx)
+        if needed > num_ctx:
+            logger.warning(constants.LOG_OLLAMA_CONTEXT_OVERFLOW.format(needed=needed, num_ctx=num_ctx))
+        self._num_ctx = num_ctx
+        return num_ctx
+
+    def _native_request(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]], num_ctx: int
+    ) -> Dict[str, Any]:
+        # The system prompt is always the first message, so Ollama reuses its KV-cache prefix across calls.
+        messages = [{"role": "system", "content": system_prompt}]
+        if user_prompt:
+            messages.append({"role": "user", "content": user_prompt})
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "format": response_schema or "json",
+            "keep_alive": self.config.keep_alive,
+            "options": {"num_ctx": num_ctx, "temperature": self.config.temperature},
+        }
+
+    async def _post_chat(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        response = await get_client_registry().async_http_client().post(self.chat_url, json=request)
+        response.raise_for_status()
+        return response.json()
+
+    async def warm_up(self, system_prompt: str) -> None:
+        if not (self.config.native_api and self.config.prewarm):
+            return
+        num_ctx = self._context_window(system_prompt, "")
+        logger.info(constants.LOG_OLLAMA_WARMUP.format(model=self.model, num_ctx=num_ctx, keep_alive=self.config.keep_alive))
+        request = self._native_request(system_prompt, "", None, num_ctx)
+        del request["format"]
+        request["options"]["num_predict"] = 1
+        started = time.perf_counter()
+        try:
+            await self._post_chat(request)
+        except httpx.HTTPError as e:
+            logger.warning(constants.LOG_OLLAMA_WARMUP_FAILED.format(model=self.model, error=e))
+            return
+        logger.info(constants.LOG_OLLAMA_WARMUP_DONE.format(model=self.model, seconds=time.perf_counter() - started))
+
+    async def process_text(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        if not self.config.native_api:
+            return await super().process_text(system_prompt, user_prompt, response_schema)
+        num_ctx = self._context_window(system_prompt, user_prompt)
+        try:
+            body = await self._post_chat(self._native_request(system_prompt, user_prompt, response_schema, num_ctx))
+        except httpx.HTTPError as e:
+            error_message = constants.LOG_LLM_API_CALL_FAILED.format(service_name=self.__class__.__name__, error=e)
+            logger.error(error_message)
+            raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR) from e
+        logger.debug(constants.LOG_OLLAMA_CALL_STATS.format(
+            num_ctx=num_ctx,
+            prompt_eval_count=body.get("prompt_eval_count"),
+            eval_count=body.get("eval_count"),
+            done_reason=body.get("done_reason"),
+        ))
+        return (body.get("message") or {}).get("content") or ""
+
 
 class GrokLLMService(_OpenAICompatibleService):
 
-    def _create_client(self) -> AsyncOpenAI:
-        return AsyncOpenAI(base_url=settings.llm.grok.base_url, api_key=settings.grok_api_key)
+    def _api_keys(self) -> List[str]:
+        return settings.api_key_pool(constants.LLM_PROVIDER_GROK)
+
+    def _create_client(self, api_key: str) -> AsyncOpenAI:
+        return get_client_registry().openai_client(api_key=api_key, base_url=settings.llm.grok.base_url)
 
     def _get_model_name(self) -> str:
         return settings.llm.grok.model_name
 
+    def _response_format(self, response_schema: Dict[str, Any]) -> Dict[str, Any]:
+        # Groq only honours json_schema on a handful of models; json_object is universal.
+        return {"type": "json_object"}
+
 
 class GeminiLLMService(LLMService):
 
+    model_attribute = "model_name"
+
     def __init__(self):
         logger.info(constants.LOG_LLM_SERVICE_INIT.format(service_name=self.__class__.__name__))
-        self.client = genai.Client(api_key=settings.google_api_key)
+        registry = get_client_registry()
+        self.key_pool = KeyPool(self.__class__.__name__, {
+            api_key: registry.gemini_client(api_key) for api_key in settings.api_key_pool(constants.LLM_PROVIDER_GEMINI)
+        })
         self.model_name = settings.llm.gemini.model_name
 
-    async def process_text(self, system_prompt: str, user_prompt: str) -> str:
+    async def process_text(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
         try:
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=user_prompt,
-                config=types.GenerateContentConfig(system_instruction=system_prompt)
+            config_kwargs: Dict[str, Any] = {"system_instruction": system_prompt}
+            if response_schema:
+                # The SDK rewrites the schema in place, so hand it a private copy.
+                config_kwargs["response_mime_type"] = "application/json"
+                config_kwargs["response_schema"] = copy.deepcopy(response_schema)
+            response = await self.key_pool.execute(
+                lambda client: client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=user_prompt,
+                    config=types.GenerateContentConfig(**config_kwargs)
+                ),
+                _gemini_status,
             )
             return response.text
+        except LLMRateLimitError:
+            raise
         except Exception as e:
             error_message = constants.LOG_LLM_API_CALL_FAILED.format(service_name=self.__class__.__name__, error=e)
             logger.error(error_message)
@@ -101,35 +347,114 @@ class GeminiLLMService(LLMService):
 
 class BedrockLLMService(LLMService):
 
+    model_attribute = "model_id"
+
     def __init__(self):
         logger.info(constants.LOG_LLM_SERVICE_INIT.format(service_name=self.__class__.__name__))
         self.model_id = settings.llm.bedrock.model_id
         self.anthropic_version = settings.llm.bedrock.anthropic_version
         self.max_tokens = settings.llm.bedrock.max_tokens
         self.temperature = settings.llm.bedrock.temperature
-        self.client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=settings.llm.bedrock.region_name,
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-        )
-
-    async def process_text(self, system_prompt: str, user_prompt: str) -> str:
+        registry = get_client_registry()
+        self.client = registry.aws_client("bedrock-runtime")
+        self.control_client = registry.aws_client("bedrock")
+        self.s3_client = registry.aws_client("s3")
+
+    def _request_body(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        request_body: Dict[str, Any] = {
+            "anthropic_version": self.anthropic_version,
+            "max_tokens": self.max_tokens,
+            "system": system_prompt,
+            "temperature": self.temperature,
+            "messages": [{"role": "user", "content": [{"type": "text", "text": user_prompt}]}]
+        }
+        if response_schema:
+            request_body["tools"] = [{
+                "name": BEDROCK_EXTRACTION_TOOL_NAME,
+                "description": constants.LLM_STRUCTURED_OUTPUT_TOOL_DESCRIPTION,
+                "input_schema": response_schema,
+            }]
+            request_body["tool_choice"] = {"type": "tool", "name": BEDROCK_EXTRACTION_TOOL_NAME}
+        return request_body
+
+    @staticmethod
+    def _response_text(response_body: Dict[str, Any]) -> str:
+        content_blocks = response_body.get("content") or []
+        for block in content_blocks:
+            if block.get("type") == "tool_use":
+                return json.dumps(block.get("input") or {})
+        return content_blocks[0].get("text")
+
+    async def process_text(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
         loop = asyncio.get_running_loop()
         try:
-            body = json.dumps({
-                "anthropic_version": self.anthropic_version,
-                "max_tokens": self.max_tokens,
-                "system": system_prompt,
-                "temperature": self.temperature,
-                "messages": [{"role": "user", "content": [{"type": "text", "text": user_prompt}]}]
-            })
+            body = json.dumps(self._request_body(system_prompt, user_prompt, response_schema))
             response = await loop.run_in_executor(
                 None, lambda: self.client.invoke_model(body=body, modelId=self.model_id)
             )
-            response_body = json.loads(response.get("body").read())
-            return response_body.get("content")[0].get("text")
+            return self._response_text(json.loads(response.get("body").read()))
+        except Exception as e:
+            error_message = constants.LOG_LLM_API_CALL_FAILED.format(service_name=self.__class__.__name__, error=e)
+            logger.error(error_message)
+            raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR) from e
+
+    async def process_batch(
+        self, system_prompt: str, user_prompts: Dict[str, str], response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        bedrock_settings = settings.llm.bedrock
+        if not (bedrock_settings.batch_s3_uri and bedrock_settings.batch_role_arn):
+            return await super().process_batch(system_prompt, user_prompts, response_schema)
+        loop = asyncio.get_running_loop()
+        try:
+            job_name = f"insurance-batch-{uuid.uuid4().hex[:12]}"
+            records = [
+                json.dumps({"recordId": custom_id, "modelInput": self._request_body(system_prompt, user_prompt, response_schema)})
+                for custom_id, user_prompt in user_prompts.items()
+            ]
+            bucket, job_prefix = bedrock_batch_location(bedrock_settings.batch_s3_uri, job_name)
+            input_key = f"{job_prefix}/input.jsonl"
+            await loop.run_in_executor(
+                None, lambda: self.s3_client.put_object(Bucket=bucket, Key=input_key, Body="\n".join(records).encode("utf-8"))
+            )
+            job = await loop.run_in_executor(None, lambda: self.control_client.create_model_invocation_job(
+                jobName=job_name,
+                roleArn=bedrock_settings.batch_role_arn,
+                modelId=self.model_id,
+                inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{bucket}/{input_key}"}},
+                outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{bucket}/{job_prefix}/output/"}},
+            ))
+            job_arn = job["jobArn"]
+            logger.info(constants.LOG_LLM_BATCH_SUBMITTED.format(batch_id=job_arn, count=len(records)))
+            status = ""
+            while status not in BEDROCK_BATCH_TERMINAL_STATES:
+                await asyncio.sleep(settings.llm.batch.poll_interval_seconds)
+                status = (await loop.run_in_executor(
+                    None, lambda: self.control_client.get_model_invocation_job(jobIdentifier=job_arn)
+                ))["status"]
+                logger.info(constants.LOG_LLM_BATCH_STATUS.format(batch_id=job_arn, status=status))
+            if status not in ("Completed", "PartiallyCompleted"):
+                raise RuntimeError(constants.ERROR_MESSAGE_LLM_BATCH_FAILED.format(status=status))
+            output_key = f"{job_prefix}/output/{job_arn.rsplit('/', 1)[-1]}/input.jsonl.out"
+            output = await loop.run_in_executor(
+                None, lambda: self.s3_client.get_object(Bucket=bucket, Key=output_key)["Body"].read().decode("utf-8")
+            )
         except Exception as e:
             error_message = constants.LOG_LLM_API_CALL_FAILED.format(service_name=self.__class__.__name__, error=e)
             logger.error(error_message)
-            raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR) from e
\ No newline at end of file
+            raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR) from e
+
+        results: Dict[str, str] = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            model_output = record.get("modelOutput")
+            if model_output:
+                results[record["recordId"]] = self._response_text(model_output)
+            else:
+                logger.error(constants.LOG_LLM_BATCH_ITEM_FAILED.format(custom_id=record.get("recordId"), error=record.get("error")))
+        return results
@@ -0,0 +1,48 @@
+import logging
+from typing import List, Optional, Tuple
+
+from src import constants
+from src.config import ModelTierSettings, settings
+from src.services.llm.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIER_NAME = "default"
+
+
+def _fits(tier: ModelTierSettings, token_count: int, page_count: Optional[int]) -> bool:
+    if tier.max_tokens and token_count > tier.max_tokens:
+        return False
+    if tier.max_pages and page_count is not None and page_count > tier.max_pages:
+        return False
+    return True
+
+
+def select_tier_index(tiers: List[ModelTierSettings], token_count: int, page_count: Optional[int] = None) -> int:
+    for index, tier in enumerate(tiers):
+        if _fits(tier, token_count, page_count):
+            return index
+    return len(tiers) - 1
+
+
+def route(llm_service: LLMService, token_count: int, page_count: Optional[int] = None) -> List[Tuple[str, LLMService]]:
+    # Returns the selected tier followed by the larger tiers available for escalation.
+    routing = settings.llm.routing
+    if not routing.enabled or not routing.tiers:
+        return [(DEFAULT_TIER_NAME, llm_service)]
+    start = select_tier_index(routing.tiers, token_count, page_count)
+    chosen = routing.tiers[start]
+    logger.info(constants.LOG_MODEL_ROUTER_SELECTED.format(
+        tier=chosen.name, token_count=token_count, page_count=page_count
+    ))
+    candidates = routing.tiers[start:] if routing.escalate_on_invalid_output else [chosen]
+    routed: List[Tuple[str, LLMService]] = []
+    seen_models = set()
+    for tier in candidates:
+        service = llm_service.with_model(tier.models.get(settings.llm.provider, ""))
+        model = getattr(service, service.model_attribute) if service.model_attribute else tier.name
+        if model in seen_models:
+            continue
+        seen_models.add(model)
+        routed.append((tier.name, service))
+    return routed
@@ -0,0 +1,161 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src import constants
+from src.config import ROOT_DIR, settings
+from src.core import prompts
+from src.services.llm.llm_service import LLMService, LLMRateLimitError
+
+logger = logging.getLogger(__name__)
+
+_HEADING_REGEX = re.compile(r"^#+\s+(.+)$", re.MULTILINE)
+
+_STUB_VALUES: Dict[str, str] = {
+    "bundleType": "InsurancePlan",
+    "status": "active",
+    "language": "en-IN",
+    "typeCode": "01",
+    "typeDisplay": "Hospitalisation Indemnity",
+    "planTypeCode": "01",
+    "planTypeDisplay": "Individual",
+    "categoryCode": "49122002",
+    "categoryDisplay": "Ambulance",
+    "benefitTypeCode": "49122002",
+    "benefitTypeDisplay": "Ambulance",
+    "costType": "fullcoverage",
+    "costValue": "0",
+    "costUnit": "INR",
+    "limitValue": "0",
+    "limitUnit": "INR",
+}
+
+
+def compute_prompt_hash(system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None) -> str:
+    material = json.dumps([system_prompt, user_prompt, response_schema], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def write_recording(recordings_dir: Path, prompt_hash: str, response: str, provider: str) -> Path:
+    record = {
+        "prompt_hash": prompt_hash,
+        "provider": provider,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "response": response,
+    }
+    recordings_dir.mkdir(parents=True, exist_ok=True)
+    path = recordings_dir / f"{prompt_hash}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def _fill_template(node: Any, key: Optional[str] = None) -> Any:
+    if isinstance(node, dict):
+        return {child_key: _fill_template(child, child_key) for child_key, child in node.items()}
+    if isinstance(node, list):
+        return [_fill_template(item, key) for item in node[:1]]
+    return _STUB_VALUES.get(key or "", "")
+
+
+def build_stub_response(user_prompt: str) -> str:
+    stub = _fill_template(copy.deepcopy(prompts.MAPPING_TEMPLATE))
+    heading = _HEADING_REGEX.search(user_prompt or "")
+    stub["organisation"]["name"] = constants.REPLAY_STUB_INSURER_NAME
+    stub["insurancePlan"]["name"] = heading.group(1).strip("*_ ") if heading else constants.REPLAY_STUB_PLAN_NAME
+    stub["tpaOrganisation"] = None
+    return json.dumps(stub)
+
+
+class ReplayLLMService(LLMService):
+
+    def __init__(self, delegate: Optional[LLMService] = None):
+        logger.info(constants.LOG_LLM_SERVICE_INIT.format(service_name=self.__class__.__name__))
+        self.config = settings.llm.replay
+        self.delegate = delegate
+        self.recordings_dir = ROOT_DIR / self.config.recordings_dir
+        self._rng = random.Random(self.config.seed)
+
+    def _recording_path(self, prompt_hash: str) -> Path:
+        return self.recordings_dir / f"{prompt_hash}.json"
+
+    def _sample_latency(self) -> float:
+        latency = self.config.latency
+        if latency.distribution == "fixed":
+            sampled = latency.mean_seconds
+        elif latency.distribution == "uniform":
+            sampled = self._rng.uniform(latency.min_seconds, latency.max_seconds)
+        elif latency.distribution == "normal":
+            sampled = self._rng.gauss(latency.mean_seconds, latency.stddev_seconds)
+        elif latency.distribution == "lognormal":
+            # mean/stddev are configured in seconds; lognormvariate takes the mu/sigma of the underlying normal.
+            if latency.mean_seconds <= 0:
+                sampled = 0.0
+            else:
+                sigma_squared = math.log(1 + latency.stddev_seconds ** 2 / latency.mean_seconds ** 2)
+                mu = math.log(latency.mean_seconds) - sigma_squared / 2
+                sampled = self._rng.lognormvariate(mu, math.sqrt(sigma_squared))
+        else:
+            return 0.0
+        if latency.max_seconds > 0:
+            sampled = min(sampled, latency.max_seconds)
+        return max(sampled, latency.min_seconds, 0.0)
+
+    async def _emit(self, text: str) -> str:
+        chunk_chars = self.config.stream_chunk_chars
+        if chunk_chars <= 0:
+            return text
+        chunks = []
+        for start in range(0, len(text), chunk_chars):
+            await asyncio.sleep(self.config.stream_chunk_delay_seconds)
+            chunks.append(text[start:start + chunk_chars])
+        return "".join(chunks)
+
+    def _load_recording(self, prompt_hash: str) -> Optional[str]:
+        path = self._recording_path(prompt_hash)
+        if not path.is_file():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("response")
+
+    def _save_recording(self, prompt_hash: str, response: str) -> None:
+        write_recording(self.recordings_dir, prompt_hash, response, self.config.record_provider)
+        logger.info(constants.LOG_REPLAY_RECORDED.format(prompt_hash=prompt_hash))
+
+    async def warm_up(self, system_prompt: str) -> None:
+        if self.config.mode == constants.REPLAY_MODE_RECORD:
+            await self.delegate.warm_up(system_prompt)
+
+    async def process_text(
+        self, system_prompt: str, user_prompt: str, response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        prompt_hash = compute_prompt_hash(system_prompt, user_prompt, response_schema)
+
+        if self.config.mode == constants.REPLAY_MODE_RECORD:
+            response = await self.delegate.process_text(system_prompt, user_prompt, response_schema)
+            self._save_recording(prompt_hash, response)
+            return response
+
+        delay = self._sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        if self._rng.random() < self.config.rate_limit_error_rate:
+            logger.warning(constants.LOG_REPLAY_INJECTED_RATE_LIMIT.format(prompt_hash=prompt_hash))
+            raise LLMRateLimitError(constants.ERROR_MESSAGE_LLM_RATE_LIMITED)
+
+        response = self._load_recording(prompt_hash)
+        if response is None:
+            if not self.config.fallback_to_stub:
+                logger.error(constants.LOG_REPLAY_MISSING.format(prompt_hash=prompt_hash))
+                raise RuntimeError(constants.ERROR_MESSAGE_LLM_API_ERROR)
+            logger.info(constants.LOG_REPLAY_STUB.format(prompt_hash=prompt_hash))
+            response = build_stub_response(user_prompt)
+        return await self._emit(response)
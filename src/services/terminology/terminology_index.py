@@ -0,0 +1,210 @@
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src import constants
+
+logger = logging.getLogger(__name__)
+
+# (value_set, code, display, terms)
+ConceptRecord = Tuple[str, str, Optional[str], List[str]]
+
+INDEX_SCHEMA_VERSION = "1"
+RF2_ACTIVE = "1"
+RF2_FSN_TYPE_ID = "900000000000003001"
+
+_TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+_SEMANTIC_TAG_REGEX = re.compile(r"\s*\([a-z /-]+\)$")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "or", "of", "the", "for", "to", "in", "on", "with", "by",
+    "expense", "expenses", "charge", "charges", "cost", "costs", "cover", "covered", "benefit", "benefits",
+})
+# Applied to both indexed terms and queries, so British and American spellings meet in the middle.
+_SPELLING_VARIANTS = (("isation", "ization"), ("yse", "yze"), ("aem", "em"), ("oes", "es"), ("our", "or"))
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE concepts (
+    value_set TEXT NOT NULL, code TEXT NOT NULL, display TEXT,
+    PRIMARY KEY (value_set, code)
+) WITHOUT ROWID;
+CREATE TABLE terms (
+    id INTEGER PRIMARY KEY, value_set TEXT NOT NULL, code TEXT NOT NULL,
+    normalized TEXT NOT NULL, token_count INTEGER NOT NULL, trigram_count INTEGER NOT NULL
+);
+CREATE TABLE term_tokens (token TEXT NOT NULL, term_id INTEGER NOT NULL, PRIMARY KEY (token, term_id)) WITHOUT ROWID;
+CREATE TABLE term_trigrams (trigram TEXT NOT NULL, term_id INTEGER NOT NULL, PRIMARY KEY (trigram, term_id)) WITHOUT ROWID;
+"""
+_POST_LOAD_INDEXES = """
+CREATE INDEX terms_normalized ON terms (normalized, value_set);
+"""
+
+
+def _canonical_token(token: str) -> str:
+    for british, american in _SPELLING_VARIANTS:
+        token = token.replace(british, american)
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_REGEX.findall(text.lower()):
+        if token in _STOPWORDS or token.isdigit():
+            continue
+        tokens.append(_canonical_token(token))
+    return tokens
+
+
+def normalize(text: str) -> str:
+    # Order-insensitive key: "Room Rent Charges" and "rent, room" both become "rent room".
+    return " ".join(sorted(set(tokenize(text))))
+
+
+def trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _strip_semantic_tag(term: str) -> str:
+    return _SEMANTIC_TAG_REGEX.sub("", term)
+
+
+def load_bundled_dictionary(path: Path) -> Iterator[ConceptRecord]:
+    with open(path, "r", encoding="utf-8") as f:
+        dictionary = json.load(f)
+    aliases: Dict[str, List[str]] = {}
+    for term, code in dictionary.get(constants.TERMINOLOGY_TERM_TO_CODE_KEY, {}).items():
+        aliases.setdefault(code, []).append(term)
+    for value_set, codes in dictionary.items():
+        if value_set == constants.TERMINOLOGY_TERM_TO_CODE_KEY:
+            continue
+        for code, display in codes.items():
+            terms = [display]
+            if value_set == constants.TERMINOLOGY_VALUE_SET_BENEFIT:
+                terms.extend(aliases.pop(code, []))
+            yield value_set, code, display, terms
+    # Aliases for codes without an official display resolve to the code and keep the caller's display.
+    for code, terms in aliases.items():
+        yield constants.TERMINOLOGY_VALUE_SET_BENEFIT, code, None, terms
+
+
+def _load_rf2(path: Path, value_set: str) -> Iterator[ConceptRecord]:
+    concepts: Dict[str, Tuple[Optional[str], List[str]]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in reader:
+            if row.get("active") != RF2_ACTIVE:
+                continue
+            display, terms = concepts.get(row["conceptId"], (None, []))
+            term = row["term"]
+            if row.get("typeId") == RF2_FSN_TYPE_ID:
+                display = _strip_semantic_tag(term)
+                term = display
+            terms.append(term)
+            concepts[row["conceptId"]] = (display, terms)
+    for code, (display, terms) in concepts.items():
+        yield value_set, code, display or terms[0], terms
+
+
+def _iter_codesystem_concepts(concepts: list) -> Iterator[dict]:
+    for concept in concepts or []:
+        yield concept
+        yield from _iter_codesystem_concepts(concept.get("concept"))
+
+
+def _load_fhir_json(path: Path, value_set: str) -> Iterator[ConceptRecord]:
+    with open(path, "r", encoding="utf-8") as f:
+        resource = json.load(f)
+    if resource.get("resourceType") == "CodeSystem":
+        entries = list(_iter_codesystem_concepts(resource.get("concept")))
+    else:
+        entries = list((resource.get("expansion") or {}).get("contains") or [])
+        for include in (resource.get("compose") or {}).get("include") or []:
+            entries.extend(include.get("concept") or [])
+    for entry in entries:
+        if not entry.get("code"):
+            continue
+        display = entry.get("display")
+        terms = [display] if display else []
+        terms.extend(d["value"] for d in entry.get("designation") or [] if d.get("value"))
+        yield value_set, entry["code"], display, terms
+
+
+def _load_csv(path: Path, value_set: str) -> Iterator[ConceptRecord]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].strip().lower() == "code":
+                continue
+            code, display = row[0].strip(), row[1].strip()
+            yield value_set, code, display, [display] + [alias.strip() for alias in row[2:] if alias.strip()]
+
+
+def load_source(path: Path, value_set: str) -> Iterator[ConceptRecord]:
+    suffix = path.suffix.lower()
+    if suffix in (".txt", ".tsv"):
+        return _load_rf2(path, value_set)
+    if suffix == ".json":
+        return _load_fhir_json(path, value_set)
+    if suffix == ".csv":
+        return _load_csv(path, value_set)
+    raise ValueError(constants.ERROR_MESSAGE_TERMINOLOGY_SOURCE_FORMAT.format(path=path))
+
+
+def build_index(index_path: Path, records: Iterable[ConceptRecord], fingerprint: str) -> int:
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=index_path.parent, suffix=".tmp")
+    os.close(fd)
+    connection = sqlite3.connect(tmp_name)
+    term_count = 0
+    try:
+        connection.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + _SCHEMA)
+        seen_terms: Set[Tuple[str, str, str]] = set()
+        for value_set, code, display, terms in records:
+            connection.execute("INSERT OR IGNORE INTO concepts VALUES (?, ?, ?)", (value_set, code, display))
+            for term in terms:
+                normalized = normalize(term)
+                if not normalized or (value_set, code, normalized) in seen_terms:
+                    continue
+                seen_terms.add((value_set, code, normalized))
+                term_grams = trigrams(normalized)
+                tokens = normalized.split(" ")
+                cursor = connection.execute(
+                    "INSERT INTO terms (value_set, code, normalized, token_count, trigram_count) VALUES (?, ?, ?, ?, ?)",
+                    (value_set, code, normalized, len(tokens), len(term_grams)),
+                )
+                term_id = cursor.lastrowid
+                connection.executemany("INSERT OR IGNORE INTO term_tokens VALUES (?, ?)", ((t, term_id) for t in tokens))
+                connection.executemany("INSERT OR IGNORE INTO term_trigrams VALUES (?, ?)", ((g, term_id) for g in term_grams))
+                term_count += 1
+        connection.executescript(_POST_LOAD_INDEXES)
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", (
+            ("schema_version", INDEX_SCHEMA_VERSION), ("fingerprint", fingerprint),
+        ))
+        connection.commit()
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+    os.replace(tmp_name, index_path)
+    return term_count
+
+
+def read_fingerprint(index_path: Path) -> Optional[str]:
+    if not index_path.is_file():
+        return None
+    try:
+        connection = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            rows = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError:
+        return None
+    if rows.get("schema_version") != INDEX_SCHEMA_VERSION:
+        return None
+    return rows.get("fingerprint")
@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src import constants
+from src.config import ROOT_DIR, settings
+from src.services.terminology import terminology_index
+from src.services.terminology.terminology_index import ConceptRecord
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_DICTIONARY_PATH = ROOT_DIR / "src" / "core" / "snomed_dictionary.json"
+PROGRESS_HANDLER_OPCODES = 1000
+
+# (code, display); display is None when the caller's own display text should be kept.
+ConceptMatch = Tuple[Optional[str], Optional[str]]
+
+
+class _LookupAborted(Exception):
+    # Raised through the lru_cache so a lookup cut off by the deadline is retried next time instead of
+    # being remembered as a miss.
+    pass
+
+
+class TerminologyService:
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.config = settings.terminology
+        self.index_path = index_path or ROOT_DIR / self.config.index_path
+        self.value_sets: Sequence[str] = tuple(self.config.lookup_value_sets)
+        self._lock = threading.Lock()
+        self._deadline = 0.0
+        self._ensure_index()
+        self._connection = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+        self._connection.execute(f"PRAGMA mmap_size={self.config.mmap_size_bytes}")
+        self._connection.set_progress_handler(self._past_deadline, PROGRESS_HANDLER_OPCODES)
+        self._cached_lookup = lru_cache(maxsize=self.config.cache_size)(self._lookup_uncached)
+
+    def _source_paths(self) -> List[Tuple[Path, str]]:
+        return [(ROOT_DIR / source.path, source.value_set) for source in self.config.sources]
+
+    def _fingerprint(self) -> str:
+        paths = [(BUNDLED_DICTIONARY_PATH, "")] + self._source_paths()
+        return json.dumps([
+            [str(path), value_set, path.stat().st_mtime_ns, path.stat().st_size] for path, value_set in paths if path.is_file()
+        ])
+
+    def _records(self) -> Iterator[ConceptRecord]:
+        if BUNDLED_DICTIONARY_PATH.is_file():
+            yield from terminology_index.load_bundled_dictionary(BUNDLED_DICTIONARY_PATH)
+        else:
+            logger.warning(constants.LOG_FHIR_SNOMED_NOT_FOUND)
+        for path, value_set in self._source_paths():
+            if not path.is_file():
+                logger.warning(constants.LOG_TERMINOLOGY_SOURCE_MISSING.format(path=path))
+                continue
+            yield from terminology_index.load_source(path, value_set)
+
+    def _ensure_index(self) -> None:
+        fingerprint = self._fingerprint()
+        if terminology_index.read_fingerprint(self.index_path) == fingerprint:
+            return
+        started = time.perf_counter()
+        term_count = terminology_index.build_index(self.index_path, self._records(), fingerprint)
+        logger.info(constants.LOG_TERMINOLOGY_INDEX_BUILT.format(
+            count=term_count, path=self.index_path, seconds=time.perf_counter() - started
+        ))
+
+    def _past_deadline(self) -> int:
+        return 1 if time.perf_counter() > self._deadline else 0
+
+    def _query(self, sql: str, params: Sequence) -> list:
+        return self._connection.execute(sql, params).fetchall()
+
+    def _value_set_clause(self, column: str) -> Tuple[str, Tuple[str, ...]]:
+        return f"{column} IN ({','.join('?' * len(self.value_sets))})", tuple(self.value_sets)
+
+    def _display_for(self, value_set: str, code: str) -> Optional[str]:
+        rows = self._query("SELECT display FROM concepts WHERE value_set = ? AND code = ?", (value_set, code))
+        return rows[0][0] if rows else None
+
+    def _match_code(self, code: str) -> Optional[ConceptMatch]:
+        for value_set in self.value_sets:
+            display = self._display_for(value_set, code)
+            if display:
+                return code, display
+        return None
+
+    def _match_normalized(self, normalized: str) -> Optional[Tuple[str, str]]:
+        clause, params = self._value_set_clause("value_set")
+        rows = self._query(
+            f"SELECT value_set, code FROM terms WHERE normalized = ? AND {clause} ORDER BY id LIMIT 1",
+            (normalized,) + params,
+        )
+        return rows[0] if rows else None
+
+    def _match_contained_tokens(self, tokens: List[str]) -> Optional[Tuple[str, str]]:
+        # Longest indexed term whose every token appears in the query, e.g. "room rent" in "room rent single ac".
+        clause, params = self._value_set_clause("t.value_set")
+        rows = self._query(
+            f"SELECT t.value_set, t.code FROM term_tokens tt JOIN terms t ON t.id = tt.term_id "
+            f"WHERE tt.token IN ({','.join('?' * len(tokens))}) AND {clause} "
+            f"GROUP BY t.id HAVING COUNT(*) = t.token_count ORDER BY t.token_count DESC, t.id LIMIT 1",
+            tuple(tokens) + params,
+        )
+        return rows[0] if rows else None
+
+    def _match_trigrams(self, normalized: str) -> Optional[Tuple[str, str]]:
+        query_grams = terminology_index.trigrams(normalized)
+        clause, params = self._value_set_clause("t.value_set")
+        rows = self._query(
+            f"SELECT t.value_set, t.code, COUNT(*) AS shared, t.trigram_count FROM term_trigrams tg "
+            f"JOIN terms t ON t.id = tg.term_id WHERE tg.trigram IN ({','.join('?' * len(query_grams))}) AND {clause} "
+            f"GROUP BY t.id ORDER BY shared DESC, t.id LIMIT ?",
+            tuple(query_grams) + params + (self.config.max_fuzzy_candidates,),
+        )
+        best, best_score = None, 0.0
+        for value_set, code, shared, trigram_count in rows:
+            score = 2.0 * shared / (len(query_grams) + trigram_count)
+            if score > best_score:
+                best, best_score = (value_set, code), score
+        return best if best_score >= self.config.fuzzy_threshold else None
+
+    def _lookup_uncached(self, code: str, display: str) -> Optional[ConceptMatch]:
+        with self._lock:
+            self._deadline = time.perf_counter() + self.config.lookup_timeout_ms / 1000.0
+            try:
+                if code:
+                    match = self._match_code(code)
+                    if match:
+                        return match
+                normalized = terminology_index.normalize(display) if display else ""
+                if not normalized:
+                    return None
+                hit = self._match_normalized(normalized)
+                if hit is None:
+                    hit = self._match_contained_tokens(normalized.split(" "))
+                if hit is None and len(normalized) >= self.config.min_fuzzy_length:
+                    hit = self._match_trigrams(normalized)
+                if hit is None:
+                    return None
+                value_set, matched_code = hit
+                return matched_code, self._display_for(value_set, matched_code)
+            except sqlite3.OperationalError as e:
+                logger.warning(constants.LOG_TERMINOLOGY_LOOKUP_ABORTED.format(term=display or code, error=e))
+                raise _LookupAborted from e
+
+    def lookup(self, code: Optional[str], display: Optional[str]) -> ConceptMatch:
+        s_code = str(code).strip() if code else ""
+        s_display = str(display).strip() if display else ""
+        try:
+            match = self._cached_lookup(s_code, s_display) if (s_code or s_display) else None
+        except _LookupAborted:
+            match = None
+        if match is None:
+            return code, display
+        matched_code, matched_display = match
+        return matched_code, matched_display or display
+
+    def lookup_many(self, concepts: Iterable[Tuple[Optional[str], Optional[str]]]) -> Dict[Tuple[Optional[str], Optional[str]], ConceptMatch]:
+        return {concept: self.lookup(*concept) for concept in dict.fromkeys(concepts)}
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+_service: Optional[TerminologyService] = None
+_service_pid: Optional[int] = None
+_service_lock = threading.Lock()
+
+
+def get_terminology_service() -> TerminologyService:
+    # SQLite connections must not cross a fork, so worker processes open their own.
+    global _service, _service_pid
+    if _service is None or _service_pid != os.getpid():
+        with _service_lock:
+            if _service is None or _service_pid != os.getpid():
+                _service = TerminologyService()
+                _service_pid = os.getpid()
+    return _service
@@ -0,0 +1,156 @@
+import zlib
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+from src import constants
+
+# A4 in points, with the margins most policy wordings use.
+PAGE_WIDTH = 595.0
+PAGE_HEIGHT = 842.0
+MARGIN = 56.0
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+# Average Helvetica advance as a fraction of the font size; slightly generous so wrapped lines never overrun.
+_CHAR_WIDTH = 0.52
+_LEADING = 1.35
+
+
+class Line(NamedTuple):
+    # One laid-out line: each fragment is (x offset from the left margin, text). Table rows have one per cell.
+    fragments: Tuple[Tuple[float, str], ...]
+    size: float = 10.0
+    bold: bool = False
+    space_before: float = 0.0
+
+    @property
+    def height(self) -> float:
+        return self.size * _LEADING + self.space_before
+
+
+def text_line(text: str, size: float = 10.0, bold: bool = False, indent: float = 0.0, space_before: float = 0.0) -> Line:
+    return Line(((indent, text),), size, bold, space_before)
+
+
+def wrap(text: str, size: float = 10.0, width: float = TEXT_WIDTH) -> List[str]:
+    limit = max(1, int(width / (size * _CHAR_WIDTH)))
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > limit:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines or [""]
+
+
+def paginate(lines: Sequence[Line]) -> List[List[Line]]:
+    pages: List[List[Line]] = [[]]
+    used = 0.0
+    usable = PAGE_HEIGHT - 2 * MARGIN
+    for line in lines:
+        # Vertical space before a heading is dropped at the top of a page.
+        height = line.height if pages[-1] else line.height - line.space_before
+        if pages[-1] and used + height > usable:
+            pages.append([])
+            used, height = 0.0, line.height - line.space_before
+        pages[-1].append(line)
+        used += height
+    return pages
+
+
+def _escape(text: str) -> bytes:
+    encoded = text.encode("latin-1", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class _PDFBuilder:
+
+    # Just enough of PDF 1.4 to produce files pdftext, pypdfium2 and Marker read: numbered objects,
+    # Flate-compressed streams, a flat page tree and a classic xref table.
+
+    def __init__(self):
+        self._objects: List[Optional[bytes]] = [None, None]
+        self._pages: List[int] = []
+
+    def add(self, body: bytes) -> int:
+        self._objects.append(body)
+        return len(self._objects)
+
+    def stream(self, dictionary: bytes, data: bytes) -> int:
+        compressed = zlib.compress(data, 6)
+        return self.add(b"<< " + dictionary + b" /Filter /FlateDecode /Length %d >>\nstream\n" % len(compressed) + compressed + b"\nendstream")
+
+    def page(self, content: int, resources: bytes, width: float = PAGE_WIDTH, height: float = PAGE_HEIGHT) -> None:
+        self._pages.append(self.add(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources %s /Contents %d 0 R >>"
+            % (width, height, resources, content)
+        ))
+
+    def write(self, path: Path) -> None:
+        self._objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+        kids = b" ".join(b"%d 0 R" % number for number in self._pages)
+        self._objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages))
+        output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self._objects, start=1):
+            offsets.append(len(output))
+            output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        xref = len(output)
+        output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(self._objects) + 1)
+        output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self._objects) + 1, xref)
+        path.write_bytes(bytes(output))
+
+
+def write_text_pdf(path: Path, pages: Sequence[Sequence[Line]]) -> None:
+    # Text is drawn with the standard Helvetica fonts (not embedded), so every page has a real text layer.
+    builder = _PDFBuilder()
+    regular = builder.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    bold = builder.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+    resources = b"<< /Font << /F1 %d 0 R /F2 %d 0 R >> >>" % (regular, bold)
+    for page in pages:
+        y = PAGE_HEIGHT - MARGIN
+        commands = []
+        for index, line in enumerate(page):
+            y -= line.height if index else line.height - line.space_before
+            font = b"/F2" if line.bold else b"/F1"
+            for x, text in line.fragments:
+                commands.append(b"BT %s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (font, line.size, MARGIN + x, y, _escape(text)))
+        builder.page(builder.stream(b"", b"\n".join(commands)), resources)
+    builder.write(path)
+
+
+def rasterize_pdf(source: Path, path: Path, dpi: int = 150) -> None:
+    # Renders every page to an 8-bit greyscale image and writes a PDF of just those images: what a scanner
+    # produces, with no text layer, so pdftext finds nothing and conversion falls through to Marker.
+    if pypdfium2 is None:
+        raise RuntimeError(constants.ERROR_MESSAGE_SYNTHETIC_RASTERIZE)
+    builder = _PDFBuilder()
+    document = pypdfium2.PdfDocument(str(source))
+    try:
+        for page in document:
+            width, height = page.get_size()
+            bitmap = page.render(scale=dpi / 72, grayscale=True)
+            pixels = bytes(bitmap.buffer)
+            if bitmap.stride != bitmap.width:
+                pixels = b"".join(
+                    pixels[row * bitmap.stride:row * bitmap.stride + bitmap.width] for row in range(bitmap.height)
+                )
+            image = builder.stream(
+                b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray /BitsPerComponent 8"
+                % (bitmap.width, bitmap.height),
+                pixels,
+            )
+            content = builder.stream(b"", b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (width, height))
+            builder.page(content, b"<< /XObject << /Im0 %d 0 R >> >>" % image, width, height)
+            bitmap.close()
+            page.close()
+    finally:
+        document.close()
+    builder.write(path)
@@ -0,0 +1,526 @@
+import json
+import random
+from datetime import date, timedelta
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.config import ROOT_DIR, settings
+from src.schemas.insurance_schemas import INSURANCE_DATA_ADAPTER
+from src.synthetic.pdf_writer import (
+    MARGIN, PAGE_HEIGHT, TEXT_WIDTH, Line, paginate, rasterize_pdf, text_line, wrap, write_text_pdf,
+)
+from src import constants
+
+with open(ROOT_DIR / "src" / "core" / "snomed_dictionary.json", "r", encoding="utf-8") as _f:
+    _SNOMED = json.load(_f)
+
+_INSURER_NAMES = ("Bharat", "Sahyadri", "Ganga", "Himalaya", "Coromandel", "Deccan", "Konark", "Narmada", "Vindhya", "Kaveri")
+_INSURER_KINDS = ("General Insurance", "Health Insurance", "Assurance")
+_PLAN_WORDS = ("Arogya", "Suraksha", "Swasthya", "Kavach", "Raksha", "Sanjeevani", "Parivar", "Jeevan")
+_PLAN_TIERS = ("Plus", "Premier", "Supreme", "Secure", "Gold", "Essential")
+_TPA_PARTS = (("Medi", "Vita", "Care", "Health", "Sanjivani"), ("Assist", "Link", "Serve", "Path", "Bridge"))
+_CONTACT_PURPOSES = ("Claims Helpline", "Customer Service", "Cashless Authorisation", "Senior Citizen Helpdesk")
+_NETWORK_KINDS = ("Network Hospitals", "Preferred Provider Network", "Value Network", "Cashless Partner Hospitals")
+_KYC_DOCUMENTS = (
+    ("POI", "Proof of Identity", "ADN", "Aadhaar Card"),
+    ("POI", "Proof of Identity", "PAN", "PAN Card"),
+    ("POI", "Proof of Identity", "PPN", "Passport"),
+    ("POA", "Proof of Address", "ADN", "Aadhaar Card"),
+    ("POA", "Proof of Address", "DL", "Driving Licence"),
+    ("POA", "Proof of Address", "VID", "Voter ID Card"),
+)
+_WAITING_CONDITIONS = (
+    "cataract", "benign prostatic hypertrophy", "hernia of all types", "joint replacement surgery", "gall bladder stones",
+    "sinusitis and related disorders", "haemorrhoids and fistulae", "varicose veins", "non-infective arthritis", "kidney stones",
+)
+
+# (benefit, SNOMED CT benefit type it maps to or "", coverage it is listed under, limit units it may carry)
+_BENEFITS = (
+    ("Inpatient Hospitalisation", "737481003", "Inpatient Care", ("INR",)),
+    ("Room Rent", "568291000005106", "Inpatient Care", ("INR", "%")),
+    ("ICU Charges", "272181003", "Inpatient Care", ("INR", "%")),
+    ("Doctor Consultation", "408443003", "Inpatient Care", ("INR",)),
+    ("Surgical Procedures", "387713003", "Inpatient Care", ("INR",)),
+    ("Pharmacy", "763158003", "Inpatient Care", ("INR",)),
+    ("Laboratory Tests", "15220000", "Inpatient Care", ("INR",)),
+    ("Pathology and Radiology Expenses", "108252007", "Inpatient Care", ("INR",)),
+    ("Organ Donor Expenses", "51032003", "Inpatient Care", ("INR",)),
+    ("Emergency Care", "310000008", "Inpatient Care", ("INR",)),
+    ("Pre-hospitalisation Expenses", "", "Pre and Post Hospitalisation", ("Days",)),
+    ("Post-hospitalisation Expenses", "", "Pre and Post Hospitalisation", ("Days",)),
+    ("Road Ambulance", "465341007", "Ambulance Services", ("INR",)),
+    ("Air Ambulance", "73957001", "Ambulance Services", ("INR", "%")),
+    ("Day Care Treatment", "737850002", "Day Care", ("INR", "%")),
+    ("Cataract Surgery", "", "Day Care", ("INR",)),
+    ("Dialysis", "", "Day Care", ("INR",)),
+    ("Chemotherapy", "", "Day Care", ("INR",)),
+    ("Radiotherapy", "", "Day Care", ("INR",)),
+    ("Lithotripsy", "", "Day Care", ("INR",)),
+    ("Tonsillectomy", "", "Day Care", ("INR",)),
+    ("Hernia Repair", "", "Day Care", ("INR",)),
+    ("Coronary Angiography", "", "Day Care", ("INR",)),
+    ("Septoplasty", "", "Day Care", ("INR",)),
+    ("Hysteroscopy", "", "Day Care", ("INR",)),
+    ("Oral Chemotherapy", "266719004", "Modern Treatments", ("INR", "%")),
+    ("Stem Cell Transplantation", "1269349006", "Modern Treatments", ("INR", "%")),
+    ("Robotic Surgery", "", "Modern Treatments", ("INR", "%")),
+    ("Balloon Sinuplasty", "", "Modern Treatments", ("INR", "%")),
+    ("Deep Brain Stimulation", "", "Modern Treatments", ("INR", "%")),
+    ("Intra Vitreal Injections", "", "Modern Treatments", ("INR", "%")),
+    ("Immunotherapy", "", "Modern Treatments", ("INR", "%")),
+    ("Ayurveda Treatment", "1259939000", "AYUSH Treatment", ("INR", "%")),
+    ("Homeopathy Treatment", "1259938008", "AYUSH Treatment", ("INR", "%")),
+    ("Unani Treatment", "1259218001", "AYUSH Treatment", ("INR", "%")),
+    ("Siddha Treatment", "1259219009", "AYUSH Treatment", ("INR", "%")),
+    ("Yoga and Naturopathy", "1259940003", "AYUSH Treatment", ("INR", "%")),
+    ("Home Care Treatment", "60689008", "Domiciliary and Home Care", ("INR", "Days")),
+    ("Domiciliary Hospitalisation", "", "Domiciliary and Home Care", ("INR", "Days")),
+    ("Tele Consultation", "11429006", "Tele Consultation", ("INR",)),
+)
+# Variants used to extend the catalogue for plans with hundreds of benefits, as zone- and SI-wise schedules do.
+_BENEFIT_QUALIFIERS = (
+    "", " - Metro Cities", " - Non-Metro Cities", " - Zone A", " - Zone B", " - Zone C",
+    " - Sum Insured up to 5 Lakh", " - Sum Insured above 5 Lakh", " - Senior Citizens",
+)
+_COVERAGE_CONDITIONS = {
+    "Inpatient Care": "Hospitalisation for a minimum period of 24 consecutive hours",
+    "Pre and Post Hospitalisation": "Expenses related to an admissible inpatient hospitalisation claim",
+    "Ambulance Services": "Transfer to the nearest hospital in an emergency",
+    "Day Care": "Treatment taken in a Day Care Centre or hospital for less than 24 hours",
+    "Modern Treatments": "Treatment taken as part of an admissible hospitalisation",
+    "AYUSH Treatment": "Inpatient treatment in a government recognised AYUSH hospital",
+    "Domiciliary and Home Care": "Treatment on the written advice of a Medical Practitioner",
+    "Tele Consultation": "",
+}
+_COST_TYPES = ("copay", "deductible", "fullcoverage")
+
+_FILLER_SUBJECTS = (
+    "The Company", "The Insured Person", "The Policyholder", "The TPA", "Any claim under this Policy",
+    "The Network Provider", "The treating Medical Practitioner", "The Nominee",
+)
+_FILLER_VERBS = ("shall", "may", "will not", "must")
+_FILLER_PREDICATES = (
+    "indemnify the Insured Person for Reasonable and Customary Charges incurred during the Policy Period",
+    "be liable to make any payment for claims arising out of non-disclosure of material facts",
+    "submit the claim documents within thirty days of the date of discharge from the hospital",
+    "seek a second medical opinion from a Medical Practitioner of its choice",
+    "settle or reject a claim within thirty days of receipt of the last necessary document",
+    "intimate the Company or the TPA at least forty eight hours prior to a planned admission",
+    "be bound by the decision of the Company on the admissibility of any expense",
+    "provide the Company with all reports, records and information it may reasonably require",
+    "be treated as a continuation of the cover for the purpose of waiting periods",
+    "pay interest at a rate two percent above the bank rate on any delayed settlement",
+)
+_FILLER_CONDITIONS = (
+    "subject to the terms, conditions and exclusions of this Policy",
+    "provided that the hospitalisation is Medically Necessary",
+    "in accordance with the limits stated in the Policy Schedule",
+    "unless otherwise specified in the Policy Schedule",
+    "as per the guidelines issued by the Authority from time to time",
+    "within the Sum Insured available at the time of the claim",
+)
+_DEFINED_TERMS = (
+    "Accident", "Any One Illness", "AYUSH Hospital", "Cashless Facility", "Condition Precedent", "Congenital Anomaly",
+    "Contribution", "Day Care Centre", "Dental Treatment", "Disclosure to Information Norm", "Emergency Care",
+    "Grace Period", "Hospital", "Hospitalisation", "Illness", "Injury", "Inpatient Care", "Intensive Care Unit",
+    "Maternity Expenses", "Medical Advice", "Medical Practitioner", "Network Provider", "Notification of Claim",
+    "OPD Treatment", "Pre-Existing Disease", "Qualified Nurse", "Reasonable and Customary Charges", "Room Rent",
+    "Surgical Operation", "Unproven Treatment",
+)
+
+# Junk section title for a pruner keyword; any other keyword gets a title-cased heading of its own.
+_JUNK_TITLES = {
+    "table of contents": "Table of Contents",
+    "definition": "Definitions",
+    "free look": "Free Look Period",
+    "redressal": "Grievance Redressal Procedure",
+    "annexure": "Annexure I - List of Day Care Procedures",
+    "appendix": "Appendix - Offices of the Insurance Ombudsman",
+    "moratorium": "Moratorium Period",
+    "withdrawal": "Withdrawal of Product",
+}
+# Sections that make up most of the boilerplate in real wordings get a bigger share of the junk pages.
+_JUNK_WEIGHTS = {"table of contents": 0, "definition": 6, "annexure": 4, "appendix": 3, "redressal": 2}
+_FRONT_MATTER = ("table of contents", "preamble", "introduction", "glossary", "definition")
+
+_HEADING_SIZES = {1: (16.0, 10.0), 2: (13.0, 9.0), 3: (11.0, 6.0)}
+_TABLE_FONT = 9.0
+_COLUMN_GAP = 12.0
+
+
+class _Section:
+
+    # A run of blocks under one heading: ("heading", level, text), ("para", text), ("bullets", items)
+    # or ("table", header, rows). Junk sections are the ones the pruner is expected to drop.
+
+    def __init__(self, title: str, level: int = 2, junk: bool = False, weight: int = 1):
+        self.junk = junk
+        self.weight = weight
+        self.blocks: List[Tuple] = [("heading", level, title)]
+
+    def heading(self, level: int, text: str) -> None:
+        self.blocks.append(("heading", level, text))
+
+    def para(self, text: str) -> None:
+        self.blocks.append(("para", text))
+
+    def bullets(self, items: Sequence[str]) -> None:
+        self.blocks.append(("bullets", list(items)))
+
+    def table(self, header: Sequence[str], rows: Sequence[Sequence[str]]) -> None:
+        self.blocks.append(("table", tuple(header), [tuple(row) for row in rows]))
+
+
+def _block_markdown(block: Tuple) -> str:
+    kind = block[0]
+    if kind == "heading":
+        return f"{'#' * block[1]} {block[2]}"
+    if kind == "para":
+        return block[1]
+    if kind == "bullets":
+        return "\n".join(f"- {item}" for item in block[1])
+    header, rows = block[1], block[2]
+    lines = ["| " + " | ".join(header) + " |", "|" + "|".join(" --- " for _ in header) + "|"]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def _table_lines(header: Tuple[str, ...], rows: List[Tuple[str, ...]]) -> List[Line]:
+    # Cells sit at fixed column offsets; the font shrinks for wide tables rather than wrapping cells.
+    widest = [max(len(row[column]) for row in [header, *rows]) for column in range(len(header))]
+    size = _TABLE_FONT
+    while size > 6.0 and sum(widest) * size * 0.52 + _COLUMN_GAP * (len(widest) - 1) > TEXT_WIDTH:
+        size -= 0.5
+    offsets, x = [], 0.0
+    for width in widest:
+        offsets.append(x)
+        x += width * size * 0.52 + _COLUMN_GAP
+    lines = [Line(tuple(zip(offsets, header)), size, True, 6.0)]
+    lines.extend(Line(tuple(zip(offsets, row)), size) for row in rows)
+    return lines
+
+
+def _block_lines(block: Tuple) -> List[Line]:
+    kind = block[0]
+    if kind == "heading":
+        size, space = _HEADING_SIZES[block[1]]
+        wrapped = wrap(block[2], size)
+        return [text_line(text, size, True, space_before=space if index == 0 else 0.0) for index, text in enumerate(wrapped)]
+    if kind == "para":
+        wrapped = wrap(block[1])
+        return [text_line(text, space_before=4.0 if index == 0 else 0.0) for index, text in enumerate(wrapped)]
+    if kind == "bullets":
+        lines = []
+        for item in block[1]:
+            for index, text in enumerate(wrap(item, width=TEXT_WIDTH - 12.0)):
+                lines.append(text_line(f"- {text}" if index == 0 else text, indent=0.0 if index == 0 else 12.0,
+                                       space_before=2.0 if index == 0 else 0.0))
+        return lines
+    return _table_lines(block[1], block[2])
+
+
+def _height(blocks: Sequence[Tuple]) -> float:
+    return sum(line.height for block in blocks for line in _block_lines(block))
+
+
+class _Filler:
+
+    # Deterministic legal-register prose, so padding reads like a wording without stating any extractable fact.
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.clause = 0
+
+    def sentence(self) -> str:
+        rng = self.rng
+        return f"{rng.choice(_FILLER_SUBJECTS)} {rng.choice(_FILLER_VERBS)} {rng.choice(_FILLER_PREDICATES)}, {rng.choice(_FILLER_CONDITIONS)}."
+
+    def paragraph(self) -> str:
+        return " ".join(self.sentence() for _ in range(self.rng.randint(3, 6)))
+
+    def definition(self) -> str:
+        self.clause += 1
+        term = self.rng.choice(_DEFINED_TERMS)
+        return f"{self.clause}. {term} means {self.sentence()[0].lower()}{self.sentence()[1:]}"
+
+
+class SyntheticPolicy(NamedTuple):
+    name: str
+    markdown: str
+    payload: Dict[str, Any]
+    lines: List[Line]
+    pages: int
+    junk_headings: List[str]
+
+
+def _amount(rng: random.Random, low: int, high: int, step: int) -> str:
+    return str(rng.randrange(low, high + 1, step))
+
+
+def _limit(rng: random.Random, unit: str) -> str:
+    if unit == "Days":
+        return str(rng.choice((15, 30, 45, 60, 90, 120, 180)))
+    if unit == "%":
+        return str(rng.choice((1, 2, 5, 10, 20, 25, 50, 100)))
+    return _amount(rng, 1000, 500000, 500)
+
+
+def _benefit_names(count: int, rng: random.Random) -> List[Tuple[str, str, str, Tuple[str, ...]]]:
+    combinations = list(product(_BENEFITS, _BENEFIT_QUALIFIERS))
+    # The plain catalogue comes first so small plans look like ordinary ones; variants are mixed in after.
+    plain, variants = combinations[:len(_BENEFITS)], combinations[len(_BENEFITS):]
+    rng.shuffle(plain)
+    rng.shuffle(variants)
+    ordered = plain + variants
+    benefits = []
+    for index in range(count):
+        (name, code, coverage, units), qualifier = ordered[index % len(ordered)]
+        schedule = index // len(ordered)
+        suffix = f"{qualifier} - Schedule {schedule + 1}" if schedule else qualifier
+        benefits.append((f"{name}{suffix}", code, coverage, units))
+    return benefits
+
+
+def _build_payload(rng: random.Random, benefit_count: int, cost_count: int) -> Dict[str, Any]:
+    stem = rng.choice(_INSURER_NAMES)
+    slug = stem.lower()
+    insurer = f"{stem} {rng.choice(_INSURER_KINDS)} Company Limited"
+    plan_name = f"{stem} {rng.choice(_PLAN_WORDS)} {rng.choice(_PLAN_TIERS)}"
+    type_code = rng.choice(("01", "01", "01", "02"))
+    start = date(2024, 1, 1) + timedelta(days=rng.randrange(0, 730))
+    phone = f"1800-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}"
+
+    coverages: Dict[str, Dict[str, Any]] = {}
+    for name, code, coverage, units in _benefit_names(benefit_count, rng):
+        unit = rng.choice(units)
+        entry = coverages.setdefault(coverage, {
+            "typeDisplay": coverage, "condition": _COVERAGE_CONDITIONS[coverage], "benefits": [],
+        })
+        entry["benefits"].append({"typeCode": code, "typeDisplay": name, "limitValue": _limit(rng, unit), "limitUnit": unit})
+
+    plan_types = [("01", _SNOMED["planType"]["01"])]
+    if rng.random() < 0.5:
+        plan_types.append(("02", _SNOMED["planType"]["02"]))
+    categories = sorted(_SNOMED["benefitType"].items())
+    plans = [{"planTypeCode": code, "planTypeDisplay": display, "specificCosts": []} for code, display in plan_types]
+    for index in range(cost_count):
+        code, display = categories[index % len(categories)]
+        round_number = index // len(categories)
+        cost_type = rng.choice(_COST_TYPES)
+        if cost_type == "copay":
+            value, unit = str(rng.choice((5, 10, 15, 20, 25, 30))), "%"
+        elif cost_type == "deductible":
+            value, unit = _amount(rng, 5000, 100000, 5000), "INR"
+        else:
+            value, unit = "100", "%"
+        plans[index % len(plans)]["specificCosts"].append({
+            "categoryCode": code, "categoryDisplay": display, "benefitTypeCode": code,
+            "benefitTypeDisplay": f"{display} - Tier {round_number + 1}" if round_number else display,
+            "costType": cost_type, "costValue": value, "costUnit": unit,
+        })
+
+    ped_months = rng.choice((12, 24, 36, 48))
+    exclusions = [{
+        "categoryCode": "Excl01", "categoryDisplay": "Pre-Existing Diseases",
+        "statement": f"Expenses related to the treatment of a pre-existing disease and its direct complications shall be "
+                     f"excluded until the expiry of {ped_months} months of continuous coverage after the date of inception of the first policy.",
+    }]
+    for condition in rng.sample(_WAITING_CONDITIONS, rng.randint(1, 4)):
+        months = rng.choice((12, 24))
+        exclusions.append({
+            "categoryCode": "Excl02", "categoryDisplay": "Specified Disease/Procedure Waiting Period",
+            "statement": f"Expenses related to the treatment of {condition} shall be excluded until the expiry of {months} months of continuous coverage.",
+        })
+
+    tpa = None
+    if rng.random() < 0.7:
+        tpa = {
+            "name": f"{rng.choice(_TPA_PARTS[0])}{rng.choice(_TPA_PARTS[1])} TPA Services Private Limited",
+            "identifier": f"IRDAI/TPA/{rng.randint(1, 99):03d}",
+        }
+    payload = {
+        "bundleType": "InsurancePlan",
+        "organisation": {"name": insurer, "phone": phone, "email": f"care@{slug}insurance.in", "website": f"www.{slug}insurance.in"},
+        "tpaOrganisation": tpa,
+        "insurancePlan": {
+            "status": "active", "name": plan_name,
+            "alias": [f"{stem} {word} Policy" for word in rng.sample(_PLAN_WORDS, rng.randint(0, 2))],
+            "language": "en-IN", "typeCode": type_code, "typeDisplay": _SNOMED["insurancePlanType"][type_code],
+            "periodStart": start.isoformat(), "periodEnd": (start + timedelta(days=364)).isoformat(),
+            "coverageArea": [rng.choice(("India", "Pan India"))],
+            "networks": [f"{stem} {kind}" for kind in rng.sample(_NETWORK_KINDS, rng.randint(1, 3))],
+            "contacts": [
+                {"purpose": purpose, "name": f"{purpose} Desk", "phone": f"1800-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+                 "email": f"{purpose.split()[0].lower()}@{slug}insurance.in"}
+                for purpose in rng.sample(_CONTACT_PURPOSES, rng.randint(1, 3))
+            ],
+            "supportingInfoRequirements": [
+                {"categoryCode": category, "categoryDisplay": category_display, "documentCode": code, "documentDisplay": display}
+                for category, category_display, code, display in rng.sample(_KYC_DOCUMENTS, rng.randint(2, 4))
+            ],
+            "exclusions": exclusions,
+            "coverages": list(coverages.values()),
+            "plans": plans,
+        },
+    }
+    # Round-trips through the API schema so the ground truth is exactly what a perfect extraction returns.
+    return INSURANCE_DATA_ADAPTER.validate_python(payload).model_dump()
+
+
+def _fact_sections(payload: Dict[str, Any], uin: str) -> List[_Section]:
+    organisation, plan, tpa = payload["organisation"], payload["insurancePlan"], payload["tpaOrganisation"]
+    schedule = _Section("Policy Schedule")
+    schedule.para(f"Insurer: {organisation['name']}. Customer care: {organisation['phone']}, {organisation['email']}, {organisation['website']}.")
+    rows = [
+        ("Product", plan["name"]), ("UIN", uin), ("Product type", plan["typeDisplay"]),
+        ("Policy period", f"{plan['periodStart']} to {plan['periodEnd']}"), ("Coverage area", ", ".join(plan["coverageArea"])),
+        ("Hospital networks", ", ".join(plan["networks"])),
+    ]
+    if tpa:
+        rows.append(("Third Party Administrator", f"{tpa['name']} (Licence {tpa['identifier']})"))
+    schedule.table(("Particulars", "Details"), rows)
+
+    benefits = _Section("Benefits Covered")
+    for coverage in plan["coverages"]:
+        benefits.heading(3, coverage["typeDisplay"])
+        if coverage["condition"]:
+            benefits.para(f"Condition: {coverage['condition']}.")
+        benefits.table(
+            ("Benefit", "Limit", "Unit"),
+            [(benefit["typeDisplay"], benefit["limitValue"], benefit["limitUnit"]) for benefit in coverage["benefits"]],
+        )
+
+    exclusions = _Section("Waiting Periods and Exclusions")
+    exclusions.bullets(f"Code {item['categoryCode']} - {item['categoryDisplay']}: {item['statement']}" for item in plan["exclusions"])
+
+    costs = _Section("Co-payment and Deductibles")
+    for option in plan["plans"]:
+        costs.heading(3, f"{option['planTypeDisplay']} Plan")
+        costs.table(
+            ("Category", "Benefit", "Cost type", "Value", "Unit"),
+            [(cost["categoryDisplay"], cost["benefitTypeDisplay"], cost["costType"], cost["costValue"], cost["costUnit"])
+             for cost in option["specificCosts"]],
+        )
+
+    claims = _Section("Claims Procedure")
+    claims.para("The following KYC documents must be submitted with every claim:")
+    claims.bullets(f"{item['categoryDisplay']}: {item['documentDisplay']} ({item['documentCode']})" for item in plan["supportingInfoRequirements"])
+
+    contacts = _Section("Contact Details")
+    contacts.bullets(f"{contact['purpose']} - {contact['name']}: {contact['phone']}, {contact['email']}" for contact in plan["contacts"])
+    return [schedule, benefits, exclusions, costs, claims, contacts]
+
+
+def _junk_sections(keywords: Sequence[str], filler: _Filler) -> Tuple[List[_Section], List[_Section]]:
+    front, back = [], []
+    for keyword in keywords:
+        title = _JUNK_TITLES.get(keyword, keyword.title())
+        section = _Section(title, junk=True, weight=_JUNK_WEIGHTS.get(keyword, 1))
+        if keyword == "definition":
+            section.heading(3, "Standard Definitions")
+        section.para(filler.definition() if keyword == "definition" else filler.paragraph())
+        (front if keyword in _FRONT_MATTER else back).append(section)
+    return front, back
+
+
+def _render(title: List[Tuple], sections: List[_Section]) -> Tuple[str, List[Line]]:
+    blocks = title + [block for section in sections for block in section.blocks]
+    markdown = "\n\n".join(_block_markdown(block) for block in blocks) + "\n"
+    return markdown, [line for block in blocks for line in _block_lines(block)]
+
+
+def _pad(sections: List[_Section], height: float, filler: _Filler) -> None:
+    # Adds prose to the sections, by weight, until roughly `height` points of text have been added.
+    sections = [section for section in sections if section.weight]
+    if not sections:
+        return
+    weights = [section.weight for section in sections]
+    while height > 0:
+        section = filler.rng.choices(sections, weights)[0]
+        block = ("para", filler.definition() if section.blocks[0][2] == _JUNK_TITLES["definition"] else filler.paragraph())
+        section.blocks.append(block)
+        height -= _height([block])
+
+
+def generate_policy(
+    index: int,
+    seed: int = 0,
+    pages: int = 20,
+    benefits: int = 40,
+    costs: Optional[int] = None,
+    junk_ratio: float = 0.4,
+    junk_keywords: Optional[Sequence[str]] = None,
+) -> SyntheticPolicy:
+    # The same (seed, index) always produces the same document. junk_ratio is the share of the page budget
+    # spent in sections headed by pruner keywords; fact-bearing sections never use those keywords.
+    rng = random.Random(f"{seed}:{index}")
+    filler = _Filler(rng)
+    keywords = list(settings.policy_pruner.junk_keywords if junk_keywords is None else junk_keywords)
+    payload = _build_payload(rng, benefits, max(1, benefits // 4) if costs is None else costs)
+    uin = f"{payload['organisation']['name'][:3].upper()}HLIP{rng.randint(10, 99)}{rng.randint(100, 999)}V01{rng.randint(2122, 2526)}"
+    plan = payload["insurancePlan"]
+    title: List[Tuple] = [("heading", 1, plan["name"]), ("para", f"Policy Wording issued by {payload['organisation']['name']}. UIN: {uin}.")]
+    if plan["alias"]:
+        title.append(("para", f"Also marketed as {' and '.join(plan['alias'])}."))
+
+    facts = _fact_sections(payload, uin)
+    front, back = _junk_sections(keywords, filler)
+    # Pages are counted in points of text: the fact sections are fixed, and junk and kept prose fill most of
+    # the rest. Page breaks waste some space, so the last pages are topped up against the real layout.
+    usable = PAGE_HEIGHT - 2 * MARGIN
+    budget = pages * usable * 0.9
+    fixed = _height(title) + sum(_height(section.blocks) for section in facts + front + back)
+    junk_target = budget * junk_ratio - sum(_height(section.blocks) for section in front + back)
+    _pad(front + back, junk_target, filler)
+    # Contacts close the document and stay short.
+    kept = facts[:-1]
+    _pad(kept, budget - fixed - max(junk_target, 0.0), filler)
+
+    sections = front + facts[:-1] + back + facts[-1:]
+    for section in sections:
+        if section.junk and section.weight == 0:
+            # The table of contents lists the other sections instead of carrying prose.
+            section.blocks[1:] = [("bullets", [
+                f"{number}. {other.blocks[0][2]}" for number, other in enumerate((other for other in sections if other is not section), 1)
+            ])]
+    markdown, lines = _render(title, sections)
+    laid_out = paginate(lines)
+    junk = [section for section in front + back if section.weight]
+    while len(laid_out) < pages:
+        _pad(junk if junk and rng.random() < junk_ratio else kept, (pages - len(laid_out)) * usable * 0.5 + 1.0, filler)
+        markdown, lines = _render(title, sections)
+        laid_out = paginate(lines)
+    name = f"synthetic_{seed}_{index:05d}"
+    return SyntheticPolicy(name, markdown, payload, lines, len(laid_out), [section.blocks[0][2] for section in front + back])
+
+
+def write_policy(policy: SyntheticPolicy, output_dir: Path, formats: Sequence[str], scan_dpi: int = 150) -> Dict[str, Any]:
+    files = {}
+    truth_dir = output_dir / constants.SYNTHETIC_TRUTH_DIRNAME
+    truth_dir.mkdir(parents=True, exist_ok=True)
+    files["truth"] = truth_dir / f"{policy.name}.json"
+    files["truth"].write_text(json.dumps(policy.payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    if constants.SYNTHETIC_FORMAT_MARKDOWN in formats:
+        (output_dir / constants.SYNTHETIC_FORMAT_MARKDOWN).mkdir(exist_ok=True)
+        files[constants.SYNTHETIC_FORMAT_MARKDOWN] = output_dir / constants.SYNTHETIC_FORMAT_MARKDOWN / f"{policy.name}.md"
+        files[constants.SYNTHETIC_FORMAT_MARKDOWN].write_text(policy.markdown, encoding="utf-8")
+    if constants.SYNTHETIC_FORMAT_PDF in formats or constants.SYNTHETIC_FORMAT_SCAN in formats:
+        (output_dir / constants.SYNTHETIC_FORMAT_PDF).mkdir(exist_ok=True)
+        files[constants.SYNTHETIC_FORMAT_PDF] = output_dir / constants.SYNTHETIC_FORMAT_PDF / f"{policy.name}.pdf"
+        write_text_pdf(files[constants.SYNTHETIC_FORMAT_PDF], paginate(policy.lines))
+    if constants.SYNTHETIC_FORMAT_SCAN in formats:
+        (output_dir / constants.SYNTHETIC_FORMAT_SCAN).mkdir(exist_ok=True)
+        files[constants.SYNTHETIC_FORMAT_SCAN] = output_dir / constants.SYNTHETIC_FORMAT_SCAN / f"{policy.name}.pdf"
+        rasterize_pdf(files[constants.SYNTHETIC_FORMAT_PDF], files[constants.SYNTHETIC_FORMAT_SCAN], scan_dpi)
+        if constants.SYNTHETIC_FORMAT_PDF not in formats:
+            files.pop(constants.SYNTHETIC_FORMAT_PDF).unlink()
+    plan = policy.payload["insurancePlan"]
+    return {
+        "name": policy.name,
+        "pages": policy.pages,
+        "chars": len(policy.markdown),
+        "benefits": sum(len(coverage["benefits"]) for coverage in plan["coverages"]),
+        "costs": sum(len(option["specificCosts"]) for option in plan["plans"]),
+        "files": {kind: str(path.relative_to(output_dir)) for kind, path in files.items()},
+    }
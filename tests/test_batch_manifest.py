@@ -0,0 +1,121 @@
+"""
+Tests for resumable batch runs — completed inputs are skipped, partial ones
+resume from their cached stage, and content or fingerprint changes reprocess.
+"""
+import asyncio
+import json
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.batch.manifest import BatchManifest
+from src.batch.pipeline import run_pipeline
+from src.batch.stages import ConvertedDocument
+from src import constants
+
+FINGERPRINTS = {
+    constants.BATCH_STAGE_CONVERT: "c" * 64,
+    constants.BATCH_STAGE_EXTRACT: "e" * 64,
+    constants.BATCH_STAGE_WRITE: "w" * 64,
+}
+
+
+class TestBatchManifest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.input_dir = self.root / "input"
+        self.output_dir = self.root / "output"
+        self.input_dir.mkdir()
+        self.output_dir.mkdir()
+        self.sources = []
+        for name in ("a", "b", "c"):
+            path = self.input_dir / f"{name}.pdf"
+            path.write_bytes(f"%PDF {name}".encode())
+            self.sources.append(path)
+        self.calls = {stage: [] for stage in FINGERPRINTS}
+        self.fail_extract = set()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run(self, fingerprints=FINGERPRINTS, skip_completed=True):
+        def convert(path):
+            self.calls[constants.BATCH_STAGE_CONVERT].append(path.stem)
+            return ConvertedDocument(f"markdown {path.read_text()}", 1)
+
+        async def extract(path, converted):
+            self.calls[constants.BATCH_STAGE_EXTRACT].append(path.stem)
+            if path.stem in self.fail_extract:
+                raise ValueError("invalid LLM output")
+            return {"text": converted[0]}
+
+        def write(path, extracted):
+            self.calls[constants.BATCH_STAGE_WRITE].append(path.stem)
+            output = self.output_dir / f"{path.stem}.json"
+            output.write_text(json.dumps(extracted))
+            return [output]
+
+        async def run():
+            manifest = BatchManifest(self.output_dir, fingerprints, skip_completed=skip_completed)
+            try:
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    return await run_pipeline(
+                        self.sources, convert, extract, write, convert_executor=executor,
+                        convert_workers=1, llm_concurrency=2,
+                        resume=manifest.resume, on_result=manifest.on_result, on_failure=manifest.on_failure,
+                    )
+            finally:
+                manifest.close()
+
+        for calls in self.calls.values():
+            calls.clear()
+        return asyncio.run(run())
+
+    def test_completed_inputs_are_skipped(self):
+        self.assertEqual(self._run().succeeded, 3)
+        stats = self._run()
+        self.assertEqual((stats.succeeded, stats.skipped), (0, 3))
+        self.assertEqual(self.calls[constants.BATCH_STAGE_CONVERT], [])
+
+    def test_failed_extraction_resumes_after_conversion(self):
+        self.fail_extract = {"b"}
+        stats = self._run()
+        self.assertEqual(stats.succeeded, 2)
+
+        self.fail_extract = set()
+        stats = self._run()
+        self.assertEqual((stats.succeeded, stats.skipped), (1, 2))
+        self.assertEqual(self.calls[constants.BATCH_STAGE_CONVERT], [])
+        self.assertEqual(self.calls[constants.BATCH_STAGE_EXTRACT], ["b"])
+
+    def test_changed_content_is_reprocessed(self):
+        self._run()
+        self.sources[0].write_bytes(b"%PDF a, revised")
+        stats = self._run()
+        self.assertEqual((stats.succeeded, stats.skipped), (1, 2))
+        self.assertEqual(self.calls[constants.BATCH_STAGE_CONVERT], ["a"])
+
+    def test_deleted_output_is_rewritten_from_cached_extraction(self):
+        self._run()
+        (self.output_dir / "c.json").unlink()
+        self._run()
+        self.assertEqual(self.calls[constants.BATCH_STAGE_EXTRACT], [])
+        self.assertEqual(self.calls[constants.BATCH_STAGE_WRITE], ["c"])
+
+    def test_fingerprint_change_invalidates_downstream_stages(self):
+        self._run()
+        self._run(dict(FINGERPRINTS, **{constants.BATCH_STAGE_EXTRACT: "f" * 64, constants.BATCH_STAGE_WRITE: "x" * 64}))
+        self.assertEqual(self.calls[constants.BATCH_STAGE_CONVERT], [])
+        self.assertEqual(sorted(self.calls[constants.BATCH_STAGE_EXTRACT]), ["a", "b", "c"])
+
+    def test_export_runs_remap_cached_extractions(self):
+        self._run(skip_completed=False)
+        stats = self._run(skip_completed=False)
+        self.assertEqual(stats.succeeded, 3)
+        self.assertEqual(self.calls[constants.BATCH_STAGE_EXTRACT], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
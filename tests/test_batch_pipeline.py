@@ -0,0 +1,101 @@
+"""
+Tests for the staged batch pipeline — stages overlap, per-item failures are
+isolated, and bounded queues still drain every document.
+"""
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.batch.pipeline import run_pipeline
+from src import constants
+
+
+def _convert(source: int) -> str:
+    time.sleep(0.02)
+    if source == 3:
+        raise ValueError("unreadable PDF")
+    return f"markdown-{source}"
+
+
+async def _extract(source: int, markdown: str) -> dict:
+    await asyncio.sleep(0.05)
+    if source == 5:
+        raise ValueError("invalid LLM output")
+    return {"source": source, "markdown": markdown}
+
+
+class TestRunPipeline(unittest.TestCase):
+    def _run(self, sources, written, queue_size=None, resume=None, on_result=None, on_failure=None):
+        def write(source, extracted):
+            time.sleep(0.01)
+            written.append((source, extracted["markdown"]))
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                return await run_pipeline(
+                    sources, _convert, _extract, write,
+                    convert_executor=executor, convert_workers=2, llm_concurrency=4, queue_size=queue_size,
+                    resume=resume, on_result=on_result, on_failure=on_failure,
+                )
+        return asyncio.run(run())
+
+    def test_stages_overlap(self):
+        written = []
+        started = time.perf_counter()
+        stats = self._run(range(12), written)
+        elapsed = time.perf_counter() - started
+
+        # Run back to back the stages would take 12 * (0.02 + 0.05 + 0.01) = 0.96s.
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(stats.succeeded, 10)
+        self.assertEqual(sorted(source for source, _ in written), [0, 1, 2, 4, 6, 7, 8, 9, 10, 11])
+
+    def test_failures_are_recorded_per_stage(self):
+        stats = self._run(range(6), [])
+        failures = sorted((source, stage) for source, stage, _ in stats.failures)
+        self.assertEqual(failures, [(3, constants.BATCH_STAGE_CONVERT), (5, constants.BATCH_STAGE_EXTRACT)])
+
+    def test_small_queues_drain(self):
+        written = []
+        stats = self._run(iter(range(20)), written, queue_size=1)
+        self.assertEqual(stats.succeeded + len(stats.failures), 20)
+        self.assertEqual(len(written), 18)
+
+    def test_callbacks_run_off_the_event_loop(self):
+        # resume hashes whole PDFs and on_result writes artifacts and moves files; on the loop they would stall
+        # extraction of the documents already queued.
+        resume_threads, result_threads, failure_threads = [], [], []
+
+        def resume(source):
+            resume_threads.append(threading.get_ident())
+            time.sleep(0.02)
+            return constants.BATCH_STAGE_CONVERT, None
+
+        stats = self._run(
+            range(12), [], resume=resume,
+            on_result=lambda stage, source, result: result_threads.append(threading.get_ident()),
+            on_failure=lambda stage, source, error: failure_threads.append(threading.get_ident()),
+        )
+        self.assertEqual(stats.succeeded, 10)
+        self.assertEqual((len(resume_threads), len(result_threads), len(failure_threads)), (12, 10 * 3 + 1, 2))
+        for threads in (resume_threads, result_threads, failure_threads):
+            self.assertNotIn(threading.get_ident(), threads)
+
+    def test_resume_failure_is_isolated(self):
+        # An input deleted between listing and resume fails on its own; the rest of the batch still completes.
+        def resume(source):
+            if source == 2:
+                raise FileNotFoundError("input.pdf")
+            return constants.BATCH_STAGE_CONVERT, None
+
+        written = []
+        stats = self._run(range(8), written, resume=resume)
+        failures = sorted((source, stage) for source, stage, _ in stats.failures)
+        self.assertEqual(failures, [(2, constants.BATCH_STAGE_CONVERT), (3, constants.BATCH_STAGE_CONVERT), (5, constants.BATCH_STAGE_EXTRACT)])
+        self.assertEqual(sorted(source for source, _ in written), [0, 1, 4, 6, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
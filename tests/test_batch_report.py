@@ -0,0 +1,75 @@
+"""
+Tests for the batch performance report — percentiles, per-file rows,
+throughput, and the JSON/CSV files written at the end of a run.
+"""
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.batch.report import BatchReport, percentile
+from src.batch.stages import ConvertedDocument
+from src import constants
+
+
+class TestPercentile(unittest.TestCase):
+    def test_interpolates_between_ranks(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertAlmostEqual(percentile(values, 0.5), 50.5)
+        self.assertAlmostEqual(percentile(values, 0.95), 95.05)
+        self.assertAlmostEqual(percentile(values, 0.99), 99.01)
+
+    def test_edge_cases(self):
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([4.0], 0.99), 4.0)
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 0.0), 1.0)
+
+
+class TestBatchReport(unittest.TestCase):
+    def _report(self, output_dir: Path) -> BatchReport:
+        report = BatchReport({"mode": constants.BATCH_MODE_PIPELINED})
+        for index in range(4):
+            source = Path(f"plan-{index}.pdf")
+            path = constants.PDF_CONVERSION_SLOW_PATH if index == 3 else constants.PDF_CONVERSION_FAST_PATH
+            report.record_conversion(source, ConvertedDocument("x" * 100, 10, path, 400, 25, 0.5 * (index + 1)))
+            if index == 2:
+                report.on_failure(constants.BATCH_STAGE_EXTRACT, source, ValueError("invalid LLM output"))
+                continue
+            report.record_extraction(source, 2.0)
+            output = output_dir / f"plan-{index}.json"
+            output.write_text("{}" * 50)
+            report.record_write(source, 0.1, [output])
+        report.finish()
+        return report
+
+    def test_summary(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            summary = self._report(Path(tmp)).summary()
+
+        self.assertEqual((summary["documents"], summary["succeeded"], summary["failed"]), (4, 3, 1))
+        self.assertEqual(summary["pages"], 30)
+        self.assertEqual(summary["conversion_paths"], {"pdftext": 3, "marker": 1})
+        self.assertEqual(summary["stages"]["llm"]["count"], 3)
+        self.assertAlmostEqual(summary["stages"]["convert"]["p50"], 1.0)
+        self.assertAlmostEqual(summary["stages"]["total"]["max"], 4.1)
+        self.assertGreater(summary["pages_per_second"], 0)
+        self.assertEqual(summary["mode"], constants.BATCH_MODE_PIPELINED)
+
+    def test_writes_json_and_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            json_path = self._report(output_dir).write(output_dir)
+            report = json.loads(json_path.read_text())
+            with open(output_dir / "batch_report.csv", newline="") as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual(len(report["files"]), 4)
+        failed = next(row for row in rows if row["status"] == constants.BATCH_REPORT_STATUS_FAILED)
+        self.assertEqual((failed["file"], failed["failed_stage"]), ("plan-2.pdf", constants.BATCH_STAGE_EXTRACT))
+        first = next(row for row in rows if row["file"] == "plan-0.pdf")
+        self.assertEqual((first["pruned_chars"], first["pruned_tokens"], first["output_bytes"]), ("100", "25", "100"))
+
+
+if __name__ == "__main__":
+    unittest.main()
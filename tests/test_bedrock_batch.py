@@ -0,0 +1,19 @@
+"""
+Tests for where Bedrock batch jobs put their input and output in S3.
+"""
+import unittest
+
+from src.services.llm.llm_service import bedrock_batch_location
+
+
+class TestBedrockBatchLocation(unittest.TestCase):
+    def test_bare_bucket(self):
+        for uri in ("s3://my-bucket", "s3://my-bucket/"):
+            self.assertEqual(bedrock_batch_location(uri, "job-1"), ("my-bucket", "job-1"))
+
+    def test_bucket_with_prefix(self):
+        self.assertEqual(bedrock_batch_location("s3://my-bucket/batch/in/", "job-1"), ("my-bucket", "batch/in/job-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
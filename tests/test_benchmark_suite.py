@@ -0,0 +1,62 @@
+"""
+Tests for the benchmark suite's history and regression gate — baseline
+selection, threshold and minimum-delta handling, and JSONL round trips.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.suite import append_history, compare, load_history, make_markdown, select_baseline
+
+
+def _record(commit: str, medians: dict, machine: str = "linux", scale: str = "quick") -> dict:
+    return {
+        "commit": commit, "machine": machine, "scale": scale, "timestamp": commit,
+        "results": {case: {"median": median, "min": median, "p95": median} for case, median in medians.items()},
+    }
+
+
+class TestCompare(unittest.TestCase):
+    def test_flags_relative_and_absolute_slowdowns_only(self):
+        baseline = _record("a", {"prune/large": 0.010, "parse/small": 0.0001, "mapper/large": 0.5})
+        candidate = _record("b", {"prune/large": 0.013, "parse/small": 0.0002, "mapper/large": 0.4, "new/case": 1.0})
+
+        rows = {row["case"]: row for row in compare(baseline, candidate, threshold=0.15, min_delta_seconds=0.0005)}
+
+        self.assertTrue(rows["prune/large"]["regressed"])
+        self.assertAlmostEqual(rows["prune/large"]["change"], 0.3)
+        # Doubled, but by 0.1 ms: below the absolute floor.
+        self.assertFalse(rows["parse/small"]["regressed"])
+        self.assertFalse(rows["mapper/large"]["regressed"])
+        self.assertNotIn("new/case", rows)
+
+    def test_within_threshold_passes(self):
+        rows = compare(_record("a", {"prune/large": 0.010}), _record("b", {"prune/large": 0.011}), 0.15, 0.0)
+        self.assertFalse(rows[0]["regressed"])
+
+
+class TestHistory(unittest.TestCase):
+    def test_previous_baseline_matches_machine_and_scale(self):
+        history = [
+            _record("a", {}), _record("b", {}, scale="full"), _record("c", {}, machine="mac"), _record("d", {}),
+        ]
+        self.assertEqual(select_baseline(history, history[-1], "previous")["commit"], "a")
+        self.assertEqual(select_baseline(history, history[-1], "1")["commit"], "b")
+        self.assertEqual(select_baseline(history, history[-1], "c")["commit"], "c")
+        self.assertIsNone(select_baseline(history[:1], history[0], "previous"))
+
+    def test_jsonl_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "history.jsonl"
+            self.assertEqual(load_history(path), [])
+            append_history(path, _record("a", {"prune/small": 0.1}))
+            append_history(path, _record("b", {"prune/small": 0.2}))
+            self.assertEqual([record["commit"] for record in load_history(path)], ["a", "b"])
+
+    def test_synthetic_inputs_are_deterministic(self):
+        self.assertEqual(make_markdown(50), make_markdown(50))
+        self.assertNotEqual(make_markdown(50), make_markdown(50, seed=7))
+
+
+if __name__ == "__main__":
+    unittest.main()
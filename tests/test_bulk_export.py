@@ -0,0 +1,70 @@
+"""
+Tests for BulkExportWriter — type-partitioned NDJSON files, de-duplicated
+interned resources, gzip streaming and the Bulk Data manifest.
+"""
+import copy
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.services.fhir import bulk_export
+from src.services.fhir.bulk_export import BulkExportWriter
+from src.services.fhir.fhir_mapping_context import FHIRMappingContext
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+from src import constants
+
+PAYLOAD = {
+    "organisation": {"name": "Test Health Insurance"},
+    "tpaOrganisation": {"name": "Speedy TPA", "identifier": "TPA-1"},
+    "insurancePlan": {"status": "active", "name": "Test Plan", "networks": ["Network A"]},
+}
+
+
+def _bundles(count: int) -> list:
+    context = FHIRMappingContext()
+    return [build_fhir_bundle(copy.deepcopy(PAYLOAD), context=context) for _ in range(count)]
+
+
+class TestBulkExportWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partitions_by_type_and_dedupes(self):
+        with BulkExportWriter(self.output_dir, compression=constants.EXPORT_COMPRESSION_NONE) as writer:
+            for bundle in _bundles(3):
+                writer.write_bundle(bundle)
+
+        manifest = json.loads((self.output_dir / constants.EXPORT_MANIFEST_FILENAME).read_text())
+        counts = {item["type"]: item["count"] for item in manifest["output"]}
+        self.assertEqual(counts, {"InsurancePlan": 3, "Organization": 3})
+        self.assertEqual(writer.duplicates, 6)
+
+        lines = (self.output_dir / "Organization.ndjson").read_bytes().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual({json.loads(line)["resourceType"] for line in lines}, {"Organization"})
+
+    def test_gzip_round_trip(self):
+        bundle = _bundles(1)[0]
+        with BulkExportWriter(self.output_dir, compression=constants.EXPORT_COMPRESSION_GZIP) as writer:
+            writer.write_bundle(bundle)
+
+        manifest = writer.close()
+        self.assertEqual({item["url"] for item in manifest["output"]}, {"InsurancePlan.ndjson.gz", "Organization.ndjson.gz"})
+        with gzip.open(self.output_dir / "InsurancePlan.ndjson.gz", "rb") as f:
+            plan = json.loads(f.readline())
+        self.assertEqual(plan, bundle["entry"][0]["resource"])
+
+    @unittest.skipIf(bulk_export.zstandard is not None, "zstandard installed")
+    def test_zstd_requires_package(self):
+        with self.assertRaises(RuntimeError):
+            BulkExportWriter(self.output_dir, compression=constants.EXPORT_COMPRESSION_ZSTD)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for bulk NDJSON FHIR generation — line splitting, per-line errors and
+index-tagged results from a real worker process pool.
+"""
+import asyncio
+import json
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.background import BackgroundTask
+
+from src.serialization import NDJSONStreamingResponse
+from src.services.fhir import bulk_fhir_generator
+from src.services.fhir.bundle_stream import PayloadTooLargeError
+from src import constants
+
+PAYLOAD = {
+    "organisation": {"name": "Test Health Insurance"},
+    "insurancePlan": {"status": "active", "name": "Test Plan", "typeCode": "01", "typeDisplay": "Hospitalisation Indemnity"},
+}
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(lines, executor, max_in_flight=2):
+    return [
+        json.loads(line)
+        async for line in bulk_fhir_generator.stream_bulk_bundles(lines, executor=executor, max_in_flight=max_in_flight)
+    ]
+
+
+class TestIterNdjsonLines(unittest.TestCase):
+    def test_lines_split_across_chunks(self):
+        async def run():
+            return [line async for line in bulk_fhir_generator.iter_ndjson_lines(_chunks(b'{"a"', b': 1}\n\n{"b": 2}', b"\n{\"c\": 3}"))]
+
+        self.assertEqual(asyncio.run(run()), [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}'])
+
+    def test_long_line_in_many_chunks(self):
+        line = b'{"name": "' + b"x" * 5000 + b'"}'
+        chunks = [line[i:i + 7] for i in range(0, len(line), 7)] + [b"\n{}"]
+
+        async def run():
+            return [line async for line in bulk_fhir_generator.iter_ndjson_lines(_chunks(*chunks), max_line_bytes=len(line))]
+
+        self.assertEqual(asyncio.run(run()), [line, b"{}"])
+
+    def test_oversized_line_is_refused(self):
+        async def run(*chunks):
+            return [line async for line in bulk_fhir_generator.iter_ndjson_lines(_chunks(*chunks), max_line_bytes=16)]
+
+        # A newline-free upload is refused once it outgrows the cap, as is a complete line that does.
+        with self.assertRaises(PayloadTooLargeError):
+            asyncio.run(run(*[b"x" * 10] * 100))
+        with self.assertRaises(PayloadTooLargeError):
+            asyncio.run(run(b"{}\n" + b"y" * 20 + b"\n"))
+
+
+class TestNDJSONStreamingResponse(unittest.TestCase):
+    def test_background_task_runs_after_the_stream(self):
+        ran = []
+        app = FastAPI()
+
+        @app.get("/lines")
+        async def lines():
+            async def body():
+                yield b"{}\n"
+            return NDJSONStreamingResponse(body(), background=BackgroundTask(ran.append, "done"))
+
+        response = TestClient(app).get("/lines")
+        self.assertEqual(response.text, "{}\n")
+        self.assertEqual(ran, ["done"])
+
+
+class TestStreamBulkBundles(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = ProcessPoolExecutor(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_every_line_is_answered_with_its_index(self):
+        lines = [json.dumps(PAYLOAD).encode()] * 5 + [b"not json", b"[1, 2]"]
+        results = asyncio.run(_collect(_chunks(*lines), self.executor))
+        by_index = {result["index"]: result for result in results}
+        self.assertEqual(sorted(by_index), list(range(7)))
+        for index in range(5):
+            self.assertEqual(by_index[index]["bundle"]["resourceType"], "Bundle")
+        self.assertEqual(by_index[5]["error"]["code"], constants.ERROR_CODE_INVALID_NDJSON_LINE)
+        self.assertEqual(by_index[6]["error"]["code"], constants.ERROR_CODE_INVALID_NDJSON_LINE)
+
+    def test_empty_stream_yields_nothing(self):
+        self.assertEqual(asyncio.run(_collect(_chunks(), self.executor)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests for BundleIndex — reference resolution, duplicate fullUrls, the lazy
+reference graph and the /bundle-summary route built on it.
+"""
+import copy
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routes import fhir
+from src.services.fhir.bundle_index import BundleIndex
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+
+PAYLOAD = {
+    "organisation": {"name": "Test Health Insurance"},
+    "tpaOrganisation": {"name": "Speedy TPA", "identifier": "TPA-1"},
+    "insurancePlan": {
+        "status": "active",
+        "name": "Test Plan",
+        "networks": ["Network A"],
+        "coverages": [
+            {"typeDisplay": "Inpatient Care", "benefits": [{"typeDisplay": "Room Rent"}, {"typeDisplay": "ICU"}]},
+            {"typeDisplay": "Inpatient Care", "benefits": [{"typeDisplay": "Room Rent"}]},
+        ],
+    },
+}
+
+
+class TestBundleIndex(unittest.TestCase):
+    def setUp(self):
+        self.bundle = build_fhir_bundle(copy.deepcopy(PAYLOAD))
+        self.index = BundleIndex(self.bundle)
+        self.plan = self.index.first("InsurancePlan")
+
+    def test_resolves_full_url_id_and_relative_references(self):
+        insurer = self.index.resolve(self.plan["ownedBy"])
+        self.assertEqual(insurer["name"], "Test Health Insurance")
+        self.assertIs(self.index.resolve(f"Organization/{insurer['id']}"), insurer)
+        self.assertIsNone(self.index.resolve(self.plan["ownedBy"], "InsurancePlan"))
+        self.assertIsNone(self.index.resolve({"reference": "urn:uuid:missing"}))
+
+    def test_duplicates_and_missing_resources(self):
+        bundle = copy.deepcopy(self.bundle)
+        bundle["entry"].append(copy.deepcopy(bundle["entry"][1]))
+        bundle["entry"].append({"fullUrl": "urn:uuid:empty"})
+        index = BundleIndex(bundle)
+        self.assertEqual(index.duplicate_full_urls, [(len(bundle["entry"]) - 2, bundle["entry"][1]["fullUrl"])])
+        self.assertIsNone(index.entries[-1][2])
+
+    def test_reference_graph(self):
+        graph = self.index.references()
+        self.assertEqual(graph[self.plan["ownedBy"]["reference"]], ["Bundle.entry[0].resource.ownedBy"])
+
+    def test_bundle_summary_route(self):
+        app = FastAPI()
+        app.include_router(fhir.router)
+        summary = TestClient(app).post("/bundle-summary", json=self.bundle).json()
+        self.assertEqual((summary["insurer"], summary["tpa"]), ("Test Health Insurance", "Speedy TPA"))
+        self.assertEqual(summary["coverageNames"], ["Inpatient Care"])
+        self.assertEqual(len(summary["benefitNames"]), 2)
+        self.assertEqual(summary["totalResources"], len(self.bundle["entry"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
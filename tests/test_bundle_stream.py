@@ -0,0 +1,117 @@
+"""
+Tests for streaming bundle parsing — entry-by-entry reading, parity between
+streamed and buffered validation/summary, and the per-request buffering cap.
+"""
+import asyncio
+import copy
+import json
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.config import settings
+from src.routes import claims, fhir
+from src.services.fhir.bundle_stream import PayloadTooLargeError, StreamingBundleReader
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+from src.services.fhir.profile_validator import ProfileValidator
+
+PAYLOAD = {
+    "organisation": {"name": "Test Health Insurance"},
+    "tpaOrganisation": {"name": "Speedy TPA", "identifier": "TPA-1"},
+    "insurancePlan": {
+        "status": "active",
+        "name": "Test Plan",
+        "networks": ["Network A", "Network B"],
+        "coverages": [{"typeDisplay": "Inpatient Care", "benefits": [{"typeDisplay": "Room Rent", "limitValue": "5000", "limitUnit": "INR"}]}],
+    },
+}
+
+
+def _chunked(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _achunked(data: bytes, size: int = 7):
+    for chunk in _chunked(data, size):
+        yield chunk
+
+
+def _read(data: bytes, **kwargs):
+    async def run():
+        reader = StreamingBundleReader(_achunked(data), **kwargs)
+        entries = [item async for item in reader.entries()]
+        return reader.head, entries
+    return asyncio.run(run())
+
+
+class TestStreamingBundleReader(unittest.TestCase):
+    def setUp(self):
+        self.bundle = build_fhir_bundle(copy.deepcopy(PAYLOAD))
+
+    def test_entries_and_head(self):
+        head, entries = _read(json.dumps(self.bundle).encode())
+        self.assertEqual([entry for _, entry in entries], self.bundle["entry"])
+        self.assertEqual([position for position, _ in entries], list(range(len(self.bundle["entry"]))))
+        self.assertEqual(head, {k: v for k, v in self.bundle.items() if k != "entry"})
+
+    def test_streamed_validation_matches_buffered(self):
+        validator = ProfileValidator()
+        bundle = copy.deepcopy(self.bundle)
+        bundle["entry"][0]["resource"]["status"] = "live"
+        bundle["entry"].append({"fullUrl": bundle["entry"][1]["fullUrl"], "resource": bundle["entry"][1]["resource"]})
+
+        run = validator.start()
+
+        async def stream():
+            reader = StreamingBundleReader(_achunked(json.dumps(bundle).encode()))
+            async for position, entry in reader.entries():
+                run.add_entry(position, entry, reader.head)
+            return reader.head
+
+        self.assertEqual(run.finish(asyncio.run(stream())), validator.validate(bundle))
+
+    def test_buffering_cap(self):
+        bundle = copy.deepcopy(self.bundle)
+        bundle["entry"][0]["resource"]["description"] = "x" * 5000
+        with self.assertRaises(PayloadTooLargeError):
+            _read(json.dumps(bundle).encode(), max_buffered_bytes=2048)
+
+    def test_truncated_json(self):
+        with self.assertRaises(Exception):
+            _read(json.dumps(self.bundle).encode()[:-40])
+
+
+class TestStreamingRoutes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app = FastAPI()
+        app.include_router(fhir.router, prefix="/fhir")
+        app.include_router(claims.router, prefix="/insurance")
+        cls.client = TestClient(app)
+        cls.bundle = build_fhir_bundle(copy.deepcopy(PAYLOAD))
+
+    def test_chunked_upload_matches_buffered(self):
+        body = json.dumps(self.bundle).encode()
+        for route in ("/fhir/validate", "/fhir/bundle-summary"):
+            buffered = self.client.post(route, content=body, headers={"Content-Type": "application/json"})
+            streamed = self.client.post(route, content=_chunked(body), headers={"Content-Type": "application/json"})
+            self.assertEqual(buffered.status_code, 200)
+            self.assertEqual(buffered.json(), streamed.json())
+
+    def test_payload_too_large(self):
+        body = json.dumps(self.bundle).encode()
+        with mock.patch.object(settings.fhir.streaming, "max_buffered_bytes", 256):
+            self.assertEqual(self.client.post("/fhir/validate", content=_chunked(body)).status_code, 413)
+            self.assertEqual(self.client.post("/insurance/generate-fhir", content=json.dumps(PAYLOAD)).status_code, 413)
+
+    def test_generate_fhir_reads_body(self):
+        response = self.client.post("/insurance/generate-fhir", json=PAYLOAD)
+        self.assertEqual(response.json()["resourceType"], "Bundle")
+        self.assertEqual(self.client.post("/insurance/generate-fhir", json=[1]).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
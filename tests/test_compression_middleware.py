@@ -0,0 +1,73 @@
+"""
+Tests for response compression — Accept-Encoding negotiation, gzip round
+trips and pass-through of small or streamed responses.
+"""
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src import middleware
+from src.middleware import CompressionMiddleware, negotiate_encoding
+from src.serialization import FastJSONResponse
+
+LARGE_PAYLOAD = {"entry": [{"resource": {"resourceType": "Organization", "name": f"Insurer {i}"}} for i in range(500)]}
+
+
+def _app() -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/large")
+    async def large():
+        return LARGE_PAYLOAD
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for _ in range(3):
+                yield b'{"index": 0}\n' * 200
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+class TestNegotiateEncoding(unittest.TestCase):
+    def test_gzip_when_accepted(self):
+        with mock.patch.object(middleware, "brotli", None):
+            self.assertEqual(negotiate_encoding("gzip, deflate, br"), "gzip")
+
+    def test_refused_encodings(self):
+        self.assertIsNone(negotiate_encoding(""))
+        self.assertIsNone(negotiate_encoding("identity"))
+        self.assertIsNone(negotiate_encoding("gzip;q=0, br;q=0"))
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(_app())
+
+    def test_large_json_is_gzipped(self):
+        response = self.client.get("/large", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["vary"])
+        self.assertEqual(response.json(), LARGE_PAYLOAD)
+
+    def test_small_json_is_not_compressed(self):
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+
+    def test_streamed_response_passes_through(self):
+        response = self.client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(len(response.content), 3 * 200 * len(b'{"index": 0}\n'))
+
+
+if __name__ == "__main__":
+    unittest.main()
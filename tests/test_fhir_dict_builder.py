@@ -0,0 +1,151 @@
+"""
+Parity tests for InsurancePlanFHIRDictBuilder — the direct-to-dict bundle
+must match InsurancePlanFHIRMapper's output byte for byte.
+"""
+import copy
+import itertools
+import json
+import re
+import unittest
+import uuid
+from unittest import mock
+
+from src.services.fhir.insurance_plan_fhir_dict_builder import InsurancePlanFHIRDictBuilder
+from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
+from src.services.fhir.profile_validator import get_profile_validator
+
+
+FIXTURE: dict = {
+    "organisation": {
+        "name": "Test Health & Insurance <Co.>",
+        "phone": " +91-1800-123-4567 ",
+        "email": "care@testhealthins.com",
+        "website": "https://www.testhealthins.com",
+    },
+    "tpaOrganisation": {"name": "Speedy TPA Pvt Ltd", "identifier": "IRDAI/TPA/2024/001"},
+    "insurancePlan": {
+        "status": "active",
+        "name": "Test Comprehensive Health Plan",
+        "alias": ["TestHealth Pro", ""],
+        "typeCode": "01",
+        "typeDisplay": "Hospitalisation Indemnity",
+        "periodStart": "2024-04-01",
+        "periodEnd": "",
+        "coverageArea": ["India", ""],
+        "networks": ["TestHealth Network Hospitals", " ", "PartnerCare PPN"],
+        "contacts": [
+            {"purpose": "Claims Helpline", "name": "Claims Team", "phone": "+91-1800-999-0000", "email": "claims@testhealthins.com"},
+            {"purpose": "", "name": "", "phone": "", "email": ""},
+        ],
+        "coverages": [
+            {"typeDisplay": "Inpatient Care", "benefits": [
+                {"typeCode": "", "typeDisplay": "Room Rent", "limitValue": "5000", "limitUnit": "INR"},
+                {"typeCode": "custom", "typeDisplay": "Other", "limitValue": "n/a", "limitUnit": ""},
+                {"typeCode": "", "typeDisplay": "", "limitValue": "", "limitUnit": ""},
+            ]},
+            {"typeDisplay": "", "benefits": []},
+        ],
+        "plans": [
+            {"planTypeCode": "01", "planTypeDisplay": "Individual", "specificCosts": [
+                {"categoryCode": "49122002", "categoryDisplay": "Ambulance", "benefitTypeCode": "",
+                 "benefitTypeDisplay": "ambulance", "costType": "copay", "costValue": "10", "costUnit": "%"},
+                {"categoryCode": "", "categoryDisplay": "", "benefitTypeCode": "", "benefitTypeDisplay": "",
+                 "costType": "other", "costValue": "", "costUnit": ""},
+            ]},
+            {"planTypeCode": "", "planTypeDisplay": "", "specificCosts": []},
+        ],
+    },
+}
+
+
+def _build(builder_class, data, method="generate_dict", **kwargs) -> dict:
+    counter = itertools.count()
+    with mock.patch("uuid.uuid4", side_effect=lambda: uuid.UUID(int=next(counter))):
+        bundle = getattr(builder_class(data, **kwargs), method)()
+    if isinstance(bundle, bytes):
+        bundle = json.loads(bundle)
+    bundle.pop("timestamp")
+    return bundle
+
+
+def _renumbered(bundle: dict) -> str:
+    # A strict-mode fallback rebuilds with fresh UUIDs; number them by first appearance to compare structure.
+    text = json.dumps(bundle)
+    ids: dict = {}
+    return re.sub(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", lambda m: ids.setdefault(m.group(), str(len(ids))), text)
+
+
+def _invalid(path: tuple, key: str, value) -> dict:
+    data = copy.deepcopy(FIXTURE)
+    target = data["insurancePlan"]
+    for step in path:
+        target = target[step]
+    target[key] = value
+    return data
+
+
+class TestDictBuilderParity(unittest.TestCase):
+    def assertParity(self, data):
+        expected = _build(InsurancePlanFHIRMapper, data)
+        actual = _build(InsurancePlanFHIRDictBuilder, data, strict=False)
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_full_payload(self):
+        self.assertParity(FIXTURE)
+
+    def test_empty_payload(self):
+        self.assertParity({})
+
+    def test_minimal_payload(self):
+        self.assertParity({"organisation": {"name": "Insurer"}, "insurancePlan": {"name": "Plan", "alias": []}})
+
+    def test_invalid_period_skips_plan(self):
+        self.assertParity({"organisation": {"name": "Insurer"}, "insurancePlan": {"name": "Plan", "periodStart": "01/04/2024"}})
+
+    def test_strict_mode_accepts_valid_bundle(self):
+        self.assertEqual(_build(InsurancePlanFHIRDictBuilder, FIXTURE, strict=True), _build(InsurancePlanFHIRMapper, FIXTURE))
+
+    def test_default_builder_skips_invalid_plans_like_model_builder(self):
+        # Invalid values the dict builder does not check itself: the model builder skips the plan for a bad
+        # type code and the cost row for a non-finite value; the default (strict) dict builder must do the same.
+        cases = {
+            "plan type code": _invalid((), "typeCode", "01  02"),
+            "financial plan type code": _invalid(("plans", 0), "planTypeCode", "x  y"),
+            "cost value": _invalid(("plans", 0, "specificCosts", 0), "costValue", "inf"),
+        }
+        for name, data in cases.items():
+            with self.subTest(name), self.assertLogs(level="WARNING"):
+                expected = _build(InsurancePlanFHIRMapper, data)
+                self.assertNotEqual(json.dumps(_build(InsurancePlanFHIRDictBuilder, data, strict=False)), json.dumps(expected))
+                self.assertEqual(_renumbered(_build(InsurancePlanFHIRDictBuilder, data)), _renumbered(expected))
+
+
+class TestGenerateJson(unittest.TestCase):
+    def test_model_mapper_json_matches_dict(self):
+        for data in (FIXTURE, {"organisation": {"name": "Insurer"}, "insurancePlan": {"name": "Plan"}}):
+            self.assertEqual(
+                _build(InsurancePlanFHIRMapper, data, method="generate_json"), _build(InsurancePlanFHIRMapper, data)
+            )
+
+    def test_dict_builder_json_matches_dict(self):
+        self.assertEqual(
+            _build(InsurancePlanFHIRDictBuilder, FIXTURE, method="generate_json"), _build(InsurancePlanFHIRDictBuilder, FIXTURE)
+        )
+
+
+
+class TestProfileConformance(unittest.TestCase):
+    def test_fixture_bundles_satisfy_shipped_profiles(self):
+        # FIXTURE includes a benefit with no type code or display; it must be dropped, not emitted as {"type": {}}.
+        for builder_class in (InsurancePlanFHIRMapper, InsurancePlanFHIRDictBuilder):
+            with self.subTest(builder_class.__name__):
+                bundle = builder_class(copy.deepcopy(FIXTURE)).generate_dict()
+                result = get_profile_validator().validate(bundle)
+                self.assertTrue(result["valid"], result["issues"])
+                benefits = bundle["entry"][0]["resource"]["coverage"][0]["benefit"]
+                self.assertEqual(len(benefits), 2)
+                self.assertTrue(all(benefit["type"] for benefit in benefits))
+
+
+if __name__ == "__main__":
+    unittest.main()
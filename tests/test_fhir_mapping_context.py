@@ -0,0 +1,61 @@
+"""
+Tests for FHIRMappingContext — stable UUIDv5 organisation ids, reuse across
+bundles and the shared-organisations bundle mode.
+"""
+import unittest
+
+from src.services.fhir.fhir_mapping_context import FHIRMappingContext
+from src.services.fhir.insurance_plan_fhir_dict_builder import InsurancePlanFHIRDictBuilder
+from src.services.fhir.insurance_plan_fhir_mapper import InsurancePlanFHIRMapper
+
+
+def _plan(name: str) -> dict:
+    return {
+        "organisation": {"name": "Shared Insurer", "phone": "1800-000-000"},
+        "tpaOrganisation": {"name": "Shared TPA", "identifier": "TPA-1"},
+        "insurancePlan": {"status": "active", "name": name, "networks": ["Network A", "Network B", "Network A"]},
+    }
+
+
+def _organization_ids(bundle: dict) -> list:
+    return sorted(e["resource"]["id"] for e in bundle["entry"] if e["resource"]["resourceType"] == "Organization")
+
+
+class TestMappingContext(unittest.TestCase):
+    def test_organizations_are_reused_with_stable_ids(self):
+        context = FHIRMappingContext()
+        first = InsurancePlanFHIRDictBuilder(_plan("Plan 1"), context=context).generate_dict()
+        second = InsurancePlanFHIRDictBuilder(_plan("Plan 2"), context=context).generate_dict()
+        fresh = InsurancePlanFHIRDictBuilder(_plan("Plan 3"), context=FHIRMappingContext()).generate_dict()
+
+        self.assertEqual(len(_organization_ids(first)), 4)
+        self.assertEqual(_organization_ids(first), _organization_ids(second))
+        self.assertEqual(_organization_ids(first), _organization_ids(fresh))
+        self.assertEqual((context.misses, context.hits), (4, 6))
+
+    def test_model_mapper_and_dict_builder_agree(self):
+        model_bundle = InsurancePlanFHIRMapper(_plan("Plan"), context=FHIRMappingContext()).generate_dict()
+        dict_bundle = InsurancePlanFHIRDictBuilder(_plan("Plan"), context=FHIRMappingContext()).generate_dict()
+        self.assertEqual(_organization_ids(model_bundle), _organization_ids(dict_bundle))
+
+    def test_without_context_ids_are_random(self):
+        first = InsurancePlanFHIRDictBuilder(_plan("Plan")).generate_dict()
+        second = InsurancePlanFHIRDictBuilder(_plan("Plan")).generate_dict()
+        self.assertNotEqual(_organization_ids(first), _organization_ids(second))
+
+    def test_shared_organizations_mode(self):
+        context = FHIRMappingContext(shared_organizations=True)
+        bundles = [InsurancePlanFHIRDictBuilder(_plan(f"Plan {i}"), context=context).generate_dict() for i in range(3)]
+        shared = context.shared_organizations_bundle()
+
+        shared_refs = {entry["fullUrl"] for entry in shared["entry"]}
+        self.assertEqual(len(shared_refs), 4)
+        for bundle in bundles:
+            self.assertEqual(_organization_ids(bundle), [])
+            plan = bundle["entry"][0]["resource"]
+            self.assertIn(plan["ownedBy"]["reference"], shared_refs)
+            self.assertTrue({network["reference"] for network in plan["network"]} <= shared_refs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Tests for the LLM health probes — they await the same pooled async clients
+inference uses, so a probe never blocks the event loop.
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from src import health_check
+from src.config import settings
+from src.services.llm.client_registry import ClientRegistry
+
+
+class TestHealthProbes(unittest.TestCase):
+    def _check(self, provider: str, handler) -> bool:
+        async def _run():
+            registry = ClientRegistry()
+            registry._httpx_kwargs = lambda: {"transport": httpx.MockTransport(handler)}
+            try:
+                with mock.patch.object(health_check, "get_client_registry", return_value=registry):
+                    return await health_check.check_llm_health()
+            finally:
+                await registry.aclose()
+
+        with mock.patch.object(settings.llm, "provider", provider):
+            return asyncio.run(_run())
+
+    def test_ollama_probe_uses_async_client(self):
+        requests = []
+
+        async def handler(request):
+            requests.append(str(request.url))
+            return httpx.Response(200, text="Ollama is running")
+
+        self.assertTrue(self._check("ollama", handler))
+        self.assertEqual(requests, [settings.llm.ollama.base_url.removesuffix("/v1")])
+
+    def test_ollama_probe_reports_unreachable_server(self):
+        async def handler(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        with self.assertLogs(health_check.logger, level="ERROR"):
+            self.assertFalse(self._check("ollama", handler))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests for KeyPool — least-loaded dispatch and benching of rate-limited or
+rejected API keys.
+"""
+import asyncio
+import unittest
+
+import openai
+
+from src.config import settings
+from src.services.llm.client_registry import ClientRegistry
+from src.services.llm.key_pool import KeyPool, LLMRateLimitError
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _status_of(error):
+    return getattr(error, "status_code", None)
+
+
+class TestKeyPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = KeyPool("TestService", {"key-a": "client-a", "key-b": "client-b", "key-c": "client-c"})
+
+    def test_round_robin_when_idle(self):
+        async def _call(client):
+            return client
+
+        async def _run():
+            return [await self.pool.execute(_call, _status_of) for _ in range(4)]
+
+        self.assertEqual(asyncio.run(_run()), ["client-a", "client-b", "client-c", "client-a"])
+
+    def test_least_loaded_skips_busy_key(self):
+        async def _run():
+            async with self.pool.lease() as first:
+                async with self.pool.lease() as second:
+                    return first.client, second.client
+
+        first, second = asyncio.run(_run())
+        self.assertNotEqual(first, second)
+
+    def test_rate_limited_key_is_benched(self):
+        calls = []
+
+        async def _call(client):
+            calls.append(client)
+            if client == "client-a":
+                raise StatusError(429)
+            return client
+
+        async def _run():
+            return [await self.pool.execute(_call, _status_of) for _ in range(3)]
+
+        self.assertEqual(asyncio.run(_run()), ["client-b", "client-c", "client-b"])
+        self.assertEqual(calls.count("client-a"), 1)
+
+    def test_other_errors_propagate(self):
+        async def _call(client):
+            raise StatusError(500)
+
+        with self.assertRaises(StatusError):
+            asyncio.run(self.pool.execute(_call, _status_of))
+        self.assertTrue(all(slot.benched_until == 0.0 for slot in self.pool.slots))
+
+    def test_all_keys_rejected_raises_rate_limit(self):
+        self.pool.config = settings.llm.key_pool.model_copy(update={"max_wait_seconds": 0.0})
+
+        async def _call(client):
+            raise StatusError(401)
+
+        with self.assertRaises(LLMRateLimitError):
+            asyncio.run(self.pool.execute(_call, _status_of))
+
+
+
+class TestPooledOpenAIClients(unittest.TestCase):
+    def test_sdk_retries_are_disabled(self):
+        # A 429 must reach KeyPool on the first attempt so it benches the key, not be retried by the SDK on it.
+        registry = ClientRegistry()
+        try:
+            client = registry.openai_client("key-a", base_url="http://localhost:11434/v1")
+            self.assertIsInstance(client, openai.AsyncOpenAI)
+            self.assertEqual(client.max_retries, 0)
+        finally:
+            asyncio.run(registry.aclose())
+
+
+if __name__ == "__main__":
+    unittest.main()
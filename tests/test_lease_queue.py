@@ -0,0 +1,151 @@
+"""
+Tests for the multi-node file-lease work queue — exclusive claims, expiry of
+dead nodes' leases, done/failed markers, and two nodes sharing one catalogue.
+"""
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.batch.lease_queue import FileLeaseQueue
+from src.batch.pipeline import run_pipeline
+
+
+class TestFileLeaseQueue(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.input_dir = root / "input"
+        self.queue_dir = root / "output" / ".batch_leases"
+        self.input_dir.mkdir()
+        self.sources = []
+        for index in range(6):
+            path = self.input_dir / f"plan-{index}.pdf"
+            path.write_bytes(b"%PDF " + str(index).encode())
+            self.sources.append(path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _queue(self, node_id, **kwargs):
+        options = dict(lease_seconds=60, heartbeat_seconds=0.05, poll_seconds=0.05, max_attempts=2)
+        options.update(kwargs)
+        return FileLeaseQueue(self.queue_dir, self.input_dir, fingerprint="v1", node_id=node_id, **options)
+
+    def _lease(self, queue, path):
+        return self.queue_dir / f"{queue.key(path)}.lease"
+
+    def test_claims_are_exclusive(self):
+        first, second = self._queue("node-a"), self._queue("node-b")
+        self.assertTrue(first.try_claim(self.sources[0]))
+        self.assertFalse(second.try_claim(self.sources[0]))
+
+        first.complete(self.sources[0], ["plan-0.json"])
+        self.assertFalse(second.try_claim(self.sources[0]))
+        self.assertTrue(second.is_done(self.sources[0]))
+
+    def test_expired_lease_is_reclaimed(self):
+        dead, alive = self._queue("node-dead"), self._queue("node-b")
+        self.assertTrue(dead.try_claim(self.sources[0]))
+        stale = time.time() - 120
+        os.utime(self._lease(dead, self.sources[0]), (stale, stale))
+
+        self.assertTrue(alive.try_claim(self.sources[0]))
+        dead.heartbeat()
+        self.assertEqual(dead._held, {})
+
+    def test_heartbeat_keeps_lease_alive(self):
+        owner, other = self._queue("node-a", lease_seconds=0.3), self._queue("node-b", lease_seconds=0.3)
+        self.assertTrue(owner.try_claim(self.sources[0]))
+        owner.start()
+        try:
+            time.sleep(0.5)
+            self.assertFalse(other.try_claim(self.sources[0]))
+        finally:
+            owner.stop()
+        self.assertFalse(self._lease(owner, self.sources[0]).exists())
+
+    def test_changed_input_or_fingerprint_is_not_done(self):
+        queue = self._queue("node-a")
+        queue.try_claim(self.sources[0])
+        queue.complete(self.sources[0])
+        self.assertTrue(queue.is_done(self.sources[0]))
+
+        queue.fingerprint = "v2"
+        self.assertFalse(queue.is_done(self.sources[0]))
+        queue.fingerprint = "v1"
+        self.sources[0].write_bytes(b"%PDF revised")
+        self.assertFalse(queue.is_done(self.sources[0]))
+
+    def test_failures_are_given_up_after_max_attempts(self):
+        queue = self._queue("node-a")
+
+        async def drain():
+            return [path async for path in queue.claims(self.sources[:1])]
+
+        for _ in range(2):
+            self.assertEqual(asyncio.run(drain()), self.sources[:1])
+            queue.fail(self.sources[0], ValueError("invalid LLM output"))
+        self.assertEqual(asyncio.run(drain()), [])
+
+    def test_vanished_input_is_skipped(self):
+        # Another node or an operator may remove an input while this node is still polling for it.
+        owner, waiter = self._queue("node-a"), self._queue("node-b")
+        self.assertTrue(owner.try_claim(self.sources[1]))
+
+        async def drain():
+            claimed = []
+            async for path in waiter.claims(self.sources[:3]):
+                claimed.append(path)
+                self.sources[1].unlink(missing_ok=True)
+            return claimed
+
+        self.assertEqual(asyncio.run(drain()), [self.sources[0], self.sources[2]])
+        self.assertFalse(waiter.try_claim(self.sources[1]))
+        owner.fail(self.sources[1], FileNotFoundError("plan-1.pdf"))
+
+    def test_two_nodes_share_the_catalogue_and_recover_an_orphan(self):
+        dead = self._queue("node-dead")
+        dead.try_claim(self.sources[5])
+        os.utime(self._lease(dead, self.sources[5]), (time.time() - 120, time.time() - 120))
+        written = []
+
+        def convert(path):
+            time.sleep(0.02)
+            return path.name
+
+        async def extract(path, converted):
+            await asyncio.sleep(0.02)
+            return converted
+
+        def write(path, extracted):
+            written.append(extracted)
+            return []
+
+        async def node(node_id):
+            queue = self._queue(node_id)
+            queue.start()
+            try:
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    return await run_pipeline(
+                        queue.claims(self.sources), convert, extract, write, convert_executor=executor,
+                        convert_workers=1, llm_concurrency=2, queue_size=1,
+                        on_result=queue.on_result, on_failure=queue.on_failure,
+                    )
+            finally:
+                queue.stop()
+
+        async def run():
+            return await asyncio.gather(node("node-a"), node("node-b"))
+
+        stats = asyncio.run(run())
+        self.assertEqual(sorted(written), sorted(path.name for path in self.sources))
+        self.assertEqual(sum(result.succeeded for result in stats), 6)
+        self.assertEqual(list(self.queue_dir.glob("*.lease")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests for the LLM response parsing path — schema compilation, validation,
+JSON repair and continuation of truncated extractions.
+"""
+import asyncio
+import json
+import unittest
+
+from src import constants
+from src.config import settings
+from src.core import prompts, prompt_compiler
+from src.routes.claims import _clean_and_parse_llm_response, _extract_insurance_data
+from src.schemas.insurance_schemas import INSURANCE_DATA_JSON_SCHEMA
+from src.services.llm import json_repair
+from src.services.llm.llm_service import LLMService
+
+
+MINIMAL_PAYLOAD: dict = {
+    "bundleType": "InsurancePlan",
+    "organisation": {"name": "Test Health Insurance Co."},
+    "tpaOrganisation": None,
+    "insurancePlan": {
+        "name": "Test Comprehensive Health Plan",
+        "typeCode": "01",
+        "typeDisplay": "Hospitalisation Indemnity",
+        "coverages": [
+            {"typeDisplay": "Inpatient Care", "benefits": [{"typeDisplay": "Room Rent", "limitValue": "5000"}]}
+        ],
+    },
+}
+
+
+class TestCompiledSchema(unittest.TestCase):
+    def test_refs_are_inlined(self):
+        serialized = json.dumps(INSURANCE_DATA_JSON_SCHEMA)
+        self.assertNotIn("$ref", serialized)
+        self.assertNotIn("$defs", serialized)
+
+    def test_top_level_sections(self):
+        properties = INSURANCE_DATA_JSON_SCHEMA["properties"]
+        for key in ("bundleType", "organisation", "tpaOrganisation", "insurancePlan"):
+            self.assertIn(key, properties)
+
+    def test_mapper_fields_are_exposed(self):
+        plan_properties = INSURANCE_DATA_JSON_SCHEMA["properties"]["insurancePlan"]["properties"]
+        self.assertIn("alias", plan_properties)
+        org_properties = INSURANCE_DATA_JSON_SCHEMA["properties"]["organisation"]["properties"]
+        self.assertIn("website", org_properties)
+
+
+class TestCleanAndParse(unittest.TestCase):
+    def test_plain_json(self):
+        parsed = _clean_and_parse_llm_response(json.dumps(MINIMAL_PAYLOAD))
+        self.assertEqual(parsed["insurancePlan"]["name"], "Test Comprehensive Health Plan")
+
+    def test_fenced_json(self):
+        parsed = _clean_and_parse_llm_response(f"```json\n{json.dumps(MINIMAL_PAYLOAD)}\n```")
+        self.assertEqual(parsed["organisation"]["name"], "Test Health Insurance Co.")
+
+    def test_defaults_are_filled(self):
+        parsed = _clean_and_parse_llm_response(json.dumps(MINIMAL_PAYLOAD))
+        self.assertEqual(parsed["insurancePlan"]["networks"], [])
+        self.assertEqual(parsed["insurancePlan"]["coverages"][0]["benefits"][0]["limitUnit"], "")
+
+    def test_schema_mismatch_raises(self):
+        broken = dict(MINIMAL_PAYLOAD, organisation={"phone": "123"})
+        with self.assertRaises(ValueError):
+            _clean_and_parse_llm_response(json.dumps(broken))
+
+
+class TestCompactPrompt(unittest.TestCase):
+    def setUp(self):
+        self.original_mode = settings.llm.prompt_mode
+        settings.llm.prompt_mode = constants.PROMPT_MODE_COMPACT
+
+    def tearDown(self):
+        settings.llm.prompt_mode = self.original_mode
+
+    def test_aliases_never_shadow_canonical_keys(self):
+        aliases = prompts.COMPACT_KEY_ALIASES
+        self.assertEqual(len(set(aliases.values())), len(aliases))
+        self.assertFalse(set(aliases.values()) & set(aliases))
+
+    def test_aliased_response_is_expanded(self):
+        aliased = prompt_compiler.rename_keys(MINIMAL_PAYLOAD, prompts.COMPACT_KEY_ALIASES)
+        parsed = _clean_and_parse_llm_response(prompt_compiler.minify(aliased))
+        self.assertEqual(parsed["insurancePlan"]["coverages"][0]["benefits"][0]["limitValue"], "5000")
+
+    def test_canonical_response_still_accepted(self):
+        parsed = _clean_and_parse_llm_response(json.dumps(MINIMAL_PAYLOAD))
+        self.assertEqual(parsed["organisation"]["name"], "Test Health Insurance Co.")
+
+    def test_compact_prompt_is_smaller(self):
+        self.assertLess(len(prompts.SYSTEM_PROMPT_FHIR_COMPACT), len(prompts.SYSTEM_PROMPT_FHIR) * 2 // 3)
+
+
+class ScriptedLLMService(LLMService):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def process_text(self, system_prompt, user_prompt, response_schema=None):
+        self.calls.append((system_prompt, response_schema))
+        return self.responses.pop(0)
+
+
+class TestJsonRepair(unittest.TestCase):
+    def test_object_embedded_in_prose(self):
+        text = f"Here is the extraction: {json.dumps(MINIMAL_PAYLOAD)} Let me know if you need more."
+        parsed, truncated = json_repair.parse_llm_json(text)
+        self.assertFalse(truncated)
+        self.assertEqual(parsed["bundleType"], "InsurancePlan")
+
+    def test_trailing_commas_and_literals(self):
+        parsed, _ = json_repair.parse_llm_json('{"a": [1, 2,], "b": None, "c": True,}')
+        self.assertEqual(parsed, {"a": [1, 2], "b": None, "c": True})
+
+    def test_braces_inside_strings(self):
+        parsed, _ = json_repair.parse_llm_json('{"statement": "covers {day care} items", "n": 1}')
+        self.assertEqual(parsed["statement"], "covers {day care} items")
+
+    def test_truncated_object_is_closed(self):
+        parsed, truncated = json_repair.parse_llm_json('{"a": {"b": ["x", "y"], "c": "partial va')
+        self.assertTrue(truncated)
+        self.assertEqual(parsed, {"a": {"b": ["x", "y"]}})
+
+    def test_incomplete_sections(self):
+        template = {"organisation": {}, "insurancePlan": {"name": "", "coverages": [], "plans": []}}
+        parsed = {"organisation": {"name": "X"}, "insurancePlan": {"name": "P", "coverages": [{}]}}
+        sections = json_repair.find_incomplete_sections(parsed, template)
+        self.assertEqual(sections, [("insurancePlan", "plans"), ("insurancePlan", "coverages")])
+
+
+class TestTruncatedContinuation(unittest.TestCase):
+    def test_missing_sections_are_requested_and_merged(self):
+        full = json.dumps(MINIMAL_PAYLOAD)
+        truncated = full[:full.index('"coverages"') + 30]
+        continuation = json.dumps({"insurancePlan": {"coverages": MINIMAL_PAYLOAD["insurancePlan"]["coverages"]}})
+        service = ScriptedLLMService([truncated, continuation])
+
+        extracted = asyncio.run(_extract_insurance_data(service, "# Policy"))
+
+        self.assertEqual(len(service.calls), 2)
+        continuation_schema = service.calls[1][1]
+        self.assertIn("coverages", continuation_schema["properties"]["insurancePlan"]["properties"])
+        self.assertNotIn("organisation", continuation_schema["properties"])
+        self.assertEqual(extracted["insurancePlan"]["coverages"][0]["benefits"][0]["typeDisplay"], "Room Rent")
+        self.assertEqual(extracted["organisation"]["name"], "Test Health Insurance Co.")
+
+    def test_complete_response_needs_single_call(self):
+        service = ScriptedLLMService([json.dumps(MINIMAL_PAYLOAD)])
+        asyncio.run(_extract_insurance_data(service, "# Policy"))
+        self.assertEqual(len(service.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
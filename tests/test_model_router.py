@@ -0,0 +1,79 @@
+"""
+Tests for latency-tiered model routing — tier selection by document size and
+escalation to a larger tier when the output fails validation.
+"""
+import asyncio
+import json
+import unittest
+
+from src.config import LLMRoutingSettings, ModelTierSettings, settings
+from src.routes.claims import _extract_insurance_data
+from src.services.llm import model_router
+from src.services.llm.llm_service import LLMService
+
+VALID_PAYLOAD = {
+    "bundleType": "InsurancePlan",
+    "organisation": {"name": "Test Health Insurance Co."},
+    "insurancePlan": {"name": "Test Plan", "typeCode": "01", "typeDisplay": "Hospitalisation Indemnity"},
+}
+
+
+class ModelEchoLLMService(LLMService):
+    model_attribute = "model"
+
+    def __init__(self, responses_by_model):
+        self.model = "default-model"
+        self.responses_by_model = responses_by_model
+        self.calls = []
+
+    async def process_text(self, system_prompt, user_prompt, response_schema=None):
+        self.calls.append(self.model)
+        return self.responses_by_model[self.model]
+
+
+class TestModelRouter(unittest.TestCase):
+    def setUp(self):
+        self.original_routing = settings.llm.routing
+        self.original_provider = settings.llm.provider
+        settings.llm.provider = "openai"
+        settings.llm.routing = LLMRoutingSettings(enabled=True, tiers=[
+            ModelTierSettings(name="small", max_tokens=1000, max_pages=5, models={"openai": "small-model"}),
+            ModelTierSettings(name="large", models={"openai": "large-model"}),
+        ])
+
+    def tearDown(self):
+        settings.llm.routing = self.original_routing
+        settings.llm.provider = self.original_provider
+
+    def test_tier_selection(self):
+        tiers = settings.llm.routing.tiers
+        self.assertEqual(model_router.select_tier_index(tiers, 500, 3), 0)
+        self.assertEqual(model_router.select_tier_index(tiers, 5000, 3), 1)
+        self.assertEqual(model_router.select_tier_index(tiers, 500, 40), 1)
+        self.assertEqual(model_router.select_tier_index(tiers, 500, None), 0)
+
+    def test_disabled_routing_keeps_service(self):
+        settings.llm.routing = LLMRoutingSettings(enabled=False)
+        service = ModelEchoLLMService({})
+        self.assertEqual(model_router.route(service, 500), [("default", service)])
+
+    def test_short_document_uses_small_model(self):
+        service = ModelEchoLLMService({"small-model": json.dumps(VALID_PAYLOAD)})
+        routed = model_router.route(service, 500, 2)
+        self.assertEqual([tier for tier, _ in routed], ["small", "large"])
+        asyncio.run(routed[0][1].process_text("s", "u"))
+        self.assertEqual(service.model, "default-model")
+
+    def test_invalid_output_escalates(self):
+        service = ModelEchoLLMService({
+            "small-model": json.dumps({"insurancePlan": "not an object"}),
+            "large-model": json.dumps(VALID_PAYLOAD),
+        })
+        result = asyncio.run(_extract_insurance_data(service, "short policy", page_count=1))
+        self.assertEqual(result["insurancePlan"]["name"], "Test Plan")
+        # Clones share the calls list with the original service.
+        self.assertEqual(service.calls, ["small-model", "large-model"])
+
+
+if __name__ == "__main__":
+    unittest.main()
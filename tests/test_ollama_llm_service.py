@@ -0,0 +1,61 @@
+"""
+Tests for the native Ollama path — num_ctx bucketing, request shape and
+model warm-up.
+"""
+import asyncio
+import unittest
+
+from src.services.llm.llm_service import OllamaLLMService, select_num_ctx
+
+
+class RecordingOllamaService(OllamaLLMService):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def _post_chat(self, request):
+        self.requests.append(request)
+        return {"message": {"role": "assistant", "content": '{"ok": true}'}, "done_reason": "stop"}
+
+
+class TestSelectNumCtx(unittest.TestCase):
+    def test_rounds_up_to_bucket(self):
+        self.assertEqual(select_num_ctx(5000, [4096, 8192, 16384]), 8192)
+
+    def test_never_shrinks_below_floor(self):
+        self.assertEqual(select_num_ctx(1000, [4096, 8192, 16384], floor=16384), 16384)
+
+    def test_caps_at_largest_bucket(self):
+        self.assertEqual(select_num_ctx(99999, [4096, 8192]), 8192)
+
+
+class TestOllamaNativeRequest(unittest.TestCase):
+    def setUp(self):
+        self.service = RecordingOllamaService()
+
+    def test_process_text_sends_native_options(self):
+        schema = {"type": "object"}
+        response = asyncio.run(self.service.process_text("system", "user", schema))
+        request = self.service.requests[0]
+        self.assertEqual(response, '{"ok": true}')
+        self.assertEqual(request["format"], schema)
+        self.assertEqual(request["keep_alive"], self.service.config.keep_alive)
+        self.assertIn(request["options"]["num_ctx"], self.service.config.num_ctx_buckets)
+        self.assertEqual(request["messages"][0], {"role": "system", "content": "system"})
+
+    def test_context_window_is_sticky(self):
+        asyncio.run(self.service.process_text("system", "word " * 40000))
+        asyncio.run(self.service.process_text("system", "short"))
+        first, second = (request["options"]["num_ctx"] for request in self.service.requests)
+        self.assertEqual(first, second)
+
+    def test_warm_up_loads_system_prompt_only(self):
+        asyncio.run(self.service.warm_up("system"))
+        request = self.service.requests[0]
+        self.assertEqual(request["messages"], [{"role": "system", "content": "system"}])
+        self.assertEqual(request["options"]["num_predict"], 1)
+        self.assertNotIn("format", request)
+
+
+if __name__ == "__main__":
+    unittest.main()
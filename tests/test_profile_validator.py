@@ -0,0 +1,111 @@
+"""
+Tests for ProfileValidator — StructureDefinition cardinality, fixed values,
+required bindings and reference resolution over bundles we generate.
+"""
+import asyncio
+import copy
+import json
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from src.services.fhir import bulk_fhir_generator
+from src.services.fhir.insurance_plan_fhir_dict_builder import build_fhir_bundle
+from src.services.fhir.profile_validator import ProfileValidator, validate_bundle_line
+
+PAYLOAD = {
+    "organisation": {"name": "Test Health Insurance", "phone": "1800-000-000"},
+    "tpaOrganisation": {"name": "Speedy TPA", "identifier": "TPA-1"},
+    "insurancePlan": {
+        "status": "active",
+        "name": "Test Plan",
+        "typeCode": "01",
+        "typeDisplay": "Hospitalisation Indemnity",
+        "networks": ["Network A"],
+        "coverages": [{"typeDisplay": "Inpatient Care", "benefits": [{"typeDisplay": "Room Rent", "limitValue": "5000", "limitUnit": "INR"}]}],
+    },
+}
+
+
+def _plan(bundle: dict) -> dict:
+    return next(e["resource"] for e in bundle["entry"] if e["resource"]["resourceType"] == "InsurancePlan")
+
+
+def _errors(result: dict) -> list:
+    return [(issue["field"], issue["location"]) for issue in result["issues"] if issue["severity"] == "error"]
+
+
+class TestProfileValidator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.validator = ProfileValidator()
+        cls.bundle = build_fhir_bundle(copy.deepcopy(PAYLOAD))
+
+    def _validate(self, mutate) -> dict:
+        bundle = copy.deepcopy(self.bundle)
+        mutate(bundle)
+        return self.validator.validate(bundle)
+
+    def test_generated_bundle_is_valid(self):
+        result = self.validator.validate(self.bundle)
+        self.assertTrue(result["valid"], result["issues"])
+
+    def test_missing_name_breaks_cardinality(self):
+        result = self._validate(lambda b: _plan(b).pop("name"))
+        self.assertFalse(result["valid"])
+        self.assertIn(("InsurancePlan.name", "Bundle.entry[0].resource.name"), _errors(result))
+
+    def test_status_outside_required_binding(self):
+        result = self._validate(lambda b: _plan(b).update(status="live"))
+        self.assertEqual(_errors(result), [("InsurancePlan.status", "Bundle.entry[0].resource.status")])
+
+    def test_bundle_type_is_fixed(self):
+        result = self._validate(lambda b: b.update(type="searchset"))
+        self.assertIn(("Bundle.type", "Bundle.type"), _errors(result))
+
+    def test_empty_benefit_type_is_absent(self):
+        result = self._validate(lambda b: _plan(b)["coverage"][0]["benefit"][0].update(type={}))
+        self.assertIn(
+            ("InsurancePlan.coverage.benefit.type", "Bundle.entry[0].resource.coverage[0].benefit[0].type"),
+            _errors(result),
+        )
+
+    def test_unresolved_and_mistyped_references(self):
+        def mutate(bundle):
+            plan = _plan(bundle)
+            plan["ownedBy"] = {"reference": "urn:uuid:missing"}
+            plan["administeredBy"] = {"reference": bundle["entry"][0]["fullUrl"]}
+
+        messages = [issue["message"] for issue in self._validate(mutate)["issues"] if issue["severity"] == "error"]
+        self.assertEqual(len(messages), 2)
+        self.assertIn("does not resolve", messages[0])
+        self.assertIn("must point to Organization", messages[1])
+
+    def test_entry_slices_are_counted(self):
+        result = self._validate(lambda b: b.update(entry=[e for e in b["entry"] if e["resource"]["resourceType"] != "Organization"]))
+        self.assertIn(("Bundle.entry:Organization", "Bundle.entry"), _errors(result))
+
+
+class TestBulkValidation(unittest.TestCase):
+    def test_worker_pool_validates_lines(self):
+        bundle = build_fhir_bundle(copy.deepcopy(PAYLOAD))
+        lines = [json.dumps(bundle).encode(), b"{not json", json.dumps({"resourceType": "Patient"}).encode()]
+
+        async def run():
+            async def source():
+                for line in lines:
+                    yield line
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                return [json.loads(out) async for out in bulk_fhir_generator.stream_pool_results(source(), validate_bundle_line, executor=executor)]
+
+        results = {result["index"]: result for result in asyncio.run(run())}
+        self.assertTrue(results[0]["valid"])
+        self.assertIn("error", results[1])
+        self.assertFalse(results[2]["valid"])
+
+    def test_line_worker_in_process(self):
+        result = json.loads(validate_bundle_line(7, json.dumps(build_fhir_bundle(copy.deepcopy(PAYLOAD))).encode()))
+        self.assertEqual((result["index"], result["valid"]), (7, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Tests for ReplayLLMService — recorded completions, stub fallback and
+injected faults used for offline load testing.
+"""
+import asyncio
+import json
+import statistics
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.config import settings
+from src.routes.claims import _clean_and_parse_llm_response
+from src.services.llm.llm_service import LLMRateLimitError
+from src.services.llm.replay_llm_service import ReplayLLMService, compute_prompt_hash
+
+
+class TestReplayLLMService(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with mock.patch.object(settings.llm.replay, "recordings_dir", self.tmp_dir.name):
+            self.service = ReplayLLMService()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_stub_is_schema_valid(self):
+        response = asyncio.run(self.service.process_text("system", "# Gold Care Plan\n\nbody"))
+        parsed = _clean_and_parse_llm_response(response)
+        self.assertEqual(parsed["insurancePlan"]["name"], "Gold Care Plan")
+
+    def test_recording_is_replayed(self):
+        prompt_hash = compute_prompt_hash("system", "user")
+        with open(self.service.recordings_dir / f"{prompt_hash}.json", "w", encoding="utf-8") as f:
+            json.dump({"prompt_hash": prompt_hash, "response": '{"recorded": true}'}, f)
+        response = asyncio.run(self.service.process_text("system", "user"))
+        self.assertEqual(response, '{"recorded": true}')
+
+    def test_prompt_hash_depends_on_schema(self):
+        self.assertNotEqual(compute_prompt_hash("s", "u"), compute_prompt_hash("s", "u", {"type": "object"}))
+
+    def test_lognormal_latency_has_configured_mean(self):
+        latency = settings.llm.replay.latency.model_copy(update={
+            "distribution": "lognormal", "mean_seconds": 0.5, "stddev_seconds": 0.2,
+        })
+        self.service.config = settings.llm.replay.model_copy(update={"latency": latency})
+        samples = [self.service._sample_latency() for _ in range(20000)]
+        self.assertAlmostEqual(statistics.fmean(samples), 0.5, delta=0.01)
+        self.assertAlmostEqual(statistics.stdev(samples), 0.2, delta=0.01)
+
+        self.service.config = settings.llm.replay.model_copy(update={"latency": latency.model_copy(update={"mean_seconds": 0.0})})
+        self.assertEqual(self.service._sample_latency(), 0.0)
+
+    def test_recordings_dir_is_created_only_on_write(self):
+        self.assertEqual(self.service.recordings_dir, Path(self.tmp_dir.name))
+        self.service.recordings_dir = Path(self.tmp_dir.name) / "recordings"
+        asyncio.run(self.service.process_text("system", "# Plan"))
+        self.assertFalse(self.service.recordings_dir.exists())
+        self.service._save_recording("abc", "{}")
+        self.assertTrue((self.service.recordings_dir / "abc.json").is_file())
+
+    def test_injected_rate_limit(self):
+        self.service.config = settings.llm.replay.model_copy(update={"rate_limit_error_rate": 1.0})
+        with self.assertRaises(LLMRateLimitError):
+            asyncio.run(self.service.process_text("system", "user"))
+
+    def test_streamed_chunks_reassemble(self):
+        self.service.config = settings.llm.replay.model_copy(update={"stream_chunk_chars": 7})
+        streamed = asyncio.run(self.service.process_text("system", "# Plan"))
+        self.service.config = settings.llm.replay
+        self.assertEqual(streamed, asyncio.run(self.service.process_text("system", "# Plan")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the synthetic policy corpus — determinism, page counts, pruner
+behaviour on the generated section mix, and PDFs with and without a text layer.
+"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pypdfium2
+
+from src.schemas.insurance_schemas import INSURANCE_DATA_ADAPTER
+from src.services.policy_pruner import PolicyPruner
+from src.synthetic.policy_generator import generate_policy, write_policy
+from src import constants
+
+
+def _page_texts(pdf_path: Path) -> list:
+    document = pypdfium2.PdfDocument(str(pdf_path))
+    try:
+        return [page.get_textpage().get_text_range() for page in document]
+    finally:
+        document.close()
+
+
+class TestPolicyGenerator(unittest.TestCase):
+    def test_same_seed_same_document(self):
+        first = generate_policy(3, seed=7, pages=12, benefits=30)
+        self.assertEqual(first.markdown, generate_policy(3, seed=7, pages=12, benefits=30).markdown)
+        self.assertNotEqual(first.markdown, generate_policy(4, seed=7, pages=12, benefits=30).markdown)
+
+    def test_requested_scale(self):
+        policy = generate_policy(0, pages=60, benefits=300, costs=50)
+        plan = policy.payload["insurancePlan"]
+
+        self.assertEqual(policy.pages, 60)
+        self.assertEqual(sum(len(coverage["benefits"]) for coverage in plan["coverages"]), 300)
+        self.assertEqual(sum(len(option["specificCosts"]) for option in plan["plans"]), 50)
+        names = [benefit["typeDisplay"] for coverage in plan["coverages"] for benefit in coverage["benefits"]]
+        self.assertEqual(len(set(names)), len(names))
+        self.assertEqual(INSURANCE_DATA_ADAPTER.validate_python(policy.payload).model_dump(), policy.payload)
+
+    def test_pruner_drops_junk_and_keeps_every_fact(self):
+        policy = generate_policy(1, pages=30, benefits=80, junk_ratio=0.5)
+        pruned = PolicyPruner().prune(policy.markdown)
+        plan = policy.payload["insurancePlan"]
+
+        for heading in policy.junk_headings:
+            self.assertNotIn(f"# {heading}\n", pruned)
+        facts = [benefit["typeDisplay"] for coverage in plan["coverages"] for benefit in coverage["benefits"]]
+        facts += [item["statement"] for item in plan["exclusions"]] + [contact["phone"] for contact in plan["contacts"]]
+        facts += [cost["benefitTypeDisplay"] for option in plan["plans"] for cost in option["specificCosts"]]
+        facts += [policy.payload["organisation"]["email"], plan["periodStart"]] + plan["networks"]
+        for fact in facts:
+            self.assertIn(fact, pruned)
+        # Roughly half the document goes, as asked.
+        self.assertAlmostEqual(1 - len(pruned) / len(policy.markdown), 0.5, delta=0.1)
+
+    def test_custom_junk_keywords(self):
+        policy = generate_policy(0, pages=5, benefits=10, junk_keywords=["preamble"])
+        self.assertEqual(policy.junk_headings, ["Preamble"])
+
+
+class TestCorpusFiles(unittest.TestCase):
+    def test_writes_text_and_scanned_pdfs(self):
+        policy = generate_policy(2, pages=3, benefits=12)
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            row = write_policy(policy, output_dir, [constants.SYNTHETIC_FORMAT_PDF, constants.SYNTHETIC_FORMAT_SCAN], scan_dpi=50)
+            text_pages = _page_texts(output_dir / row["files"][constants.SYNTHETIC_FORMAT_PDF])
+            scanned_pages = _page_texts(output_dir / row["files"][constants.SYNTHETIC_FORMAT_SCAN])
+            truth = json.loads((output_dir / row["files"]["truth"]).read_text())
+
+        self.assertEqual(len(text_pages), policy.pages)
+        self.assertIn(policy.payload["insurancePlan"]["name"], text_pages[0])
+        self.assertEqual(len(scanned_pages), policy.pages)
+        self.assertEqual("".join(scanned_pages).strip(), "")
+        self.assertEqual(truth, policy.payload)
+        self.assertNotIn(constants.SYNTHETIC_FORMAT_MARKDOWN, row["files"])
+
+
+if __name__ == "__main__":
+    unittest.main()
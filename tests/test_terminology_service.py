@@ -0,0 +1,85 @@
+"""
+Tests for the SQLite terminology index — normalization, the exact/alias/fuzzy
+lookup cascade, batch lookups and importing extra code sets.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.config import TerminologySourceSettings, settings
+from src.services.terminology import terminology_index
+from src.services.terminology.terminology_service import TerminologyService
+
+ROOM_RENT = "568291000005106"
+
+
+class TestNormalization(unittest.TestCase):
+    def test_normalize_is_order_and_noise_insensitive(self):
+        self.assertEqual(terminology_index.normalize("Room Rent Charges (per day)"), "day per rent room")
+        self.assertEqual(terminology_index.normalize("rent, ROOM"), "rent room")
+
+    def test_british_and_american_spellings_meet(self):
+        self.assertEqual(
+            terminology_index.normalize("Pre-hospitalisation"), terminology_index.normalize("pre hospitalization")
+        )
+
+
+class TestTerminologyService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.service = TerminologyService(index_path=Path(cls.tmp.name) / "terminology.sqlite")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.close()
+        cls.tmp.cleanup()
+
+    def test_known_code_gets_official_display(self):
+        self.assertEqual(self.service.lookup(ROOM_RENT, "whatever"), (ROOM_RENT, "Hospital unit"))
+
+    def test_alias_resolves_to_code(self):
+        self.assertEqual(self.service.lookup("", "Room Rent"), (ROOM_RENT, "Hospital unit"))
+
+    def test_contained_and_fuzzy_terms_resolve(self):
+        self.assertEqual(self.service.lookup(None, "Room Rent Charges (per day)")[0], ROOM_RENT)
+        self.assertEqual(self.service.lookup(None, "Ambulence")[0], "49122002")
+
+    def test_unknown_term_is_returned_unchanged(self):
+        self.assertEqual(self.service.lookup("UNK", "Zebra crossing"), ("UNK", "Zebra crossing"))
+
+    def test_aborted_lookup_is_not_cached(self):
+        # A deadline already in the past makes the progress handler abort the first query.
+        with mock.patch.object(self.service.config, "lookup_timeout_ms", -1000):
+            self.assertEqual(self.service.lookup(None, "Ambulanse"), (None, "Ambulanse"))
+        self.assertEqual(self.service.lookup(None, "Ambulanse")[0], "49122002")
+
+    def test_lookup_many_deduplicates(self):
+        pairs = [("", "ICU"), ("", "ICU"), ("custom", "Other")]
+        result = self.service.lookup_many(pairs)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[("", "ICU")][0], "272181003")
+        self.assertEqual(result[("custom", "Other")], ("custom", "Other"))
+
+
+class TestExternalSources(unittest.TestCase):
+    def test_csv_source_is_indexed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "ndhm.csv"
+            source.write_text("code,display,aliases\n999001,Domiciliary hospitalisation,home hospitalisation\n")
+            config = settings.terminology.model_copy(update={
+                "sources": [TerminologySourceSettings(path=str(source), value_set="snomed")],
+            })
+            with mock.patch.object(settings, "terminology", config):
+                service = TerminologyService(index_path=Path(tmp) / "terminology.sqlite")
+                try:
+                    self.assertEqual(
+                        service.lookup(None, "Home hospitalization"), ("999001", "Domiciliary hospitalisation")
+                    )
+                finally:
+                    service.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Tests for the watch-folder daemon — debouncing of files still being written,
+inotify and polling backends, and moving inputs to processed/failed folders.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.batch.pipeline import run_pipeline
+from src.batch.watch import FolderWatcher, InputMover, move_input
+from src import constants
+
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.input_dir = self.root / "input"
+        self.input_dir.mkdir()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _collect(self, backend, drop, expected):
+        watcher = FolderWatcher(self.input_dir, settle_seconds=0.2, poll_seconds=0.05, backend=backend)
+
+        async def run():
+            stop = asyncio.Event()
+            seen = []
+            dropper = asyncio.ensure_future(drop())
+            started = time.monotonic()
+            async for path in watcher.files(stop):
+                seen.append((path.name, time.monotonic() - started))
+                if len(seen) == expected:
+                    stop.set()
+            await dropper
+            return seen
+
+        return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    def _assert_debounced(self, backend):
+        async def drop():
+            (self.input_dir / ".hidden.pdf").write_bytes(b"%PDF")
+            (self.input_dir / "upload.pdf.part").write_bytes(b"%PDF")
+            growing = self.input_dir / "growing.pdf"
+            with open(growing, "wb") as f:
+                for _ in range(5):
+                    f.write(b"%PDF chunk ")
+                    f.flush()
+                    await asyncio.sleep(0.1)
+            (self.input_dir / "ready.pdf").write_bytes(b"%PDF ready")
+
+        seen = self._collect(backend, drop, expected=2)
+        self.assertEqual(sorted(name for name, _ in seen), ["growing.pdf", "ready.pdf"])
+        # growing.pdf was last written at 0.4s, so it cannot be picked up before that plus the settle time.
+        growing_at = dict(seen)["growing.pdf"]
+        self.assertGreaterEqual(growing_at, 0.4 + 0.2 - 0.05)
+        self.assertLess(growing_at, 2.0)
+
+    def test_polling_backend_debounces(self):
+        self._assert_debounced(constants.WATCH_BACKEND_POLL)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_backend_debounces(self):
+        self._assert_debounced(constants.WATCH_BACKEND_INOTIFY)
+
+    def test_existing_files_are_picked_up_at_startup(self):
+        (self.input_dir / "backlog.pdf").write_bytes(b"%PDF")
+
+        async def drop():
+            pass
+
+        self.assertEqual([name for name, _ in self._collect(constants.WATCH_BACKEND_AUTO, drop, expected=1)], ["backlog.pdf"])
+
+    def test_move_input_never_overwrites(self):
+        target_dir = self.root / "processed"
+        first = self.input_dir / "plan.pdf"
+        first.write_bytes(b"one")
+        move_input(first, target_dir)
+        first.write_bytes(b"two")
+        second = move_input(first, target_dir)
+
+        self.assertFalse(first.exists())
+        self.assertNotEqual(second.name, "plan.pdf")
+        self.assertEqual(sorted(path.read_bytes() for path in target_dir.iterdir()), [b"one", b"two"])
+
+
+class TestWatchPipeline(unittest.TestCase):
+    def test_inputs_are_moved_after_processing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            input_dir = root / "input"
+            input_dir.mkdir()
+            watcher = FolderWatcher(input_dir, settle_seconds=0.05, poll_seconds=0.05, backend=constants.WATCH_BACKEND_POLL)
+            mover = InputMover(watcher, root / "processed", root / "failed")
+            outputs = []
+
+            def convert(path):
+                return path.read_bytes()
+
+            async def extract(path, converted):
+                if b"broken" in converted:
+                    raise ValueError("invalid LLM output")
+                return converted
+
+            def write(path, extracted):
+                outputs.append(path.name)
+                return []
+
+            async def run():
+                stop = asyncio.Event()
+
+                async def drop():
+                    for index in range(3):
+                        (input_dir / f"plan-{index}.pdf").write_bytes(b"%PDF broken" if index == 1 else b"%PDF")
+                        await asyncio.sleep(0.05)
+                    while len(list((root / "processed").glob("*.pdf"))) + len(list((root / "failed").glob("*.pdf"))) < 3:
+                        await asyncio.sleep(0.05)
+                    stop.set()
+
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    stats, _ = await asyncio.gather(
+                        run_pipeline(
+                            watcher.files(stop), convert, extract, write, convert_executor=executor,
+                            convert_workers=1, llm_concurrency=2,
+                            resume=mover.resume, on_result=mover.on_result, on_failure=mover.on_failure,
+                        ),
+                        drop(),
+                    )
+                return stats
+
+            stats = asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+            self.assertEqual(stats.succeeded, 2)
+            self.assertEqual(sorted(outputs), ["plan-0.pdf", "plan-2.pdf"])
+            self.assertEqual(list(input_dir.iterdir()), [])
+            self.assertEqual(sorted(path.name for path in (root / "processed").iterdir()), ["plan-0.pdf", "plan-2.pdf"])
+            error = (root / "failed" / "plan-1.pdf.error.txt").read_text()
+            self.assertIn("invalid LLM output", error)
+
+
+if __name__ == "__main__":
+    unittest.main()